@@ -1,756 +1,140 @@
 # clinic_inventory_list.py - Using Basic List Data Structures
 from datetime import datetime
 import customtkinter as ctk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import collections
-import json
 import os
+import threading
+
+from clinic_inventory import ClinicInventory, SQLiteBackend, parse_conditions
+from clinic_inventory.storage import DB_FILE
 
 # ---------------- APP CONFIG ----------------
 ctk.set_appearance_mode("system")
 ctk.set_default_color_theme("blue")
 
-# Using Multidimensional Array Data Structures for storing inventory data
-# Each row represents a record, each column represents a field
-# medicines[row][column] where columns are: [id, name, packs, items_per_pack, total_qty, expiry]
-medicines = []  # 2D array: medicines[row][0]=id, medicines[row][1]=name, etc.
-
-# equipment[row][column] where columns are: [id, name, stock, status]  
-equipment = []  # 2D array: equipment[row][0]=id, equipment[row][1]=name, etc.
-
-# Column indices for medicines array
-MED_ID = 0
-MED_NAME = 1
-MED_PACKS = 2
-MED_ITEMS_PER_PACK = 3
-MED_TOTAL_QTY = 4
-MED_EXPIRY = 5
-
-# Column indices for equipment array
-EQ_ID = 0
-EQ_NAME = 1
-EQ_STOCK = 2
-EQ_STATUS = 3
-
-# JSON file path for storing inventory data
-JSON_FILE = "clinic_inventory.json"
-
-# JSON Storage Functions
-def save_to_json():
-    """Save medicines and equipment data to JSON file"""
-    global medicines, equipment
-    try:
-        data = {
-            "medicines": medicines,
-            "equipment": equipment
-        }
-        with open(JSON_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving to JSON: {e}")
-
-def load_from_json():
-    """Load medicines and equipment data from JSON file"""
-    global medicines, equipment
-    try:
-        if os.path.exists(JSON_FILE):
-            with open(JSON_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                medicines = data.get("medicines", [])
-                equipment = data.get("equipment", [])
-                return True
-        return False
-    except Exception as e:
-        print(f"Error loading from JSON: {e}")
-        return False
-
-# Add default data to demonstrate list operations
-def initialize_default_data():
-    """Initialize the multidimensional arrays with default medicine and equipment data"""
-    global medicines, equipment
-    
-    # Try to load from JSON first
-    if not load_from_json():
-        # If no JSON file exists, start with empty arrays
-        medicines.clear()
-        equipment.clear()
-
-# Basic Array Operations for Medicines
-def add_medicine(name, packs, items_per_pack, total_qty, expiry):
-    """Add medicine to multidimensional array using append()"""
-    global medicines
-    
-    row_id = len(medicines) + 1  # simple auto-increment using array length
-    # Create a new row with all fields
-    new_row = [row_id, name, packs, items_per_pack, total_qty, expiry]
-    medicines.append(new_row)  # Add entire row to 2D array
-    save_to_json()  # Save changes to JSON
-    
-    # Return a dictionary for compatibility with existing code
-    return {
-        "id": row_id,
-        "name": name,
-        "packs": packs,
-        "items_per_pack": items_per_pack,
-        "total_qty": total_qty,
-        "expiry": expiry
-    }
-
-def insert_medicine_at_position(index, name, packs, items_per_pack, total_qty, expiry):
-    """Insert medicine into multidimensional array at a specific index using insert()"""
-    global medicines
-    
-    if not (0 <= index <= len(medicines)):
-        print(f"Error: Index {index} is out of bounds for medicines array (size {len(medicines)})")
-        return None
-    
-    # Generate a unique ID for the new medicine
-    new_id = (medicines[-1][MED_ID] + 1) if medicines else 1
-    
-    # Create new row with all fields
-    new_row = [new_id, name, packs, items_per_pack, total_qty, expiry]
-    medicines.insert(index, new_row)  # Insert entire row at specific index
-    
-    # Re-assign IDs to maintain sequential order after insertion
-    for i in range(len(medicines)):
-        medicines[i][MED_ID] = i + 1
-    
-    save_to_json()  # Save changes to JSON
-        
-    return {
-        "id": new_id,
-        "name": name,
-        "packs": packs,
-        "items_per_pack": items_per_pack,
-        "total_qty": total_qty,
-        "expiry": expiry
-    }
-
-def remove_medicine_by_id(medicine_id):
-    """Remove medicine by ID using multidimensional array operations"""
-    global medicines
-    
-    for i in range(len(medicines)):
-        if medicines[i][MED_ID] == medicine_id:
-            # Store the removed data before deletion
-            removed_data = {
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            }
-            # Remove entire row from 2D array
-            medicines.pop(i)
-            return removed_data
-    return None
-
-def remove_medicine_by_name(name):
-    """Remove medicine by name using multidimensional array operations"""
-    global medicines
-    
-    for i in range(len(medicines)):
-        if medicines[i][MED_NAME].lower() == name.lower():
-            # Store the removed data before deletion
-            removed_data = {
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            }
-            # Remove entire row from 2D array
-            medicines.pop(i)
-            save_to_json()  # Save changes to JSON
-            return removed_data
-    return None
-
-def get_medicine_by_index(index):
-    """Get medicine by multidimensional array index"""
-    if 0 <= index < len(medicines):
-        return {
-            "id": medicines[index][MED_ID],
-            "name": medicines[index][MED_NAME],
-            "packs": medicines[index][MED_PACKS],
-            "items_per_pack": medicines[index][MED_ITEMS_PER_PACK],
-            "total_qty": medicines[index][MED_TOTAL_QTY],
-            "expiry": medicines[index][MED_EXPIRY]
-        }
-    return None
-
-def insert_medicine(name, packs, items_per_pack, total_qty, expiry):
-    """Add medicine using basic multidimensional array append operation"""
-    return add_medicine(name, packs, items_per_pack, total_qty, expiry)
-
-def fetch_medicines():
-    """Fetch all medicines from multidimensional array"""
-    return [(medicines[i][MED_ID], medicines[i][MED_NAME], medicines[i][MED_PACKS], 
-             medicines[i][MED_ITEMS_PER_PACK], medicines[i][MED_TOTAL_QTY], medicines[i][MED_EXPIRY]) 
-            for i in range(len(medicines))]
-
-def get_medicine_count():
-    """Get total number of medicines in multidimensional array"""
-    return len(medicines)
-
-def is_medicines_empty():
-    """Check if medicines multidimensional array is empty"""
-    return len(medicines) == 0
-
-def clear_all_medicines():
-    """Clear all medicines from multidimensional array"""
-    global medicines
-    medicines.clear()
-    save_to_json()  # Save changes to JSON
-
-def update_medicine(row_id, name, packs, items_per_pack, total_qty, expiry):
-    """Update medicine using multidimensional array operations"""
-    global medicines
-    
-    for i in range(len(medicines)):
-        if medicines[i][MED_ID] == row_id:
-            medicines[i][MED_NAME] = name
-            medicines[i][MED_PACKS] = packs
-            medicines[i][MED_ITEMS_PER_PACK] = items_per_pack
-            medicines[i][MED_TOTAL_QTY] = total_qty
-            medicines[i][MED_EXPIRY] = expiry
-            save_to_json()  # Save changes to JSON
-            return True
-    return False
-
-def find_medicine_by_id(row_id):
-    """Find medicine by ID using multidimensional array operations"""
-    for i in range(len(medicines)):
-        if medicines[i][MED_ID] == row_id:
-            return {
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            }
-    return None
-
-def find_medicine_by_name(name):
-    """Find medicine by name using multidimensional array operations"""
-    for i in range(len(medicines)):
-        if medicines[i][MED_NAME].lower() == name.lower():
-            return {
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            }
-    return None
-
-def delete_medicine(row_id):
-    """Delete medicine using multidimensional array operations"""
-    return remove_medicine_by_id(row_id)
-
-# -------------------------
-# Equipment functions with Basic Multidimensional Array Operations
-# -------------------------
-def add_equipment(name, stock, status):
-    """Add equipment to multidimensional array using append()"""
-    global equipment
-    
-    row_id = len(equipment) + 1
-    # Create a new row with all fields
-    new_row = [row_id, name, stock, status]
-    equipment.append(new_row)  # Add entire row to 2D array
-    save_to_json()  # Save changes to JSON
-    
-    # Return a dictionary for compatibility with existing code
-    return {
-        "id": row_id,
-        "name": name,
-        "stock": stock,
-        "status": status
-    }
-
-def insert_equipment_at_position(index, name, stock, status):
-    """Insert equipment into multidimensional array at a specific index using insert()"""
-    global equipment
-    
-    if not (0 <= index <= len(equipment)):
-        print(f"Error: Index {index} is out of bounds for equipment array (size {len(equipment)})")
-        return None
-    
-    # Generate a unique ID for the new equipment
-    new_id = (equipment[-1][EQ_ID] + 1) if equipment else 1
-    
-    # Create new row with all fields
-    new_row = [new_id, name, stock, status]
-    equipment.insert(index, new_row)  # Insert entire row at specific index
-    
-    # Re-assign IDs to maintain sequential order after insertion
-    for i in range(len(equipment)):
-        equipment[i][EQ_ID] = i + 1
-    
-    save_to_json()  # Save changes to JSON
-        
-    return {
-        "id": new_id,
-        "name": name,
-        "stock": stock,
-        "status": status
-    }
-
-def remove_equipment_by_id(eq_id):
-    """Remove equipment by ID using multidimensional array operations"""
-    global equipment
-    
-    for i in range(len(equipment)):
-        if equipment[i][EQ_ID] == eq_id:
-            # Store the removed data before deletion
-            removed_data = {
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            }
-            # Remove entire row from 2D array
-            equipment.pop(i)
-            save_to_json()  # Save changes to JSON
-            return removed_data
-    return None
-
-def remove_equipment_by_name(name):
-    """Remove equipment by name using multidimensional array operations"""
-    global equipment
-    
-    for i in range(len(equipment)):
-        if equipment[i][EQ_NAME].lower() == name.lower():
-            # Store the removed data before deletion
-            removed_data = {
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            }
-            # Remove entire row from 2D array
-            equipment.pop(i)
-            save_to_json()  # Save changes to JSON
-            return removed_data
-    return None
-
-def get_equipment_by_index(index):
-    """Get equipment by multidimensional array index"""
-    if 0 <= index < len(equipment):
-        return {
-            "id": equipment[index][EQ_ID],
-            "name": equipment[index][EQ_NAME],
-            "stock": equipment[index][EQ_STOCK],
-            "status": equipment[index][EQ_STATUS]
-        }
-    return None
-
-def insert_equipment(name, stock, status):
-    """Add equipment using basic multidimensional array append operation"""
-    return add_equipment(name, stock, status)
-
-def fetch_equipment():
-    """Fetch all equipment from multidimensional array"""
-    return [(equipment[i][EQ_ID], equipment[i][EQ_NAME], equipment[i][EQ_STOCK], equipment[i][EQ_STATUS]) 
-            for i in range(len(equipment))]
-
-def get_equipment_count():
-    """Get total number of equipment in multidimensional array"""
-    return len(equipment)
-
-def is_equipment_empty():
-    """Check if equipment multidimensional array is empty"""
-    return len(equipment) == 0
-
-def clear_all_equipment():
-    """Clear all equipment from multidimensional array"""
-    global equipment
-    equipment.clear()
-    save_to_json()  # Save changes to JSON
-
-def update_equipment(row_id, name, stock, status):
-    """Update equipment using multidimensional array operations"""
-    global equipment
-    
-    for i in range(len(equipment)):
-        if equipment[i][EQ_ID] == row_id:
-            equipment[i][EQ_NAME] = name
-            equipment[i][EQ_STOCK] = stock
-            equipment[i][EQ_STATUS] = status
-            save_to_json()  # Save changes to JSON
-            return True
-    return False
-
-def find_equipment_by_id(row_id):
-    """Find equipment by ID using multidimensional array operations"""
-    for i in range(len(equipment)):
-        if equipment[i][EQ_ID] == row_id:
-            return {
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            }
-    return None
-
-def find_equipment_by_name(name):
-    """Find equipment by name using multidimensional array operations"""
-    for i in range(len(equipment)):
-        if equipment[i][EQ_NAME].lower() == name.lower():
-            return {
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            }
-    return None
-
-def delete_equipment(row_id):
-    """Delete equipment using multidimensional array operations"""
-    return remove_equipment_by_id(row_id)
-
-# -------------------------
-# Array Sorting Functions
-# -------------------------
-def sort_medicines_by_name(ascending=True):
-    """Sort medicines multidimensional array by name"""
-    global medicines
-    
-    # Sort the 2D array by name column
-    medicines.sort(key=lambda row: row[MED_NAME].lower(), reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": medicines[i][MED_ID], "name": medicines[i][MED_NAME], "packs": medicines[i][MED_PACKS], 
-             "items_per_pack": medicines[i][MED_ITEMS_PER_PACK], "total_qty": medicines[i][MED_TOTAL_QTY], 
-             "expiry": medicines[i][MED_EXPIRY]} for i in range(len(medicines))]
-
-def sort_medicines_by_expiry(ascending=True):
-    """Sort medicines multidimensional array by expiry date"""
-    global medicines
-    
-    # Sort the 2D array by expiry column
-    medicines.sort(key=lambda row: row[MED_EXPIRY], reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": medicines[i][MED_ID], "name": medicines[i][MED_NAME], "packs": medicines[i][MED_PACKS], 
-             "items_per_pack": medicines[i][MED_ITEMS_PER_PACK], "total_qty": medicines[i][MED_TOTAL_QTY], 
-             "expiry": medicines[i][MED_EXPIRY]} for i in range(len(medicines))]
-
-def sort_medicines_by_total_qty(ascending=True):
-    """Sort medicines multidimensional array by total quantity"""
-    global medicines
-    
-    # Sort the 2D array by total_qty column
-    medicines.sort(key=lambda row: row[MED_TOTAL_QTY], reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": medicines[i][MED_ID], "name": medicines[i][MED_NAME], "packs": medicines[i][MED_PACKS], 
-             "items_per_pack": medicines[i][MED_ITEMS_PER_PACK], "total_qty": medicines[i][MED_TOTAL_QTY], 
-             "expiry": medicines[i][MED_EXPIRY]} for i in range(len(medicines))]
-
-def sort_medicines_by_packs(ascending=True):
-    """Sort medicines multidimensional array by packs"""
-    global medicines
-    
-    # Sort the 2D array by packs column
-    medicines.sort(key=lambda row: row[MED_PACKS], reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": medicines[i][MED_ID], "name": medicines[i][MED_NAME], "packs": medicines[i][MED_PACKS], 
-             "items_per_pack": medicines[i][MED_ITEMS_PER_PACK], "total_qty": medicines[i][MED_TOTAL_QTY], 
-             "expiry": medicines[i][MED_EXPIRY]} for i in range(len(medicines))]
-
-def sort_equipment_by_name(ascending=True):
-    """Sort equipment multidimensional array by name"""
-    global equipment
-    
-    # Sort the 2D array by name column
-    equipment.sort(key=lambda row: row[EQ_NAME].lower(), reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": equipment[i][EQ_ID], "name": equipment[i][EQ_NAME], "stock": equipment[i][EQ_STOCK], 
-             "status": equipment[i][EQ_STATUS]} for i in range(len(equipment))]
-
-def sort_equipment_by_stock(ascending=True):
-    """Sort equipment multidimensional array by stock quantity"""
-    global equipment
-    
-    # Sort the 2D array by stock column
-    equipment.sort(key=lambda row: row[EQ_STOCK], reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": equipment[i][EQ_ID], "name": equipment[i][EQ_NAME], "stock": equipment[i][EQ_STOCK], 
-             "status": equipment[i][EQ_STATUS]} for i in range(len(equipment))]
-
-def sort_equipment_by_status(ascending=True):
-    """Sort equipment multidimensional array by status"""
-    global equipment
-    
-    # Sort the 2D array by status column
-    equipment.sort(key=lambda row: row[EQ_STATUS].lower(), reverse=not ascending)
-    save_to_json()  # Save changes to JSON
-    
-    return [{"id": equipment[i][EQ_ID], "name": equipment[i][EQ_NAME], "stock": equipment[i][EQ_STOCK], 
-             "status": equipment[i][EQ_STATUS]} for i in range(len(equipment))]
-
-# -------------------------
-# Array Filtering Functions
-# -------------------------
-def filter_medicines_by_expiry_range(start_date, end_date):
-    """Filter medicines by expiry date range using multidimensional array"""
-    from datetime import datetime
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        result = []
-        for i in range(len(medicines)):
-            if start <= datetime.strptime(medicines[i][MED_EXPIRY], "%Y-%m-%d") <= end:
-                result.append({
-                    "id": medicines[i][MED_ID],
-                    "name": medicines[i][MED_NAME],
-                    "packs": medicines[i][MED_PACKS],
-                    "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                    "total_qty": medicines[i][MED_TOTAL_QTY],
-                    "expiry": medicines[i][MED_EXPIRY]
-                })
-        return result
-    except ValueError:
-        return []
-
-def filter_medicines_by_low_stock(threshold=5):
-    """Filter medicines with low stock (total_qty <= threshold) using multidimensional array"""
-    result = []
-    for i in range(len(medicines)):
-        if medicines[i][MED_TOTAL_QTY] <= threshold:
-            result.append({
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            })
-    return result
-
-def filter_medicines_by_name_pattern(pattern):
-    """Filter medicines by name pattern (case-insensitive) using multidimensional array"""
-    result = []
-    for i in range(len(medicines)):
-        if pattern.lower() in medicines[i][MED_NAME].lower():
-            result.append({
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            })
-    return result
-
-def get_medicines_slice(start, end):
-    """Get a slice of medicines multidimensional array using slicing operation"""
-    result = []
-    for i in range(start, min(end, len(medicines))):
-        result.append({
-            "id": medicines[i][MED_ID],
-            "name": medicines[i][MED_NAME],
-            "packs": medicines[i][MED_PACKS],
-            "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-            "total_qty": medicines[i][MED_TOTAL_QTY],
-            "expiry": medicines[i][MED_EXPIRY]
-        })
-    return result
-
-def filter_medicines_by_packs_range(min_packs, max_packs):
-    """Filter medicines by packs range using multidimensional array"""
-    result = []
-    for i in range(len(medicines)):
-        if min_packs <= medicines[i][MED_PACKS] <= max_packs:
-            result.append({
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            })
-    return result
-
-def filter_equipment_by_stock_level(threshold, above=True):
-    """Filter equipment by stock level using multidimensional array"""
-    result = []
-    for i in range(len(equipment)):
-        if above and equipment[i][EQ_STOCK] >= threshold:
-            result.append({
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            })
-        elif not above and equipment[i][EQ_STOCK] <= threshold:
-            result.append({
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            })
-    return result
-
-def filter_equipment_by_status_pattern(pattern):
-    """Filter equipment by status pattern (case-insensitive) using multidimensional array"""
-    result = []
-    for i in range(len(equipment)):
-        if pattern.lower() in equipment[i][EQ_STATUS].lower():
-            result.append({
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            })
-    return result
-
-def filter_equipment_by_name_pattern(pattern):
-    """Filter equipment by name pattern (case-insensitive) using multidimensional array"""
-    result = []
-    for i in range(len(equipment)):
-        if pattern.lower() in equipment[i][EQ_NAME].lower():
-            result.append({
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            })
-    return result
-
-def get_equipment_slice(start, end):
-    """Get a slice of equipment multidimensional array using slicing operation"""
-    result = []
-    for i in range(start, min(end, len(equipment))):
-        result.append({
-            "id": equipment[i][EQ_ID],
-            "name": equipment[i][EQ_NAME],
-            "stock": equipment[i][EQ_STOCK],
-            "status": equipment[i][EQ_STATUS]
-        })
-    return result
-
-def filter_equipment_by_stock_range(min_stock, max_stock):
-    """Filter equipment by stock range using multidimensional array"""
-    result = []
-    for i in range(len(equipment)):
-        if min_stock <= equipment[i][EQ_STOCK] <= max_stock:
-            result.append({
-                "id": equipment[i][EQ_ID],
-                "name": equipment[i][EQ_NAME],
-                "stock": equipment[i][EQ_STOCK],
-                "status": equipment[i][EQ_STATUS]
-            })
-    return result
-
-# -------------------------
-# Advanced Array Operations
-# -------------------------
-def get_medicines_sorted_by_expiry():
-    """Get medicines sorted by expiry date (earliest first)"""
-    return sort_medicines_by_expiry(ascending=True)
-
-def get_equipment_sorted_by_stock():
-    """Get equipment sorted by stock quantity (highest first)"""
-    return sort_equipment_by_stock(ascending=False)
-
-def get_low_stock_medicines(threshold=5):
-    """Get all medicines with low stock"""
-    return filter_medicines_by_low_stock(threshold)
-
-def get_low_stock_equipment(threshold=3):
-    """Get all equipment with low stock"""
-    return filter_equipment_by_stock_level(threshold, above=False)
-
-def get_expiring_medicines(days_ahead=30):
-    """Get medicines expiring within specified days using multidimensional array"""
-    from datetime import datetime, timedelta
-    cutoff_date = datetime.now() + timedelta(days=days_ahead)
-    result = []
-    for i in range(len(medicines)):
-        if datetime.strptime(medicines[i][MED_EXPIRY], "%Y-%m-%d") <= cutoff_date:
-            result.append({
-                "id": medicines[i][MED_ID],
-                "name": medicines[i][MED_NAME],
-                "packs": medicines[i][MED_PACKS],
-                "items_per_pack": medicines[i][MED_ITEMS_PER_PACK],
-                "total_qty": medicines[i][MED_TOTAL_QTY],
-                "expiry": medicines[i][MED_EXPIRY]
-            })
-    return result
-
-def get_medicines_by_name_search(search_term):
-    """Search medicines by name (case-insensitive partial match)"""
-    return filter_medicines_by_name_pattern(search_term)
-
-def get_equipment_by_name_search(search_term):
-    """Search equipment by name (case-insensitive partial match)"""
-    return filter_equipment_by_name_pattern(search_term)
-
-def find_medicine_index_by_id(medicine_id):
-    """Find the index of a medicine by its ID using multidimensional array operations (internal utility)"""
-    for i in range(len(medicines)):
-        if medicines[i][MED_ID] == medicine_id:
-            return i
-    return -1 # Not found
-
-def count_medicines_by_name(name):
-    """Count occurrences of a medicine name using multidimensional array operations (internal utility)"""
-    count = 0
-    for i in range(len(medicines)):
-        if medicines[i][MED_NAME].lower() == name.lower():
-            count += 1
-    return count
-
-def find_equipment_index_by_id(eq_id):
-    """Find the index of an equipment by its ID using multidimensional array operations (internal utility)"""
-    for i in range(len(equipment)):
-        if equipment[i][EQ_ID] == eq_id:
-            return i
-    return -1 # Not found
-
-def count_equipment_by_name(name):
-    """Count occurrences of an equipment name using multidimensional array operations (internal utility)"""
-    count = 0
-    for i in range(len(equipment)):
-        if equipment[i][EQ_NAME].lower() == name.lower():
-            count += 1
-    return count
-
-def get_array_statistics():
-    """Get statistics about the multidimensional arrays"""
-    med_count = len(medicines)
-    eq_count = len(equipment)
-    low_stock_med = len(get_low_stock_medicines())
-    low_stock_eq = len(get_low_stock_equipment())
-    expiring_med = len(get_expiring_medicines())
-    
-    return {
-        "medicines_count": med_count,
-        "equipment_count": eq_count,
-        "low_stock_medicines": low_stock_med,
-        "low_stock_equipment": low_stock_eq,
-        "expiring_medicines": expiring_med
-    }
+# The inventory data layer (multidimensional arrays, CRUD, sort/filter and JSON
+# storage) lives in the clinic_inventory package so it can be used without the GUI.
+
+# ---------------- VIRTUAL TABLE ----------------
+class VirtualTreeview:
+    """Shows a large result set in a ttk.Treeview one screenful at a time.
+
+    Only the rows in the viewport (plus a few overscan rows) exist as Treeview
+    items. The scrollbar and mouse wheel move an offset into the result set
+    and the visible window is fetched from the source with
+    fetch(start, count), so a refresh costs the same for 100 or 100,000 rows.
+
+    Items use the record ID (first value) as their iid, and every render is
+    a diff against what is on screen: only rows that appeared, disappeared,
+    changed or moved touch the Treeview, so a one-row edit is one operation.
+    """
+
+    def __init__(self, tree, scrollbar, tag_of=None, overscan=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.tag_of = tag_of          # values -> tags tuple, for highlighting
+        self.overscan = overscan
+        self.offset = 0               # index of the first row shown
+        self.visible = 20             # rows that fit in the viewport (updated on resize)
+        self.total = 0
+        self._fetch = lambda start, count: []
+        self._shown = {}              # iid -> (values, tags) currently in the Treeview
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+
+    def set_source(self, total, fetch, keep_offset=False):
+        """Show `total` rows supplied page by page by fetch(start, count)"""
+        self.total = total
+        self._fetch = fetch
+        if not keep_offset:
+            self.offset = 0
+        self.render()
+
+    def render(self):
+        tree = self.tree
+        shown = self._shown
+        self.offset = max(0, min(self.offset, self.total - self.visible))
+        rows = self._fetch(self.offset, self.visible + self.overscan) if self.total else []
+        wanted = [str(values[0]) for values in rows]
+        wanted_set = set(wanted)
+
+        # Rows that left the window
+        stale = [iid for iid in shown if iid not in wanted_set]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del shown[iid]
+
+        # New and changed rows
+        order = list(tree.get_children())
+        for index, (iid, values) in enumerate(zip(wanted, rows)):
+            state = (tuple(values), self.tag_of(values) if self.tag_of else ())
+            if iid not in shown:
+                tree.insert("", index, iid=iid, values=state[0], tags=state[1])
+                order.insert(index, iid)
+            elif shown[iid] != state:
+                tree.item(iid, values=state[0], tags=state[1])
+            shown[iid] = state
+
+        # Rows whose position changed (e.g. a re-sort or an insert above them)
+        for index, iid in enumerate(wanted):
+            if order[index] != iid:
+                tree.move(iid, "", index)
+                order.remove(iid)
+                order.insert(index, iid)
+
+        tree.yview_moveto(0)
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self.render()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.offset += -3 if up else 3
+        self.render()
+        return "break"  # the Treeview must not scroll its own (partial) item list
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, event.height // row_height - 1)  # minus the heading row
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
 
 
 # ---------------- APP CLASS ----------------
 class ClinicInventoryApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, inventory=None):
         super().__init__()
         self.title("🏥 Clinic Inventory System")
         self.geometry("1000x600")
         self.minsize(900, 550)
 
-        # Data Structure initialization - using Python lists with basic operations
+        # Data Structure initialization - the headless inventory engine owns the arrays
+        # (clinic_inventory.json is loaded on a worker thread once the window exists;
+        # the binary snapshot written on close lets the first rows show immediately)
+        load_in_background = inventory is None
+        self.inventory = inventory if inventory is not None else ClinicInventory(autoload=False, binary_snapshot=True)
+        # JSON writes happen on a background thread so a slow disk never freezes the window
+        self.inventory.start_background_writer()
+        # Queries and sorts run on worker threads; finished results are picked up by an
+        # after() poll so widgets are only ever touched from the Tk thread
+        self.workers = self.inventory.start_query_workers()
+        self.worker_poll_ms = 30
+        self._worker_poll_job = None
 
         # Selected item ids
         self.selected_medicine_id = None
@@ -761,13 +145,23 @@ class ClinicInventoryApp(ctk.CTk):
         # for append and popleft operations, which are essential for efficient queue management.
         # A regular list would have O(n) for pop(0) due to element shifting.
         self.transaction_log = collections.deque(maxlen=7) # Keep last 7 transactions
+
+        # Pending type-ahead query (after() id) so a burst of keystrokes runs one search
+        self._med_typeahead_job = None
+        self.typeahead_delay_ms = 200
+        self.typeahead_limit = 50   # top-N matches shown while typing
+
+        # Active sorted view per table as (sort_by, ascending); None shows storage order.
+        # Sorting only changes the view, never the stored array or the JSON file.
+        self.med_view_order = None
+        self.eq_view_order = None
         # self.log_transaction("Application started.") # Moved to after UI creation
 
-        # Initialize with default data
-        initialize_default_data()
-        
         self.create_ui()
-        self.load_all_tables()
+        if load_in_background:
+            self.start_background_load()
+        else:
+            self.load_all_tables()
         self.log_transaction("Application started.")
 
     def log_transaction(self, message):
@@ -776,6 +170,12 @@ class ClinicInventoryApp(ctk.CTk):
         self.transaction_log.append(f"[{timestamp}] {message}")
         self.update_transaction_log_display()
 
+    def report_callback_exception(self, exc_type, exc_value, exc_traceback):
+        """Show errors raised by button handlers (e.g. a failed database write) instead of only printing them"""
+        super().report_callback_exception(exc_type, exc_value, exc_traceback)
+        messagebox.showerror("Error", f"The last action failed and was not saved:\n{exc_value}")
+        self.load_all_tables()
+
     # ---------- UI ----------
     def create_ui(self):
         # Top area: tabs
@@ -799,10 +199,34 @@ class ClinicInventoryApp(ctk.CTk):
         # Time display at top right
         time_frame = ctk.CTkFrame(self)
         time_frame.place(relx=1.0, rely=0, x=-10, y=10, anchor="ne")
+        self.busy_label = ctk.CTkLabel(time_frame, text="", font=("Arial", 12))
+        self.busy_label.pack(side="left", padx=5, pady=5)
         self.time_label = ctk.CTkLabel(time_frame, text="", font=("Arial", 12))
-        self.time_label.pack(padx=5, pady=5)
+        self.time_label.pack(side="left", padx=5, pady=5)
         self.update_time()
 
+    # ---------- BACKGROUND QUERIES ----------
+    # channel is "medicines" or "equipment": a newer request for a table replaces the
+    # older one, whose result is discarded, so the last filter/sort/search always wins
+    def run_in_background(self, channel, job, on_done, on_error=None):
+        self.workers.submit(channel, job, on_done, on_error)
+        self.set_busy(True)
+        if self._worker_poll_job is None:
+            self._worker_poll_job = self.after(self.worker_poll_ms, self.poll_workers)
+
+    def poll_workers(self):
+        self._worker_poll_job = None
+        self.workers.poll()
+        if self.workers.busy:
+            self._worker_poll_job = self.after(self.worker_poll_ms, self.poll_workers)
+        else:
+            self.set_busy(False)
+
+    def set_busy(self, busy):
+        """Show that a query is running instead of leaving the window looking hung"""
+        self.busy_label.configure(text="⏳ Working..." if busy else "")
+        self.configure(cursor="watch" if busy else "")
+
     # ---------- MEDICINES TAB ----------
     def create_medicines_tab(self, parent):
         # Input frame
@@ -849,6 +273,9 @@ class ClinicInventoryApp(ctk.CTk):
         update_btn = ctk.CTkButton(actions_frm, text="📝 Update Medicine", fg_color="orange", command=self.update_medicine_ui)
         update_btn.pack(side="left", padx=8, pady=5)
 
+        import_btn = ctk.CTkButton(actions_frm, text="📥 Import Delivery", fg_color="darkcyan", command=self.import_delivery)
+        import_btn.pack(side="left", padx=8, pady=5)
+
         # View Buttons
         view_btn = ctk.CTkButton(actions_frm, text="👁 View Last", fg_color="green", command=self.view_last_medicine)
         view_btn.pack(side="left", padx=(20, 8), pady=5)
@@ -888,7 +315,7 @@ class ClinicInventoryApp(ctk.CTk):
         # Filter Controls
         ctk.CTkLabel(sort_filter_frm, text="Filter:").pack(side="left", padx=(20, 5), pady=5)
         self.med_filter_type = ctk.StringVar(value="name")
-        med_filter_combo = ctk.CTkComboBox(sort_filter_frm, values=["name", "low_stock", "expiry_range", "packs_range"], 
+        med_filter_combo = ctk.CTkComboBox(sort_filter_frm, values=["name", "low_stock", "expiry_range", "packs_range", "combined"], 
                                           variable=self.med_filter_type, width=120)
         med_filter_combo.pack(side="left", padx=5, pady=5)
         
@@ -896,15 +323,16 @@ class ClinicInventoryApp(ctk.CTk):
         self.med_filter_value.pack(side="left", padx=5, pady=5)
         
         ctk.CTkButton(sort_filter_frm, text="🔍 Filter", width=80, command=self.filter_medicines).pack(side="left", padx=5, pady=5)
-        ctk.CTkButton(sort_filter_frm, text="⟳ Reset", width=80, command=self.load_medicines_table).pack(side="left", padx=5, pady=5)
+        ctk.CTkButton(sort_filter_frm, text="⟳ Reset", width=80, command=self.reset_medicines_view).pack(side="left", padx=5, pady=5)
 
         # Search
         searchfrm = ctk.CTkFrame(parent)
         searchfrm.pack(fill="x", padx=10, pady=(0, 5))
         self.med_search = ctk.CTkEntry(searchfrm, placeholder_text="Search medicines by name")
         self.med_search.pack(side="left", padx=6, pady=6, fill="x", expand=True)
+        self.med_search.bind("<KeyRelease>", self.schedule_med_typeahead)
         ctk.CTkButton(searchfrm, text="🔍 Search", width=100, command=self.search_medicines).pack(side="left", padx=6)
-        ctk.CTkButton(searchfrm, text="⟳ Reset", width=80, command=self.load_medicines_table).pack(side="left", padx=6)
+        ctk.CTkButton(searchfrm, text="⟳ Reset", width=80, command=self.reset_medicines_view).pack(side="left", padx=6)
 
         # Table
         tablefrm = ctk.CTkFrame(parent)
@@ -925,14 +353,17 @@ class ClinicInventoryApp(ctk.CTk):
         self.med_tree.bind("<<TreeviewSelect>>", self.on_med_select)
 
         # Scrollbar
-        scrollbar = ttk.Scrollbar(tablefrm, orient="vertical", command=self.med_tree.yview)
-        self.med_tree.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(tablefrm, orient="vertical")
         scrollbar.pack(side="right", fill="y")
+        # Only the visible rows are kept in the Treeview; pages are fetched on scroll
+        self.med_table = VirtualTreeview(self.med_tree, scrollbar, tag_of=self.med_row_tags)
 
         # Style & tag for low stock
         style = ttk.Style()
         style.configure("Treeview", rowheight=26, font=("Arial", 11))
         self.med_tree.tag_configure("low", background="#ffdddd")
+        self.med_tree.tag_configure("expired", background="#ff9e9e")
+        self.med_tree.tag_configure("near_expiry", background="#fff3c4")
 
     # ---------- EQUIPMENT TAB ----------
     def create_equipment_tab(self, parent):
@@ -1007,7 +438,7 @@ class ClinicInventoryApp(ctk.CTk):
         # Filter Controls
         ctk.CTkLabel(sort_filter_frm, text="Filter:").pack(side="left", padx=(20, 5), pady=5)
         self.eq_filter_type = ctk.StringVar(value="name")
-        eq_filter_combo = ctk.CTkComboBox(sort_filter_frm, values=["name", "status", "stock_level", "stock_range"], 
+        eq_filter_combo = ctk.CTkComboBox(sort_filter_frm, values=["name", "status", "stock_level", "stock_range", "combined"], 
                                          variable=self.eq_filter_type, width=120)
         eq_filter_combo.pack(side="left", padx=5, pady=5)
         
@@ -1015,7 +446,7 @@ class ClinicInventoryApp(ctk.CTk):
         self.eq_filter_value.pack(side="left", padx=5, pady=5)
         
         ctk.CTkButton(sort_filter_frm, text="🔍 Filter", width=80, command=self.filter_equipment).pack(side="left", padx=5, pady=5)
-        ctk.CTkButton(sort_filter_frm, text="⟳ Reset", width=80, command=self.load_equipment_table).pack(side="left", padx=5, pady=5)
+        ctk.CTkButton(sort_filter_frm, text="⟳ Reset", width=80, command=self.reset_equipment_view).pack(side="left", padx=5, pady=5)
 
         # Search
         searchfrm = ctk.CTkFrame(parent)
@@ -1023,7 +454,7 @@ class ClinicInventoryApp(ctk.CTk):
         self.eq_search = ctk.CTkEntry(searchfrm, placeholder_text="Search equipment by name or description")
         self.eq_search.pack(side="left", padx=6, pady=6, fill="x", expand=True)
         ctk.CTkButton(searchfrm, text="🔍 Search", width=100, command=self.search_equipment).pack(side="left", padx=6)
-        ctk.CTkButton(searchfrm, text="⟳ Reset", width=80, command=self.load_equipment_table).pack(side="left", padx=6)
+        ctk.CTkButton(searchfrm, text="⟳ Reset", width=80, command=self.reset_equipment_view).pack(side="left", padx=6)
 
         # Table
         tablefrm = ctk.CTkFrame(parent)
@@ -1040,9 +471,9 @@ class ClinicInventoryApp(ctk.CTk):
         self.eq_tree.pack(fill="both", expand=True, side="left")
         self.eq_tree.bind("<<TreeviewSelect>>", self.on_eq_select)
 
-        scrollbar = ttk.Scrollbar(tablefrm, orient="vertical", command=self.eq_tree.yview)
-        self.eq_tree.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(tablefrm, orient="vertical")
         scrollbar.pack(side="right", fill="y")
+        self.eq_table = VirtualTreeview(self.eq_tree, scrollbar, tag_of=self.eq_row_tags)
 
         # Style & tag for low stock
         style = ttk.Style()
@@ -1052,48 +483,102 @@ class ClinicInventoryApp(ctk.CTk):
 
 
     # ---------- LOAD & DISPLAY ----------
+    def start_background_load(self):
+        """Load the inventory on a worker; meanwhile page rows straight from the memory-mapped snapshot"""
+        snapshot = self.inventory.open_binary_snapshot()
+        if snapshot is not None:
+            medicines, equipment = snapshot.table("medicines"), snapshot.table("equipment")
+            self.med_table.set_source(len(medicines), medicines.page)
+            self.eq_table.set_source(len(equipment), equipment.page)
+        locked = threading.Event()
+
+        def load():
+            with self.inventory.lock:
+                locked.set()  # the engine lock is held from here on, so a mutation waits for the load
+                self.inventory.initialize_default_data()
+            # The row colours need the alert indexes; build them here rather than on the Tk thread
+            inventory = self.inventory
+            inventory.build_indexes([inventory.medicine_expiry, inventory.medicine_alerts, inventory.equipment_alerts])
+
+        def loaded(_result):
+            self.load_all_tables()
+            # The search indexes are built in the background so the first search is quick
+            self.run_in_background("indexes", self.inventory.build_indexes, lambda _result: None)
+            if snapshot is not None:
+                snapshot.close()
+            if self.inventory.load_error is not None:
+                messagebox.showerror("Load Error",
+                    f"The inventory file could not be loaded:\n{self.inventory.load_error}\n\n"
+                    f"Changes will not be saved over it until the file is fixed and the app restarted.")
+        self.run_in_background("load", load, loaded, loaded)
+        locked.wait()
+
     def load_all_tables(self):
         self.load_medicines_table()
         self.load_equipment_table()
 
-    def load_medicines_table(self):
-        for row in self.med_tree.get_children():
-            self.med_tree.delete(row)
-        rows = fetch_medicines()
-        for r in rows:
-            rid, name, packs, items_per_pack, total_qty, expiry = r
-            self.med_tree.insert("", "end", values=(rid, name, packs, items_per_pack, total_qty, expiry))
-        self.highlight_med_low_stock()
-
-    def load_equipment_table(self):
-        for row in self.eq_tree.get_children():
-            self.eq_tree.delete(row)
-        rows = fetch_equipment()
-        for r in rows:
-            rid, name, quantity, description = r
-            self.eq_tree.insert("", "end", values=(rid, name, quantity, description))
-        self.highlight_eq_low_stock()
+    def load_medicines_table(self, keep_position=False, on_loaded=None):
+        # Pages come straight from the engine, in storage order or the active sorted view.
+        # A sorted view is built on a worker first (free once cached), so the first
+        # sort by a key never blocks the window.
+        sort_by, ascending = self.med_view_order or (None, True)
+
+        def show(_size=None):
+            self.med_table.set_source(
+                self.inventory.get_medicine_count(),
+                lambda start, count: self.inventory.get_medicines_page(start, count, sort_by, ascending),
+                keep_offset=keep_position)
+            if on_loaded is not None:
+                on_loaded()
+        if sort_by is None:
+            self.workers.cancel("medicines")
+            show()
+        else:
+            self.run_in_background("medicines", lambda: self.inventory.prepare_sorted_view("medicines", sort_by), show)
+
+    def load_equipment_table(self, keep_position=False, on_loaded=None):
+        sort_by, ascending = self.eq_view_order or (None, True)
+
+        def show(_size=None):
+            self.eq_table.set_source(
+                self.inventory.get_equipment_count(),
+                lambda start, count: self.inventory.get_equipment_page(start, count, sort_by, ascending),
+                keep_offset=keep_position)
+            if on_loaded is not None:
+                on_loaded()
+        if sort_by is None:
+            self.workers.cancel("equipment")
+            show()
+        else:
+            self.run_in_background("equipment", lambda: self.inventory.prepare_sorted_view("equipment", sort_by), show)
+
+    # After an add/update/remove: keep the scroll position and let the diff render
+    # apply only the rows that actually changed
+    def refresh_medicines_table(self):
+        self.load_medicines_table(keep_position=True)
+
+    def refresh_equipment_table(self):
+        self.load_equipment_table(keep_position=True)
+
+    def reset_medicines_view(self):
+        self.med_view_order = None
+        self.load_medicines_table()
+
+    def reset_equipment_view(self):
+        self.eq_view_order = None
+        self.load_equipment_table()
 
     # ---------- HIGHLIGHT RULES ----------
-    def highlight_med_low_stock(self):
-        for item in self.med_tree.get_children():
-            vals = self.med_tree.item(item, "values")
-            packs = int(vals[2])
-            total_qty = int(vals[4])
-            # low if packs <= 2 or total qty <=5 OR expiry is near/past (you can extend)
-            if packs <= 2 or total_qty <= 5:
-                self.med_tree.item(item, tags=("low",))
-            else:
-                self.med_tree.item(item, tags=())
-
-    def highlight_eq_low_stock(self):
-        for item in self.eq_tree.get_children():
-            vals = self.eq_tree.item(item, "values")
-            quantity = int(vals[2])
-            if quantity <= 2:
-                self.eq_tree.item(item, tags=("low",))
-            else:
-                self.eq_tree.item(item, tags=())
+    # Tags come from the alert state the engine caches per record (expired, low
+    # stock, near expiry; thresholds via inventory.configure_alerts), so rendering
+    # a row is a lookup by ID rather than parsing the widget's strings
+    def med_row_tags(self, values):
+        tag = self.inventory.medicine_alert_tag(values[0])
+        return (tag,) if tag else ()
+
+    def eq_row_tags(self, values):
+        tag = self.inventory.equipment_alert_tag(values[0])
+        return (tag,) if tag else ()
 
     # ---------- MEDICINE ACTIONS ----------
     def calc_med_total(self):
@@ -1138,46 +623,52 @@ class ClinicInventoryApp(ctk.CTk):
         ipp_i = int(ipp)
         total = packs_i * ipp_i
 
-        add_medicine(name, packs_i, ipp_i, total, expiry)  # Using list append operation
-        self.load_medicines_table()
+        self.inventory.add_medicine(name, packs_i, ipp_i, total, expiry)  # Using list append operation
+        self.refresh_medicines_table()
         self.clear_med_entries()
         self.log_transaction(f"Added medicine: {name}")
 
-    # Removed on_med_select - items can only be accessed by index operations
-    def on_med_select(self, event):
-        """Load selected medicine data into input fields"""
-        selected_item = self.med_tree.focus()
-        if selected_item:
-            values = self.med_tree.item(selected_item, 'values')
-            self.selected_medicine_id = values[0]
-            self.med_name.delete(0, "end")
-            self.med_name.insert(0, values[1])
-            self.med_packs.delete(0, "end")
-            self.med_packs.insert(0, values[2])
-            self.med_items_per_pack.delete(0, "end")
-            self.med_items_per_pack.insert(0, values[3])
-            # Total qty is read-only, so update its text
-            self.med_total_qty.configure(state="normal")
-            self.med_total_qty.delete(0, "end")
-            self.med_total_qty.insert(0, values[4])
-            self.med_total_qty.configure(state="disabled")
-            self.med_expiry.delete(0, "end")
-            self.med_expiry.insert(0, values[5])
-        else:
-            self.clear_med_entries()
+    def import_delivery(self):
+        """Bulk-import a supplier delivery file (CSV or NDJSON) on a worker thread"""
+        path = filedialog.askopenfilename(
+            title="Import supplier delivery",
+            filetypes=[("Delivery files", "*.csv *.ndjson *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def imported(report):
+            self.refresh_medicines_table()
+            self.log_transaction(f"Imported delivery {os.path.basename(path)}: "
+                                 f"{report.added} added, {report.merged} merged, {len(report.errors)} errors")
+            show = messagebox.showinfo if report.ok else messagebox.showwarning
+            show("Import Delivery", str(report))
+
+        self.run_in_background("import", lambda: self.inventory.import_medicines(path), imported,
+                               lambda e: messagebox.showerror("Import Delivery", f"Could not import {path}:\n{e}"))
 
     def search_medicines(self):
-        q = self.med_search.get().strip().lower()
+        q = self.med_search.get().strip()
         if not q:
             messagebox.showinfo("Info", "Enter search keywords.")
             return
-        rows = fetch_medicines()
-        filtered = [r for r in rows if q in r[1].lower()]
-        for row in self.med_tree.get_children():
-            self.med_tree.delete(row)
-        for r in filtered:
-            self.med_tree.insert("", "end", values=r)
-        self.highlight_med_low_stock()
+        self.run_in_background("medicines", lambda: self.inventory.get_medicines_by_name_search(q),
+                               self.display_filtered_medicines)
+
+    # Type-ahead: results update while typing, debounced so only the last keystroke queries
+    def schedule_med_typeahead(self, event=None):
+        if self._med_typeahead_job is not None:
+            self.after_cancel(self._med_typeahead_job)
+        self._med_typeahead_job = self.after(self.typeahead_delay_ms, self.run_med_typeahead)
+
+    def run_med_typeahead(self):
+        self._med_typeahead_job = None
+        q = self.med_search.get().strip()
+        if not q:
+            self.load_medicines_table()
+            return
+        limit = self.typeahead_limit
+        self.run_in_background("medicines", lambda: self.inventory.complete_medicine_names(q, limit),
+                               self.display_filtered_medicines)
 
     def clear_med_entries(self):
         self.med_name.delete(0, "end")
@@ -1201,39 +692,18 @@ class ClinicInventoryApp(ctk.CTk):
         if not quantity.isdigit():
             messagebox.showerror("Error", "Quantity must be an integer.")
             return
-        add_equipment(name, int(quantity), desc)  # Using list append operation
-        self.load_equipment_table()
+        self.inventory.add_equipment(name, int(quantity), desc)  # Using list append operation
+        self.refresh_equipment_table()
         self.clear_eq_entries()
         self.log_transaction(f"Added equipment: {name}")
 
-    # Removed on_eq_select - items can only be accessed by index operations
-    def on_eq_select(self, event):
-        """Load selected equipment data into input fields"""
-        selected_item = self.eq_tree.focus()
-        if selected_item:
-            values = self.eq_tree.item(selected_item, 'values')
-            self.selected_equipment_id = values[0]
-            self.eq_name.delete(0, "end")
-            self.eq_name.insert(0, values[1])
-            self.eq_quantity.delete(0, "end")
-            self.eq_quantity.insert(0, values[2])
-            self.eq_description.delete(0, "end")
-            self.eq_description.insert(0, values[3])
-        else:
-            self.clear_eq_entries()
-
     def search_equipment(self):
-        q = self.eq_search.get().strip().lower()
+        q = self.eq_search.get().strip()
         if not q:
             messagebox.showinfo("Info", "Enter search keywords.")
             return
-        rows = fetch_equipment()
-        filtered = [r for r in rows if q in r[1].lower() or (r[3] and q in r[3].lower())]
-        for row in self.eq_tree.get_children():
-            self.eq_tree.delete(row)
-        for r in filtered:
-            self.eq_tree.insert("", "end", values=r)
-        self.highlight_eq_low_stock()
+        self.run_in_background("equipment", lambda: self.inventory.search_equipment(q),
+                               self.display_filtered_equipment)
 
     def clear_eq_entries(self):
         self.eq_name.delete(0, "end")
@@ -1247,36 +717,24 @@ class ClinicInventoryApp(ctk.CTk):
         sort_by = self.med_sort_var.get()
         ascending = self.med_sort_order.get() == "asc"
         
-        if sort_by == "name":
-            sort_medicines_by_name(ascending)
-        elif sort_by == "expiry":
-            sort_medicines_by_expiry(ascending)
-        elif sort_by == "total_qty":
-            sort_medicines_by_total_qty(ascending)
-        elif sort_by == "packs":
-            sort_medicines_by_packs(ascending)
-        
-        self.load_medicines_table()
-        messagebox.showinfo("Sort Complete", f"Medicines sorted by {sort_by} ({'ascending' if ascending else 'descending'})")
+        # Sorted view: storage order and the JSON file are left untouched
+        self.med_view_order = (sort_by, ascending)
+        self.load_medicines_table(on_loaded=lambda: messagebox.showinfo(
+            "Sort Complete", f"Medicines sorted by {sort_by} ({'ascending' if ascending else 'descending'})"))
 
     def sort_equipment(self):
         """Sort equipment based on selected criteria"""
         sort_by = self.eq_sort_var.get()
         ascending = self.eq_sort_order.get() == "asc"
         
-        if sort_by == "name":
-            sort_equipment_by_name(ascending)
-        elif sort_by == "stock":
-            sort_equipment_by_stock(ascending)
-        elif sort_by == "status":
-            sort_equipment_by_status(ascending)
-        
-        self.load_equipment_table()
-        messagebox.showinfo("Sort Complete", f"Equipment sorted by {sort_by} ({'ascending' if ascending else 'descending'})")
+        # Sorted view: storage order and the JSON file are left untouched
+        self.eq_view_order = (sort_by, ascending)
+        self.load_equipment_table(on_loaded=lambda: messagebox.showinfo(
+            "Sort Complete", f"Equipment sorted by {sort_by} ({'ascending' if ascending else 'descending'})"))
 
     # ---------- FILTERING METHODS ----------
     def filter_medicines(self):
-        """Filter medicines based on selected criteria"""
+        """Filter medicines based on selected criteria (the query runs on a worker thread)"""
         filter_type = self.med_filter_type.get()
         filter_value = self.med_filter_value.get().strip()
         
@@ -1284,44 +742,63 @@ class ClinicInventoryApp(ctk.CTk):
             messagebox.showwarning("Warning", "Please enter a filter value!")
             return
         
-        filtered_medicines = []
+        # Input is parsed here; only the query itself goes to the worker
+        query = None
+        error_message = "Filter failed"
         
         if filter_type == "name":
-            filtered_medicines = filter_medicines_by_name_pattern(filter_value)
+            query = lambda: self.inventory.filter_medicines_by_name_pattern(filter_value)
         elif filter_type == "low_stock":
             try:
                 threshold = int(filter_value)
-                filtered_medicines = filter_medicines_by_low_stock(threshold)
+                query = lambda: self.inventory.filter_medicines_by_low_stock(threshold)
             except ValueError:
                 messagebox.showerror("Error", "Low stock threshold must be a number!")
                 return
         elif filter_type == "expiry_range":
             # Expected format: "2026-01-01,2027-12-31"
+            error_message = "Expiry range format: start_date,end_date (YYYY-MM-DD,YYYY-MM-DD)"
             try:
                 start_date, end_date = filter_value.split(",")
-                filtered_medicines = filter_medicines_by_expiry_range(start_date.strip(), end_date.strip())
+                query = lambda: self.inventory.filter_medicines_by_expiry_range(start_date.strip(), end_date.strip())
             except ValueError:
-                messagebox.showerror("Error", "Expiry range format: start_date,end_date (YYYY-MM-DD,YYYY-MM-DD)")
+                messagebox.showerror("Error", error_message)
                 return
         elif filter_type == "packs_range":
             # Expected format: "1,10"
             try:
                 min_packs, max_packs = filter_value.split(",")
-                filtered_medicines = filter_medicines_by_packs_range(int(min_packs.strip()), int(max_packs.strip()))
+                min_packs, max_packs = int(min_packs.strip()), int(max_packs.strip())
+                query = lambda: self.inventory.filter_medicines_by_packs_range(min_packs, max_packs)
             except ValueError:
                 messagebox.showerror("Error", "Packs range format: min,max (e.g., 1,10)")
                 return
+        elif filter_type == "combined":
+            # Expected format: "name~mg; expires<=60; total_qty<=20" (all conditions must match)
+            error_message = "Combined filter format: field~text; field<=n; expires<=days"
+            try:
+                predicates = parse_conditions(filter_value, numeric_fields=("id", "packs", "items_per_pack", "total_qty"))
+                query = lambda: self.inventory.query_medicines(*predicates)
+            except (KeyError, ValueError) as e:
+                messagebox.showerror("Error", f"{error_message} ({e})")
+                return
+        if query is None:
+            return
         
-        # Display filtered results
-        self.display_filtered_medicines(filtered_medicines)
+        def show_results(filtered_medicines):
+            # Display filtered results
+            self.display_filtered_medicines(filtered_medicines)
+            
+            if not filtered_medicines:
+                messagebox.showinfo("Filter Results", "No medicines match the filter criteria.")
+            else:
+                messagebox.showinfo("Filter Results", f"Found {len(filtered_medicines)} medicines matching the filter.")
         
-        if not filtered_medicines:
-            messagebox.showinfo("Filter Results", "No medicines match the filter criteria.")
-        else:
-            messagebox.showinfo("Filter Results", f"Found {len(filtered_medicines)} medicines matching the filter.")
+        self.run_in_background("medicines", query, show_results,
+                               lambda e: messagebox.showerror("Error", f"{error_message} ({e})"))
 
     def filter_equipment(self):
-        """Filter equipment based on selected criteria"""
+        """Filter equipment based on selected criteria (the query runs on a worker thread)"""
         filter_type = self.eq_filter_type.get()
         filter_value = self.eq_filter_value.get().strip()
         
@@ -1329,19 +806,21 @@ class ClinicInventoryApp(ctk.CTk):
             messagebox.showwarning("Warning", "Please enter a filter value!")
             return
         
-        filtered_equipment = []
+        # Input is parsed here; only the query itself goes to the worker
+        query = None
+        error_message = "Filter failed"
         
         if filter_type == "name":
-            filtered_equipment = filter_equipment_by_name_pattern(filter_value)
+            query = lambda: self.inventory.filter_equipment_by_name_pattern(filter_value)
         elif filter_type == "status":
-            filtered_equipment = filter_equipment_by_status_pattern(filter_value)
+            query = lambda: self.inventory.filter_equipment_by_status_pattern(filter_value)
         elif filter_type == "stock_level":
             # Expected format: "5,above" or "5,below"
             try:
                 threshold_str, direction = filter_value.split(",")
                 threshold = int(threshold_str.strip())
                 above = direction.strip().lower() == "above"
-                filtered_equipment = filter_equipment_by_stock_level(threshold, above)
+                query = lambda: self.inventory.filter_equipment_by_stock_level(threshold, above)
             except ValueError:
                 messagebox.showerror("Error", "Stock level format: threshold,direction (e.g., 5,above or 3,below)")
                 return
@@ -1349,79 +828,85 @@ class ClinicInventoryApp(ctk.CTk):
             # Expected format: "1,10"
             try:
                 min_stock, max_stock = filter_value.split(",")
-                filtered_equipment = filter_equipment_by_stock_range(int(min_stock.strip()), int(max_stock.strip()))
+                min_stock, max_stock = int(min_stock.strip()), int(max_stock.strip())
+                query = lambda: self.inventory.filter_equipment_by_stock_range(min_stock, max_stock)
             except ValueError:
                 messagebox.showerror("Error", "Stock range format: min,max (e.g., 1,10)")
                 return
+        elif filter_type == "combined":
+            # Expected format: "name~monitor; status~use; stock<=2" (all conditions must match)
+            error_message = "Combined filter format: field~text; field<=n"
+            try:
+                predicates = parse_conditions(filter_value, numeric_fields=("id", "stock"))
+                query = lambda: self.inventory.query_equipment(*predicates)
+            except (KeyError, ValueError) as e:
+                messagebox.showerror("Error", f"{error_message} ({e})")
+                return
+        if query is None:
+            return
         
-        # Display filtered results
-        self.display_filtered_equipment(filtered_equipment)
+        def show_results(filtered_equipment):
+            # Display filtered results
+            self.display_filtered_equipment(filtered_equipment)
+            
+            if not filtered_equipment:
+                messagebox.showinfo("Filter Results", "No equipment matches the filter criteria.")
+            else:
+                messagebox.showinfo("Filter Results", f"Found {len(filtered_equipment)} equipment matching the filter.")
         
-        if not filtered_equipment:
-            messagebox.showinfo("Filter Results", "No equipment matches the filter criteria.")
-        else:
-            messagebox.showinfo("Filter Results", f"Found {len(filtered_equipment)} equipment matching the filter.")
+        self.run_in_background("equipment", query, show_results,
+                               lambda e: messagebox.showerror("Error", f"{error_message} ({e})"))
 
     def display_filtered_medicines(self, filtered_medicines):
-        """Display filtered medicines in the table"""
-        for row in self.med_tree.get_children():
-            self.med_tree.delete(row)
-        
-        for medicine in filtered_medicines:
-            self.med_tree.insert("", "end", values=(
-                medicine["id"], 
-                medicine["name"], 
-                medicine["packs"], 
-                medicine["items_per_pack"], 
-                medicine["total_qty"], 
-                medicine["expiry"]
-            ))
-        self.highlight_med_low_stock()
+        """Display filtered medicines in the table (rows are converted as they scroll into view)"""
+        self.med_table.set_source(len(filtered_medicines), lambda start, count: [(
+            medicine["id"],
+            medicine["name"],
+            medicine["packs"],
+            medicine["items_per_pack"],
+            medicine["total_qty"],
+            medicine["expiry"]
+        ) for medicine in filtered_medicines[start:start + count]])
 
     def display_filtered_equipment(self, filtered_equipment):
-        """Display filtered equipment in the table"""
-        for row in self.eq_tree.get_children():
-            self.eq_tree.delete(row)
-        
-        for eq in filtered_equipment:
-            self.eq_tree.insert("", "end", values=(
-                eq["id"], 
-                eq["name"], 
-                eq["stock"], 
-                eq["status"]
-            ))
-        self.highlight_eq_low_stock()
+        """Display filtered equipment in the table (rows are converted as they scroll into view)"""
+        self.eq_table.set_source(len(filtered_equipment), lambda start, count: [(
+            eq["id"],
+            eq["name"],
+            eq["stock"],
+            eq["status"]
+        ) for eq in filtered_equipment[start:start + count]])
 
     # ---------- ARRAY OPERATIONS (LIFO) ----------
     def view_last_medicine(self):
         """View the last added medicine in the multidimensional array"""
-        if not medicines:
+        last_medicine = self.inventory.get_last_medicine()  # Get row at last index
+        if last_medicine is None:
             messagebox.showinfo("View Last Medicine", "No medicines in inventory (multidimensional array is empty)")
             return
 
-        last_index = len(medicines) - 1  # Get last index
         messagebox.showinfo("Last Medicine in Multidimensional Array", 
             f"Last medicine in multidimensional array:\n"
-            f"ID: {medicines[last_index][MED_ID]}\n"
-            f"Name: {medicines[last_index][MED_NAME]}\n"
-            f"Packs: {medicines[last_index][MED_PACKS]}\n"
-            f"Items per Pack: {medicines[last_index][MED_ITEMS_PER_PACK]}\n"
-            f"Total Qty: {medicines[last_index][MED_TOTAL_QTY]}\n"
-            f"Expiry: {medicines[last_index][MED_EXPIRY]}")
+            f"ID: {last_medicine['id']}\n"
+            f"Name: {last_medicine['name']}\n"
+            f"Packs: {last_medicine['packs']}\n"
+            f"Items per Pack: {last_medicine['items_per_pack']}\n"
+            f"Total Qty: {last_medicine['total_qty']}\n"
+            f"Expiry: {last_medicine['expiry']}")
 
     def view_last_equipment(self):
         """View the last added equipment in the multidimensional array"""
-        if not equipment:
+        last_equipment = self.inventory.get_last_equipment()  # Get row at last index
+        if last_equipment is None:
             messagebox.showinfo("View Last Equipment", "No equipment in inventory (multidimensional array is empty)")
             return
         
-        last_index = len(equipment) - 1  # Get last index
         messagebox.showinfo("Last Equipment in Multidimensional Array", 
             f"Last equipment in multidimensional array:\n"
-            f"ID: {equipment[last_index][EQ_ID]}\n"
-            f"Name: {equipment[last_index][EQ_NAME]}\n"
-            f"Stock: {equipment[last_index][EQ_STOCK]}\n"
-            f"Status: {equipment[last_index][EQ_STATUS]}")
+            f"ID: {last_equipment['id']}\n"
+            f"Name: {last_equipment['name']}\n"
+            f"Stock: {last_equipment['stock']}\n"
+            f"Status: {last_equipment['status']}")
 
     def insert_medicine_first(self):
         """Insert a new medicine at the beginning of the list"""
@@ -1444,8 +929,8 @@ class ClinicInventoryApp(ctk.CTk):
         ipp_i = int(ipp)
         total = packs_i * ipp_i
 
-        insert_medicine_at_position(0, name, packs_i, ipp_i, total, expiry) # Using list insert(0, item) operation
-        self.load_medicines_table()
+        self.inventory.insert_medicine_at_position(0, name, packs_i, ipp_i, total, expiry) # Using list insert(0, item) operation
+        self.refresh_medicines_table()
         self.clear_med_entries()
         messagebox.showinfo("Insert Complete", "Medicine inserted at the beginning of the list.")
         self.log_transaction(f"Inserted medicine at beginning: {name}")
@@ -1462,25 +947,25 @@ class ClinicInventoryApp(ctk.CTk):
         if not quantity.isdigit():
             messagebox.showerror("Error", "Quantity must be an integer.")
             return
-        insert_equipment_at_position(0, name, int(quantity), desc) # Using list insert(0, item) operation
-        self.load_equipment_table()
+        self.inventory.insert_equipment_at_position(0, name, int(quantity), desc) # Using list insert(0, item) operation
+        self.refresh_equipment_table()
         self.clear_eq_entries()
         messagebox.showinfo("Insert Complete", "Equipment inserted at the beginning of the list.")
         self.log_transaction(f"Inserted equipment at beginning: {name}")
 
     def view_medicine_slice(self):
         """View the first 3 added medicines in the multidimensional array using slicing"""
-        if not medicines:
+        if self.inventory.is_medicines_empty():
             messagebox.showinfo("View First 3 Medicines", "No medicines in inventory (multidimensional array is empty)")
             return
 
-        first_three_medicines = get_medicines_slice(0, 3)
+        first_three_medicines = self.inventory.get_medicines_slice(0, 3)
         if not first_three_medicines:
             messagebox.showinfo("View First 3 Medicines", "No medicines to display (list is empty or too short).")
             return
 
         messagebox.showinfo("First 3 Medicines in List", 
-            f"First 3 medicines in list:\n" + 
+            "First 3 medicines in list:\n" + 
             "\n".join([
                 f"ID: {med['id']}, Name: {med['name']}, Packs: {med['packs']}, Items/Pack: {med['items_per_pack']}, Total Qty: {med['total_qty']}, Expiry: {med['expiry']}"
                 for med in first_three_medicines
@@ -1489,17 +974,17 @@ class ClinicInventoryApp(ctk.CTk):
 
     def view_equipment_slice(self):
         """View the first 3 added equipment in the multidimensional array using slicing"""
-        if not equipment:
+        if self.inventory.is_equipment_empty():
             messagebox.showinfo("View First 3 Equipment", "No equipment in inventory (multidimensional array is empty)")
             return
 
-        first_three_equipment = get_equipment_slice(0, 3)
+        first_three_equipment = self.inventory.get_equipment_slice(0, 3)
         if not first_three_equipment:
             messagebox.showinfo("View First 3 Equipment", "No equipment to display (list is empty or too short).")
             return
 
         messagebox.showinfo("First 3 Equipment in List", 
-            f"First 3 equipment in list:\n" + 
+            "First 3 equipment in list:\n" + 
             "\n".join([
                 f"ID: {eq['id']}, Name: {eq['name']}, Stock: {eq['stock']}, Status: {eq['status']}"
                 for eq in first_three_equipment
@@ -1508,26 +993,13 @@ class ClinicInventoryApp(ctk.CTk):
 
     def remove_last_medicine(self):
         """Remove the last added medicine from the multidimensional array"""
-        if not medicines:
+        # Remove entire row from 2D array (the engine saves changes to JSON)
+        removed_data = self.inventory.pop_medicine()
+        if removed_data is None:
             messagebox.showinfo("Remove Last Medicine", "No medicines to remove (multidimensional array is empty)")
             return
-
-        last_index = len(medicines) - 1
-        # Store data before removal
-        removed_data = {
-            "id": medicines[last_index][MED_ID],
-            "name": medicines[last_index][MED_NAME],
-            "packs": medicines[last_index][MED_PACKS],
-            "items_per_pack": medicines[last_index][MED_ITEMS_PER_PACK],
-            "total_qty": medicines[last_index][MED_TOTAL_QTY],
-            "expiry": medicines[last_index][MED_EXPIRY]
-        }
         
-        # Remove entire row from 2D array
-        medicines.pop()
-        save_to_json()  # Save changes to JSON
-        
-        self.load_medicines_table()
+        self.refresh_medicines_table()
         messagebox.showinfo("Remove Last Medicine", 
             f"Removed last medicine from multidimensional array:\n"
             f"ID: {removed_data['id']}\n"
@@ -1540,24 +1012,13 @@ class ClinicInventoryApp(ctk.CTk):
 
     def remove_last_equipment(self):
         """Remove the last added equipment from the multidimensional array"""
-        if not equipment:
+        # Remove entire row from 2D array (the engine saves changes to JSON)
+        removed_data = self.inventory.pop_equipment()
+        if removed_data is None:
             messagebox.showinfo("Remove Last Equipment", "No equipment to remove (multidimensional array is empty)")
             return
-
-        last_index = len(equipment) - 1
-        # Store data before removal
-        removed_data = {
-            "id": equipment[last_index][EQ_ID],
-            "name": equipment[last_index][EQ_NAME],
-            "stock": equipment[last_index][EQ_STOCK],
-            "status": equipment[last_index][EQ_STATUS]
-        }
         
-        # Remove entire row from 2D array
-        equipment.pop()
-        save_to_json()  # Save changes to JSON
-        
-        self.load_equipment_table()
+        self.refresh_equipment_table()
         messagebox.showinfo("Remove Last Equipment", 
             f"Removed last equipment from multidimensional array:\n"
             f"ID: {removed_data['id']}\n"
@@ -1574,10 +1035,10 @@ class ClinicInventoryApp(ctk.CTk):
             return
         try:
             id_int = int(id_to_remove)
-            removed_medicine = remove_medicine_by_id(id_int)
+            removed_medicine = self.inventory.remove_medicine_by_id(id_int)
             if removed_medicine:
                 messagebox.showinfo("Remove Complete", f"Medicine with ID {id_int} removed.")
-                self.load_medicines_table()
+                self.refresh_medicines_table()
                 self.log_transaction(f"Removed medicine by ID: {id_int}")
             else:
                 messagebox.showwarning("Warning", f"No medicine found with ID {id_int}.")
@@ -1592,10 +1053,10 @@ class ClinicInventoryApp(ctk.CTk):
             return
         try:
             id_int = int(id_to_remove)
-            removed_equipment = remove_equipment_by_id(id_int)
+            removed_equipment = self.inventory.remove_equipment_by_id(id_int)
             if removed_equipment:
                 messagebox.showinfo("Remove Complete", f"Equipment with ID {id_int} removed.")
-                self.load_equipment_table()
+                self.refresh_equipment_table()
                 self.log_transaction(f"Removed equipment by ID: {id_int}")
             else:
                 messagebox.showwarning("Warning", f"No equipment found with ID {id_int}.")
@@ -1614,6 +1075,9 @@ class ClinicInventoryApp(ctk.CTk):
         """Updates the time label in the top right corner"""
         current_time = datetime.now().strftime("%H:%M:%S")
         self.time_label.configure(text=f"Time: {current_time}")
+        # Daily tick: at midnight the engine re-checks expiry alerts, then visible tags are refreshed
+        if self.inventory.roll_statistics_day():
+            self.refresh_medicines_table()
         self.after(1000, self.update_time) # Update every second
 
     def update_medicine_ui(self):
@@ -1641,9 +1105,9 @@ class ClinicInventoryApp(ctk.CTk):
         ipp_i = int(ipp)
         total = packs_i * ipp_i
 
-        if update_medicine(self.selected_medicine_id, name, packs_i, ipp_i, total, expiry):
+        if self.inventory.update_medicine(self.selected_medicine_id, name, packs_i, ipp_i, total, expiry):
             messagebox.showinfo("Update Complete", f"Medicine ID {self.selected_medicine_id} updated successfully.")
-            self.load_medicines_table()
+            self.refresh_medicines_table()
             self.clear_med_entries()
             self.log_transaction(f"Updated medicine: {name} (ID: {self.selected_medicine_id})")
         else:
@@ -1666,9 +1130,9 @@ class ClinicInventoryApp(ctk.CTk):
             messagebox.showerror("Error", "Quantity must be an integer.")
             return
         
-        if update_equipment(self.selected_equipment_id, name, int(quantity), desc):
+        if self.inventory.update_equipment(self.selected_equipment_id, name, int(quantity), desc):
             messagebox.showinfo("Update Complete", f"Equipment ID {self.selected_equipment_id} updated successfully.")
-            self.load_equipment_table()
+            self.refresh_equipment_table()
             self.clear_eq_entries()
             self.log_transaction(f"Updated equipment: {name} (ID: {self.selected_equipment_id})")
         else:
@@ -1714,8 +1178,12 @@ class ClinicInventoryApp(ctk.CTk):
 
 # ---------------- MAIN ----------------
 if __name__ == "__main__":
-    app = ClinicInventoryApp()
+    # Use the SQLite database once the JSON file has been migrated
+    # (python -m clinic_inventory.storage), otherwise the JSON file
+    inventory = ClinicInventory(backend=SQLiteBackend(DB_FILE)) if os.path.exists(DB_FILE) else None
+    app = ClinicInventoryApp(inventory)
     # bind calc total when packs or items per pack change (helpful UX)
     app.med_packs.bind("<KeyRelease>", lambda e: app.calc_med_total())
     app.med_items_per_pack.bind("<KeyRelease>", lambda e: app.calc_med_total())
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    app.inventory.close()  # flush pending writes and fold journaled changes into the snapshot
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""Headless clinic inventory engine.
+
+Importing this package does not pull in customtkinter/tkinter, so the data
+layer can be used from scripts, scheduled jobs and tests without a display.
+"""
+from .core import (
+    ClinicInventory,
+    DATE_FORMAT,
+    EQ_ID,
+    EQ_NAME,
+    EQ_STATUS,
+    EQ_STOCK,
+    JSON_FILE,
+    MED_EXPIRY,
+    MED_ID,
+    MED_ITEMS_PER_PACK,
+    MED_NAME,
+    MED_PACKS,
+    MED_TOTAL_QTY,
+    equipment_to_dict,
+    medicine_to_dict,
+)
+from .alerts import AlertIndex, AlertRule
+from .columnar import ColumnarTable
+from .importer import ImportReport, read_delivery
+from .indexes import CountIndex, LazyIndex, NameIndex, NgramIndex, PrefixIndex, SortedIndex
+from .journal import Journal
+from .ndjson import NdjsonReader, dumps_ndjson
+from .query import (
+    AtLeast,
+    AtMost,
+    Between,
+    Contains,
+    Equals,
+    ExpiresWithin,
+    QueryPlan,
+    parse_conditions,
+)
+from .rowview import EquipmentView, MedicineView, RowView
+from .snapshot import Snapshot, write_snapshot
+from .storage import SQLiteBackend, StorageBackend, migrate_json_to_sqlite
+from .tables import RowTable, TableBase
+from .workers import QueryWorkers
+from .writer import BackgroundWriter, atomic_write_bytes, atomic_write_text
+
+__all__ = [
+    "AlertIndex",
+    "AlertRule",
+    "AtLeast",
+    "AtMost",
+    "BackgroundWriter",
+    "Between",
+    "ClinicInventory",
+    "ColumnarTable",
+    "Contains",
+    "CountIndex",
+    "DATE_FORMAT",
+    "EQ_ID",
+    "EQ_NAME",
+    "EQ_STATUS",
+    "EQ_STOCK",
+    "Equals",
+    "EquipmentView",
+    "ExpiresWithin",
+    "ImportReport",
+    "JSON_FILE",
+    "Journal",
+    "LazyIndex",
+    "MED_EXPIRY",
+    "MED_ID",
+    "MED_ITEMS_PER_PACK",
+    "MED_NAME",
+    "MED_PACKS",
+    "MED_TOTAL_QTY",
+    "MedicineView",
+    "NameIndex",
+    "NdjsonReader",
+    "NgramIndex",
+    "PrefixIndex",
+    "QueryPlan",
+    "QueryWorkers",
+    "RowTable",
+    "RowView",
+    "SQLiteBackend",
+    "Snapshot",
+    "SortedIndex",
+    "StorageBackend",
+    "TableBase",
+    "atomic_write_bytes",
+    "atomic_write_text",
+    "dumps_ndjson",
+    "equipment_to_dict",
+    "medicine_to_dict",
+    "migrate_json_to_sqlite",
+    "parse_conditions",
+    "read_delivery",
+    "write_snapshot",
+]
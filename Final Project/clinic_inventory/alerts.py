@@ -0,0 +1,121 @@
+# alerts.py - Alert rules evaluated once per changed record
+#
+# An AlertIndex is attached to a table like any other secondary index, so each
+# rule is evaluated when a record is stored or changed, never when it is
+# displayed. The result (the names of the rules a record breaks) is cached per
+# record ID and read back in O(1), e.g. to pick the Treeview tag of a row.
+#
+# Rules that depend on today's date (expired / near expiry) are marked
+# uses_date; the engine's daily tick re-checks only those rules, and only for
+# the records whose expiry falls in the window that moved (see
+# ClinicInventory.roll_statistics_day and AlertIndex.roll_today).
+
+
+class AlertRule:
+    """A named condition on a row.
+
+    predicate(row, today) gets the row and today's date as an ordinal. Rules
+    are listed most severe first; the first matching rule decides the tag.
+    """
+
+    def __init__(self, name, predicate, tag=None, uses_date=False):
+        self.name = name
+        self.predicate = predicate
+        self.tag = tag or name
+        self.uses_date = uses_date  # must be re-checked when the day changes
+
+    def __repr__(self):
+        return f"AlertRule({self.name!r})"
+
+
+class AlertIndex:
+    """Per-record cache of the alert rules each row currently matches"""
+
+    def __init__(self, rules, id_col=0, today=0):
+        self.rules = list(rules)
+        self.id_col = id_col
+        self.today = today            # date ordinal the date rules were evaluated for
+        self._state = {}              # id -> tuple of matching rule names (only non-empty)
+        self._members = {rule.name: set() for rule in self.rules}
+
+    def _evaluate(self, row):
+        today = self.today
+        return tuple(rule.name for rule in self.rules if rule.predicate(row, today))
+
+    def add(self, row):
+        state = self._evaluate(row)
+        if state:
+            row_id = row[self.id_col]
+            self._state[row_id] = state
+            for name in state:
+                self._members[name].add(row_id)
+
+    def discard(self, row):
+        row_id = row[self.id_col]
+        for name in self._state.pop(row_id, ()):
+            self._members[name].discard(row_id)
+
+    def clear(self):
+        self._state = {}
+        self._members = {rule.name: set() for rule in self.rules}
+
+    def alerts_of(self, row_id):
+        """Names of the rules the record matches, most severe first (O(1))"""
+        return self._state.get(row_id, ())
+
+    def tag_of(self, row_id):
+        """Tag of the most severe matching rule, or None"""
+        state = self._state.get(row_id)
+        if not state:
+            return None
+        for rule in self.rules:
+            if rule.name == state[0]:
+                return rule.tag
+        return None
+
+    def ids_with(self, name):
+        """IDs of the records currently matching a rule"""
+        return self._members[name]
+
+    def counts(self):
+        """Number of records per rule"""
+        return {name: len(ids) for name, ids in self._members.items()}
+
+    def reevaluate(self, rows):
+        """Recompute the cached state of the given rows (e.g. after a day change)"""
+        for row in rows:
+            self.discard(row)
+            self.add(row)
+
+    def roll_today(self, today, rows):
+        """Move to a new day and re-check only the date rules of the given rows.
+
+        Results of the other rules cannot change with the date and are kept.
+        """
+        self.today = today
+        date_rules = [rule for rule in self.rules if rule.uses_date]
+        if not date_rules:
+            return
+        dated = {rule.name for rule in date_rules}
+        for row in rows:
+            row_id = row[self.id_col]
+            old = self._state.get(row_id, ())
+            state = tuple(rule.name for rule in self.rules
+                          if (rule.predicate(row, today) if rule.uses_date else rule.name in old))
+            if state == old:
+                continue
+            for name in dated.intersection(old):
+                self._members[name].discard(row_id)
+            for name in dated.intersection(state):
+                self._members[name].add(row_id)
+            if state:
+                self._state[row_id] = state
+            else:
+                del self._state[row_id]
+
+    def set_rules(self, rules, rows):
+        """Replace the rules and re-evaluate every row"""
+        self.rules = list(rules)
+        self.clear()
+        for row in rows:
+            self.add(row)
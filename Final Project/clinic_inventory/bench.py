@@ -0,0 +1,289 @@
+# bench.py - Micro-benchmarks for the inventory engine
+#
+# Run from the "Final Project" directory, e.g.:
+#
+#   python -m clinic_inventory.bench memory --rows 100000
+#   python -m clinic_inventory.bench search --rows 100000
+#   python -m clinic_inventory.bench startup            (10k, 100k and 1M rows)
+#   python -m clinic_inventory.bench import --rows 100000
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from .columnar import MEDICINE_SCHEMA, ColumnarTable
+from .core import MED_ID, MED_NAME, MEDICINE_SORT_KEYS, ClinicInventory
+from .indexes import NgramIndex
+from .snapshot import Snapshot
+from .tables import RowTable
+
+_NAMES = ["Paracetamol", "Ibuprofen", "Amoxicillin", "Cetirizine", "Omeprazole",
+          "Metformin", "Atorvastatin", "Salbutamol", "Losartan", "Aspirin"]
+_STRENGTHS = ["5mg", "10mg", "20mg", "100mg", "250mg", "400mg", "500mg"]
+
+
+def generate_medicine_rows(count, seed=42):
+    """Synthetic medicine rows shaped like the real inventory"""
+    rng = random.Random(seed)
+    base = date(2026, 1, 1)
+    rows = []
+    for row_id in range(1, count + 1):
+        packs = rng.randint(0, 40)
+        items_per_pack = rng.choice((1, 7, 10, 12, 14, 28))
+        name = f"{rng.choice(_NAMES)} {rng.choice(_STRENGTHS)} #{row_id % 5000}"
+        expiry = (base + timedelta(days=rng.randint(-60, 900))).isoformat()
+        rows.append([row_id, name, packs, items_per_pack, packs * items_per_pack, expiry])
+    return rows
+
+
+def _measure(build):
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        table = build()
+        elapsed = time.perf_counter() - started
+        current, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return table, current, elapsed
+
+
+def bench_memory(rows):
+    """Bytes per row held by RowTable (list of lists) vs ColumnarTable (typed arrays)"""
+    def build_rows():
+        table = RowTable(MED_ID, MEDICINE_SORT_KEYS)
+        table.load(generate_medicine_rows(rows))
+        return table
+
+    def build_columnar():
+        table = ColumnarTable(MEDICINE_SCHEMA, MED_ID, MEDICINE_SORT_KEYS)
+        for row in generate_medicine_rows(rows):
+            table.append(row)
+        return table
+
+    print(f"Medicines table, {rows} rows")
+    results = {}
+    for label, build in (("list-of-lists", build_rows), ("columnar", build_columnar)):
+        table, used, elapsed = _measure(build)
+        results[label] = used / rows
+        print(f"  {label:<14} {used / rows:8.1f} bytes/row   load {elapsed * 1000:8.1f} ms")
+        del table
+    print(f"  columnar uses {results['columnar'] / results['list-of-lists']:.0%} of the list-of-lists memory")
+
+    # The engine also keeps its secondary indexes, which are the same for both storages
+    print(f"ClinicInventory(storage=...) loading {rows} medicines (tables plus indexes)")
+    with tempfile.TemporaryDirectory() as directory:
+        json_file = os.path.join(directory, "inventory.json")
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump({"medicines": generate_medicine_rows(rows), "equipment": []}, f)
+        for storage in ("rows", "columnar"):
+            inventory, load_s = _best_of(1, lambda: ClinicInventory(json_file, storage=storage))
+            del inventory
+            inventory, used, _elapsed = _measure(lambda: ClinicInventory(json_file, storage=storage))
+            results[f"engine {storage}"] = used / rows
+            print(f"  {storage:<14} {used / rows:8.1f} bytes/row   load {load_s * 1000:8.1f} ms")
+            del inventory
+    return results
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def _longest_lock_wait(lock, func):
+    """Run func() while another thread keeps taking lock; returns func's result and
+    the longest the other thread had to wait (what a window would freeze for)"""
+    done = threading.Event()
+    waits = [0.0]
+
+    def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            with lock:
+                waits[0] = max(waits[0], time.perf_counter() - started)
+            time.sleep(0.001)
+    thread = threading.Thread(target=probe)
+    thread.start()
+    try:
+        result = func()
+    finally:
+        done.set()
+        thread.join()
+    return result, waits[0]
+
+
+def bench_search(rows, repeat=5):
+    """Substring search: full scan with lower() vs the trigram index"""
+    table = RowTable(MED_ID, MEDICINE_SORT_KEYS)
+    table.load(generate_medicine_rows(rows))
+    started = time.perf_counter()
+    grams = table.add_index(NgramIndex(MED_NAME, MED_ID))
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"Medicine name search, {rows} rows (trigram index built in {build_ms:.1f} ms)")
+
+    for pattern in ("paracetamol", "500mg", "#4242", "zzz", "ox"):
+        def scan():
+            needle = pattern.lower()
+            return [row[MED_ID] for row in table if needle in row[MED_NAME].lower()]
+
+        def indexed():
+            return table.in_order(grams.search(pattern))
+
+        expected, scan_s = _best_of(repeat, scan)
+        found, index_s = _best_of(repeat, indexed)
+        assert found == expected, pattern
+        print(f"  {pattern!r:<14} {len(found):7d} hits   scan {scan_s * 1000:8.2f} ms   "
+              f"index {index_s * 1000:8.2f} ms   x{scan_s / max(index_s, 1e-9):.1f}")
+
+
+def bench_startup(rows, page=50):
+    """Startup from the JSON file vs the memory-mapped binary snapshot.
+
+    "first page" is what a window needs before it can be shown: the JSON
+    path has to parse the whole file, the snapshot only maps it and decodes
+    `page` rows. "engine" is a ClinicInventory load (tables only, the indexes
+    are lazy); the "+" lines are what follows it: a page, the first name
+    search (builds the trigram index) and build_indexes() for the rest;
+    "lock wait" is the longest another thread waited for the engine lock
+    during build_indexes().
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        json_file = os.path.join(directory, "inventory.json")
+        data = {"medicines": generate_medicine_rows(rows), "equipment": [],
+                "next_ids": {"medicines": rows + 1, "equipment": 1}, "journal_seq": 0}
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)  # same layout as snapshot_json()
+        del data
+        inventory = ClinicInventory(json_file, binary_snapshot=True)
+        inventory.save_binary_snapshot()
+        inventory.close()
+        del inventory
+
+        def json_first_page():
+            with open(json_file, "r", encoding="utf-8") as f:
+                return json.load(f)["medicines"][:page]
+
+        def snapshot_first_page():
+            with Snapshot(snapshot_file) as snapshot:
+                return snapshot.table("medicines").page(0, page)
+
+        def snapshot_all_rows():
+            with Snapshot(snapshot_file) as snapshot:
+                return snapshot.table("medicines").rows()
+
+        def json_all_rows():
+            with open(json_file, "r", encoding="utf-8") as f:
+                return json.load(f)["medicines"]
+
+        snapshot_file = os.path.join(directory, "inventory.snap")
+        first_json, first_json_s = _best_of(3, json_first_page)
+        first_snap, first_snap_s = _best_of(3, snapshot_first_page)
+        assert first_json == first_snap
+        _rows, all_json_s = _best_of(3, json_all_rows)
+        _rows, all_snap_s = _best_of(3, snapshot_all_rows)
+        del _rows
+
+        def engine_timings(binary_snapshot, repeat=3):
+            # Construction, then what the window does next: a page, a search, all indexes
+            best = None
+            for _ in range(repeat):
+                timings = []
+                inventory, seconds = _best_of(1, lambda: ClinicInventory(json_file, binary_snapshot=binary_snapshot))
+                timings.append(seconds)
+                for step in (lambda: inventory.get_medicines_page(0, page),
+                             lambda: inventory.filter_medicines_by_name_pattern("para")):
+                    timings.append(_best_of(1, step)[1])
+                # The rest of the indexes, built as the app does it: while other threads use the lock
+                (_result, seconds), wait = _longest_lock_wait(
+                    inventory.lock, lambda: _best_of(1, inventory.build_indexes))
+                timings += [seconds, wait]
+                best = timings if best is None else list(map(min, best, timings))
+            return best
+
+        engine_json = engine_timings(False)
+        engine_snap = engine_timings(True)
+
+        print(f"Startup, {rows} medicines (JSON {os.path.getsize(json_file) / 1e6:.1f} MB, "
+              f"snapshot {os.path.getsize(snapshot_file) / 1e6:.1f} MB)")
+        for label, json_s, snap_s in (("first page", first_json_s, first_snap_s),
+                                      ("all rows", all_json_s, all_snap_s),
+                                      ("engine", engine_json[0], engine_snap[0]),
+                                      ("+ page", engine_json[1], engine_snap[1]),
+                                      ("+ search", engine_json[2], engine_snap[2]),
+                                      ("+ indexes", engine_json[3], engine_snap[3]),
+                                      ("  lock wait", engine_json[4], engine_snap[4])):
+            print(f"  {label:<11} json {json_s * 1000:9.1f} ms   snapshot {snap_s * 1000:9.1f} ms   "
+                  f"x{json_s / max(snap_s, 1e-9):.1f}")
+
+
+def bench_import(rows):
+    """Bulk import of a delivery CSV vs one add_medicine() call per line (in one batch).
+
+    "longest lock wait" is the longest another thread (e.g. the window
+    fetching a page) had to wait for the engine lock during the import.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        delivery = os.path.join(directory, "delivery.csv")
+        lines = generate_medicine_rows(rows)
+        with open(delivery, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "packs", "items_per_pack", "total_qty", "expiry"])
+            writer.writerows(line[1:] for line in lines)
+
+        def per_row():
+            inventory = ClinicInventory(os.path.join(directory, "per_row.json"))
+            with inventory.batch():
+                for line in lines:
+                    inventory.add_medicine(*line[1:])
+            return inventory
+
+        _inv, per_row_s = _best_of(1, per_row)
+        del _inv
+        # As in the app: indexes built and the JSON file written by the background writer
+        inventory = ClinicInventory(os.path.join(directory, "bulk.json"))
+        inventory.build_indexes()
+        inventory.start_background_writer()
+        (report, import_s), import_wait = _longest_lock_wait(
+            inventory.lock, lambda: _best_of(1, lambda: inventory.import_medicines(delivery)))
+        (again, reimport_s), reimport_wait = _longest_lock_wait(
+            inventory.lock, lambda: _best_of(1, lambda: inventory.import_medicines(delivery)))
+        inventory.close()
+
+        print(f"Import, {rows} delivery lines ({report.added} new records, {report.merged} merged)")
+        print(f"  per-row add   {per_row_s * 1000:9.1f} ms")
+        print(f"  bulk import   {import_s * 1000:9.1f} ms   x{per_row_s / max(import_s, 1e-9):.1f}   "
+              f"longest lock wait {import_wait * 1000:.1f} ms")
+        print(f"  re-import     {reimport_s * 1000:9.1f} ms   ({again.merged} records merged)   "
+              f"longest lock wait {reimport_wait * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clinic inventory micro-benchmarks")
+    parser.add_argument("benchmark", choices=["memory", "search", "startup", "import"])
+    parser.add_argument("--rows", type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.benchmark == "memory":
+        bench_memory(args.rows or 100_000)
+    elif args.benchmark == "search":
+        bench_search(args.rows or 100_000)
+    elif args.benchmark == "startup":
+        for rows in ([args.rows] if args.rows else [10_000, 100_000, 1_000_000]):
+            bench_startup(rows)
+    elif args.benchmark == "import":
+        bench_import(args.rows or 100_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# columnar.py - Array-backed columnar storage engine
+#
+# ColumnarTable stores each column of the 2D array in its own typed
+# array.array instead of keeping one Python list (of boxed objects) per row:
+#
+#   "int"  -> array('q') of 64-bit integers
+#   "text" -> array('l') of codes into a per-column string dictionary, so
+#             repeated names/statuses are stored once; a string is released
+#             once no stored row uses it
+#   "date" -> array('l') of proleptic ordinals (date.toordinal()) parsed once
+#             on write from "YYYY-MM-DD"; any other value (e.g. "2027-1-5")
+#             is kept verbatim in a string dictionary under a negative code,
+#             so every stored value round-trips exactly
+#
+# It implements the same interface as RowTable, so ClinicInventory (and every
+# public function on it) works unchanged on top of it. Rows handed out by
+# get()/iteration are freshly decoded lists; change them through update().
+#
+# The saving is in the table storage alone. The engine's secondary indexes
+# (trigram postings, sorted keys, name buckets, ...) keep their own Python
+# structures and do not read these columns, and they account for most of an
+# engine's memory: `python -m clinic_inventory.bench memory` reports about
+# 80% of the list-of-lists bytes for a bare table, but only 1-2% less for a
+# whole ClinicInventory(storage="columnar"). Treat it as a storage experiment
+# until the indexes share the encoded columns.
+from array import array
+from datetime import date
+
+from .tables import TableBase
+
+MEDICINE_SCHEMA = ("int", "text", "int", "int", "int", "date")
+EQUIPMENT_SCHEMA = ("int", "text", "int", "text")
+
+_TYPECODES = {"int": "q", "text": "l", "date": "l"}
+
+
+class StringDictionary:
+    """Dictionary encoding for a text column: each distinct string stored once.
+
+    Codes are reference counted by the stored values using them. A string no
+    stored row uses any more is released and its code handed out again.
+    """
+
+    def __init__(self):
+        self.strings = []       # code -> string (None for a released code)
+        self._codes = {}
+        self._refs = array("q")  # code -> number of stored values using it
+        self._free = []         # released codes, reused before new ones
+
+    def __len__(self):
+        return len(self._codes)
+
+    def encode(self, text):
+        code = self._codes.get(text)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self.strings[code] = text
+            else:
+                code = len(self.strings)
+                self.strings.append(text)
+                self._refs.append(0)
+            self._codes[text] = code
+        self._refs[code] += 1
+        return code
+
+    def release(self, code):
+        """Drop one use of code, freeing the string when nothing uses it"""
+        refs = self._refs[code] - 1
+        self._refs[code] = refs
+        if not refs:
+            del self._codes[self.strings[code]]
+            self.strings[code] = None
+            self._free.append(code)
+
+    def decode(self, code):
+        return self.strings[code]
+
+
+class ColumnarTable(TableBase):
+    """Ordered table whose columns are typed arrays.
+
+    Removals clear a byte in the `alive` mask rather than shifting every
+    column, mirroring the holes used by RowTable.
+    """
+
+    def __init__(self, schema, id_col=0, sort_keys=None):
+        super().__init__(id_col, sort_keys)
+        self.schema = tuple(schema)
+        self._new_storage()
+
+    def _new_storage(self):
+        self._columns = [array(_TYPECODES[kind]) for kind in self.schema]
+        self._alive = bytearray()  # 1 = live row, 0 = removed (hole)
+        self._dictionaries = {col: StringDictionary() for col, kind in enumerate(self.schema) if kind != "int"}
+
+    # ---------- encoding ----------
+    def _encode(self, col, value):
+        kind = self.schema[col]
+        if kind == "int":
+            return value
+        if kind == "text":
+            return self._dictionaries[col].encode(value)
+        try:
+            day = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            day = None
+        if day is not None and day.isoformat() == value:
+            return day.toordinal()
+        return -1 - self._dictionaries[col].encode(value)  # not a canonical date: keep the text
+
+    def _release(self, col, value):
+        # The stored value is going away: drop its use of a dictionary string
+        kind = self.schema[col]
+        if kind == "text":
+            self._dictionaries[col].release(value)
+        elif kind == "date" and value < 0:
+            self._dictionaries[col].release(-1 - value)
+
+    def _release_slot(self, slot):
+        for col, column in enumerate(self._columns):
+            self._release(col, column[slot])
+
+    def _encode_row(self, row):
+        # Encode a new row and claim its ID; undoes the encoding if the ID is taken
+        encoded = [self._encode(col, value) for col, value in enumerate(row)]
+        try:
+            self._claim_id(row[self.id_col])
+        except KeyError:
+            for col, value in enumerate(encoded):
+                self._release(col, value)
+            raise
+        return encoded
+
+    def _decode(self, col, value):
+        kind = self.schema[col]
+        if kind == "int":
+            return value
+        if kind == "text":
+            return self._dictionaries[col].strings[value]
+        if value < 0:
+            return self._dictionaries[col].strings[-1 - value]
+        return date.fromordinal(value).isoformat()
+
+    def _row_at(self, slot):
+        return [self._decode(col, column[slot]) for col, column in enumerate(self._columns)]
+
+    # ---------- iteration ----------
+    def __iter__(self):
+        """Iterate decoded rows in positional order (skips holes)"""
+        alive = self._alive
+        for slot in range(len(alive)):
+            if alive[slot]:
+                yield self._row_at(slot)
+
+    @property
+    def rows(self):
+        """Decoded copy of the rows in positional order"""
+        return list(self)
+
+    def column(self, col):
+        """Raw typed array for a column (codes for text, ordinals or negative text codes for dates)"""
+        self.compact()
+        return self._columns[col]
+
+    def at(self, index):
+        """Return the row at a positional index, or None if out of range"""
+        if 0 <= index < len(self._slot_of):
+            self.compact()
+            return self._row_at(index)
+        return None
+
+    def slice(self, start, end):
+        """Return rows[start:end] in positional order"""
+        self.compact()
+        return [self._row_at(slot) for slot in range(len(self._alive))[start:end]]
+
+    # ---------- ID index ----------
+    def get(self, row_id):
+        """Return the row with the given ID, or None (O(1))"""
+        slot = self._slot_of.get(row_id)
+        return None if slot is None else self._row_at(slot)
+
+    # ---------- mutations ----------
+    def append(self, row):
+        """Add a row at the end of every column (O(1))"""
+        encoded = self._encode_row(row)
+        self._slot_of[row[self.id_col]] = len(self._alive)
+        for column, value in zip(self._columns, encoded):
+            column.append(value)
+        self._alive.append(1)
+        for index in self.indexes:
+            index.add(row)
+
+    def insert(self, index, row):
+        """Insert a row at a positional index, shifting later rows"""
+        encoded = self._encode_row(row)
+        self.compact()
+        for column, value in zip(self._columns, encoded):
+            column.insert(index, value)
+        self._alive.insert(index, 1)
+        self._reindex(index)
+        for secondary in self.indexes:
+            secondary.add(row)
+
+    def update(self, row_id, changes):
+        """Apply {column: value} changes to a row and refresh every index.
+
+        Returns the updated (decoded) row, or None if no row has that ID.
+        """
+        slot = self._slot_of.get(row_id)
+        if slot is None:
+            return None
+        encoded = {col: self._encode(col, value) for col, value in changes.items()}
+        indexes = self._indexes_for(changes)
+        old_row = self._row_at(slot)
+        for index in indexes:
+            index.discard(old_row)
+        for col, value in encoded.items():
+            column = self._columns[col]
+            self._release(col, column[slot])
+            column[slot] = value
+        row = self._row_at(slot)
+        for index in indexes:
+            index.add(row)
+        return row
+
+    def remove(self, row_id):
+        """Remove and return the row with the given ID, or None (O(1) amortized)"""
+        slot = self._slot_of.pop(row_id, None)
+        if slot is None:
+            return None
+        row = self._row_at(slot)
+        for index in self.indexes:
+            index.discard(row)
+        self._release_slot(slot)
+        self._alive[slot] = 0
+        self._holes += 1
+        self._trim()
+        self._maybe_compact()
+        return row
+
+    def pop(self):
+        """Remove and return the last row, or None if the table is empty"""
+        self._trim()
+        if not self._alive:
+            return None
+        row = self._row_at(len(self._alive) - 1)
+        self._release_slot(len(self._alive) - 1)
+        self._drop_last()
+        del self._slot_of[row[self.id_col]]
+        for index in self.indexes:
+            index.discard(row)
+        return row
+
+    def last(self):
+        """Return the last row without removing it, or None"""
+        self._trim()
+        return self._row_at(len(self._alive) - 1) if self._alive else None
+
+    def sort(self, key, reverse=False):
+        """Sort rows with a key over decoded rows and permute every column"""
+        self.compact()
+        rows = [self._row_at(slot) for slot in range(len(self._alive))]
+        order = sorted(range(len(rows)), key=lambda slot: key(rows[slot]), reverse=reverse)
+        self._columns = [array(column.typecode, [column[slot] for slot in order]) for column in self._columns]
+        self._reindex(0)
+
+    def clear(self):
+        self._new_storage()
+        self._slot_of = {}
+        self._holes = 0
+        for index in self.indexes:
+            index.clear()
+
+    # ---------- internal helpers ----------
+    def compact(self):
+        """Squeeze out removed rows from every column and rebuild the position index"""
+        if not self._holes:
+            return
+        alive = self._alive
+        keep = [slot for slot in range(len(alive)) if alive[slot]]
+        self._columns = [array(column.typecode, [column[slot] for slot in keep]) for column in self._columns]
+        self._alive = bytearray(b"\x01" * len(keep))
+        self._holes = 0
+        self._reindex(0)
+
+    def _drop_last(self):
+        for column in self._columns:
+            column.pop()
+        self._alive.pop()
+
+    def _trim(self):
+        # Drop holes at the end of the columns so pop()/last() stay O(1)
+        while self._alive and not self._alive[-1]:
+            self._drop_last()
+            self._holes -= 1
+
+    def _reindex(self, start):
+        slot_of = self._slot_of
+        ids = self._columns[self.id_col]
+        for slot in range(start, len(ids)):
+            slot_of[ids[slot]] = slot
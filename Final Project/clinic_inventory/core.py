@@ -0,0 +1,1469 @@
+# core.py - Headless inventory engine (no GUI imports)
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import functools
+import json
+import os
+import threading
+import time
+
+from .alerts import AlertIndex, AlertRule
+from .columnar import EQUIPMENT_SCHEMA, MEDICINE_SCHEMA, ColumnarTable
+from .importer import read_delivery
+from .indexes import CountIndex, LazyIndex, NameIndex, NgramIndex, PrefixIndex, SortedIndex
+from .journal import Journal, journal_path_for
+from .ndjson import NdjsonReader, dumps_ndjson
+from .query import QueryEngine
+from .rowview import EquipmentView, MedicineView
+from .snapshot import Snapshot, snapshot_path_for, source_stamp, write_snapshot
+from .tables import ChangeRecorder, RowTable
+from .workers import QueryWorkers
+from .writer import BackgroundWriter, atomic_write_text
+
+# Using Multidimensional Array Data Structures for storing inventory data
+# Each row represents a record, each column represents a field
+# medicines[row][column] where columns are: [id, name, packs, items_per_pack, total_qty, expiry]
+# equipment[row][column] where columns are: [id, name, stock, status]
+
+# Column indices for medicines array
+MED_ID = 0
+MED_NAME = 1
+MED_PACKS = 2
+MED_ITEMS_PER_PACK = 3
+MED_TOTAL_QTY = 4
+MED_EXPIRY = 5
+
+# Column indices for equipment array
+EQ_ID = 0
+EQ_NAME = 1
+EQ_STOCK = 2
+EQ_STATUS = 3
+
+# JSON file path for storing inventory data
+JSON_FILE = "clinic_inventory.json"
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# Named sort keys for each table (journal "sort" records refer to these names)
+MEDICINE_SORT_KEYS = {
+    "name": lambda row: row[MED_NAME].lower(),
+    "expiry": lambda row: row[MED_EXPIRY],
+    "total_qty": lambda row: row[MED_TOTAL_QTY],
+    "packs": lambda row: row[MED_PACKS],
+}
+EQUIPMENT_SORT_KEYS = {
+    "name": lambda row: row[EQ_NAME].lower(),
+    "stock": lambda row: row[EQ_STOCK],
+    "status": lambda row: row[EQ_STATUS].lower(),
+}
+# Keys for sorted views (see view_medicines_sorted); text is case-folded once per write
+MEDICINE_VIEW_KEYS = {
+    "name": lambda row: row[MED_NAME].casefold(),
+    "expiry": lambda row: row[MED_EXPIRY],
+    "total_qty": lambda row: row[MED_TOTAL_QTY],
+    "packs": lambda row: row[MED_PACKS],
+}
+EQUIPMENT_VIEW_KEYS = {
+    "name": lambda row: row[EQ_NAME].casefold(),
+    "stock": lambda row: row[EQ_STOCK],
+    "status": lambda row: row[EQ_STATUS].casefold(),
+}
+
+# Thresholds behind get_array_statistics() (the defaults of the matching get_* functions)
+STATS_MEDICINE_LOW_STOCK = 5
+STATS_EQUIPMENT_LOW_STOCK = 3
+STATS_EXPIRING_DAYS = 30
+
+# Default alert rule settings (see configure_alerts)
+ALERT_DEFAULTS = {
+    "low_stock_qty": 5,         # medicine total_qty at or below this is low
+    "low_stock_packs": 2,       # ... as is packs at or below this
+    "near_expiry_days": 30,     # expiring within this many days (not yet expired)
+    "equipment_low_stock": 2,   # equipment stock at or below this is low
+}
+
+# Field name -> column, for the query engine (see query_medicines)
+MEDICINE_FIELDS = {field: col for col, field in enumerate(MedicineView.FIELDS)}
+EQUIPMENT_FIELDS = {field: col for col, field in enumerate(EquipmentView.FIELDS)}
+
+
+def _synchronized(method):
+    """Run an engine method while holding the engine lock.
+
+    Mutations hold the lock so the background writer always serializes a
+    consistent snapshot; reads run by query workers hold it so they never
+    see a half-applied mutation.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def expiry_ordinal(text):
+    """Parse a YYYY-MM-DD expiry string to a day number (date.toordinal())"""
+    if len(text) == 10 and text[4] == "-" and text[7] == "-":
+        return date.fromisoformat(text).toordinal()  # fast path, same result as strptime
+    return datetime.strptime(text, DATE_FORMAT).toordinal()
+
+
+def medicine_to_dict(row):
+    """Convert a medicine row into the dictionary form used by callers"""
+    return {
+        "id": row[MED_ID],
+        "name": row[MED_NAME],
+        "packs": row[MED_PACKS],
+        "items_per_pack": row[MED_ITEMS_PER_PACK],
+        "total_qty": row[MED_TOTAL_QTY],
+        "expiry": row[MED_EXPIRY]
+    }
+
+
+def equipment_to_dict(row):
+    """Convert an equipment row into the dictionary form used by callers"""
+    return {
+        "id": row[EQ_ID],
+        "name": row[EQ_NAME],
+        "stock": row[EQ_STOCK],
+        "status": row[EQ_STATUS]
+    }
+
+
+class ClinicInventory:
+    """Inventory engine holding the medicines and equipment arrays.
+
+    This class has no GUI dependency so it can be imported by scripts,
+    scheduled jobs and the desktop app alike.
+
+    By default every mutation rewrites the JSON file. With journal=True each
+    mutation instead appends one record to a journal next to the JSON file,
+    and the journal is compacted into the JSON snapshot every compact_every
+    records (and replayed on startup).
+
+    start_background_writer() moves JSON snapshot writes off the calling
+    thread: mutations then only mark the inventory dirty.
+
+    storage="columnar" keeps each column in a typed array (see columnar.py)
+    instead of one Python list per row. Only the table storage shrinks: the
+    secondary indexes, most of the engine's memory, are the same either way.
+
+    backend=SQLiteBackend(...) (see storage.py) persists through a storage
+    backend instead of the JSON file: each committed change is written as
+    row-level updates. If the backend fails, the tables are reloaded from it
+    and the mutation re-raises the error.
+
+    binary_snapshot=True writes a memory-mappable binary copy of the JSON
+    file on close() (see snapshot.py) and starts from it instead of parsing
+    the JSON file while the JSON file is unchanged.
+
+    Loading only fills the tables: the secondary indexes (names, trigrams,
+    prefixes, sorted, counters, alerts) are built on first use (see
+    LazyIndex in indexes.py), or ahead of time from a worker thread with
+    build_indexes().
+
+    file_format="ndjson" (the default for *.ndjson files) stores one
+    table-tagged record per line instead of one JSON document (see
+    ndjson.py); corrupt lines are quarantined on load instead of losing the
+    whole file.
+
+    import_medicines() loads a supplier delivery file (CSV or NDJSON) in
+    chunked batches, merging it with the stored medicines (see importer.py).
+    """
+
+    # Delivery lines merged per engine lock hold by import_medicines()
+    IMPORT_CHUNK_ROWS = 2000
+
+    def __init__(self, json_file=JSON_FILE, autoload=True, journal=False, compact_every=500, storage="rows",
+                 backend=None, binary_snapshot=False, file_format=None):
+        self.json_file = json_file
+        self.file_format = file_format or ("ndjson" if json_file.endswith(".ndjson") else "json")
+        if self.file_format not in ("json", "ndjson"):
+            raise ValueError(f"Unknown file format: {self.file_format}")
+        self.backend = backend
+        self.binary_snapshot = binary_snapshot
+        self.snapshot_file = snapshot_path_for(json_file)
+        # 2D arrays with an id -> row hash index: medicines[row][0]=id, medicines[row][1]=name, etc.
+        if storage == "columnar":
+            self.medicine_table = ColumnarTable(MEDICINE_SCHEMA, MED_ID, MEDICINE_SORT_KEYS)
+            self.equipment_table = ColumnarTable(EQUIPMENT_SCHEMA, EQ_ID, EQUIPMENT_SORT_KEYS)
+        elif storage == "rows":
+            self.medicine_table = RowTable(MED_ID, MEDICINE_SORT_KEYS)
+            self.equipment_table = RowTable(EQ_ID, EQUIPMENT_SORT_KEYS)
+        else:
+            raise ValueError(f"Unknown storage engine: {storage}")
+        self.tables = {"medicines": self.medicine_table, "equipment": self.equipment_table}
+        if backend is not None:
+            backend.attach(self.tables)
+        self.lock = threading.RLock()
+        # Every secondary index is built on first use rather than on each load (see
+        # LazyIndex), so startup only pays for the tables; build_indexes() builds them early
+        self.lazy_indexes = []
+        # Case-folded name -> rows indexes for exact-name lookups and counts
+        self.medicine_names = self._lazy_index(self.medicine_table, NameIndex(MED_NAME))
+        self.equipment_names = self._lazy_index(self.equipment_table, NameIndex(EQ_NAME))
+        # Expiry parsed once per write into a sorted (ordinal, id) index for range queries
+        self.medicine_expiry = self._lazy_index(
+            self.medicine_table, SortedIndex(lambda row: expiry_ordinal(row[MED_EXPIRY]), MED_ID))
+        # Ordered quantity indexes for low-stock thresholds and packs ranges
+        self.medicine_total_qty = self._lazy_index(
+            self.medicine_table, SortedIndex(lambda row: row[MED_TOTAL_QTY], MED_ID))
+        self.medicine_packs = self._lazy_index(
+            self.medicine_table, SortedIndex(lambda row: row[MED_PACKS], MED_ID))
+        # Ordered stock index for equipment threshold and range filters
+        self.equipment_stock = self._lazy_index(
+            self.equipment_table, SortedIndex(lambda row: row[EQ_STOCK], EQ_ID))
+        # Trigram indexes so substring searches intersect posting sets instead of scanning
+        self.medicine_name_grams = self._lazy_index(self.medicine_table, NgramIndex(MED_NAME, MED_ID))
+        self.equipment_name_grams = self._lazy_index(self.equipment_table, NgramIndex(EQ_NAME, EQ_ID))
+        self.equipment_status_grams = self._lazy_index(self.equipment_table, NgramIndex(EQ_STATUS, EQ_ID))
+        # Prefix trie over medicine name words for type-ahead search
+        self.medicine_prefixes = self._lazy_index(self.medicine_table, PrefixIndex(MED_NAME, MED_ID))
+        # Counters behind get_array_statistics(), kept current on every change. The
+        # expiring window depends on today's date and is rolled forward once a day.
+        self.stats_low_stock_medicines = self._lazy_index(
+            self.medicine_table, CountIndex(lambda row: row[MED_TOTAL_QTY] <= STATS_MEDICINE_LOW_STOCK, MED_ID))
+        self.stats_low_stock_equipment = self._lazy_index(
+            self.equipment_table, CountIndex(lambda row: row[EQ_STOCK] <= STATS_EQUIPMENT_LOW_STOCK, EQ_ID))
+        self._stats_day = datetime.now().date()
+        self._stats_expiry_cutoff, expiring = self._expiring_predicate(self._stats_day)
+        self.stats_expiring_medicines = self._lazy_index(self.medicine_table, CountIndex(expiring, MED_ID))
+        # Alert rules evaluated once per changed record; each record's state is cached
+        self.alert_settings = dict(ALERT_DEFAULTS)
+        today = self._stats_day.toordinal()
+        self.medicine_alerts = self._lazy_index(
+            self.medicine_table, AlertIndex(self._medicine_alert_rules(), MED_ID, today))
+        self.equipment_alerts = self._lazy_index(
+            self.equipment_table, AlertIndex(self._equipment_alert_rules(), EQ_ID, today))
+        # Sorted views: (table, sort key) -> SortedIndex, built on first use and then
+        # patched by every mutation; the quantity/stock indexes double as views
+        self._views = {
+            ("medicines", "total_qty"): self.medicine_total_qty,
+            ("medicines", "packs"): self.medicine_packs,
+            ("equipment", "stock"): self.equipment_stock,
+        }
+        self._view_keys = {"medicines": MEDICINE_VIEW_KEYS, "equipment": EQUIPMENT_VIEW_KEYS}
+        # Query engines: the indexes each field can be searched through, by index kind
+        self.medicine_query = QueryEngine("medicines", self.medicine_table, MEDICINE_FIELDS, {
+            ("name", "grams"): self.medicine_name_grams,
+            ("name", "names"): self.medicine_names,
+            ("expiry", "sorted"): self.medicine_expiry,
+            ("total_qty", "sorted"): self.medicine_total_qty,
+            ("packs", "sorted"): self.medicine_packs,
+        }, keys={"expiry": expiry_ordinal})
+        self.equipment_query = QueryEngine("equipment", self.equipment_table, EQUIPMENT_FIELDS, {
+            ("name", "grams"): self.equipment_name_grams,
+            ("name", "names"): self.equipment_names,
+            ("status", "grams"): self.equipment_status_grams,
+            ("stock", "sorted"): self.equipment_stock,
+        })
+        # The journal file is always replayed on load; it is only written to in journal mode
+        self.journal = Journal(journal_path_for(json_file))
+        self.journal_mode = journal
+        self.compact_every = compact_every
+        # Open batch state: nesting depth and the changes waiting to be persisted
+        self._batch_depth = 0
+        self._batch_changes = []
+        self._batch_undo = []   # (table, op, *args) to reverse each mutation, see _undo()
+        self._batch_order = {}  # table -> row IDs in order before the batch first reordered it
+        self._saves_deferred = 0  # > 0 while an import holds back whole-file saves
+        self._save_pending = False
+        self.load_error = None  # why the JSON file could not be loaded; it is then never overwritten
+        self.reissued_ids = {}  # table name -> [(old ID, new ID)] for duplicate IDs found by the last load
+        self.writer = None  # BackgroundWriter, see start_background_writer()
+        self.workers = None  # QueryWorkers, see start_query_workers()
+        if autoload:
+            self.initialize_default_data()
+
+    @property
+    def medicines(self):
+        """Medicines 2D array in positional order (treat as read-only)"""
+        return self.medicine_table.rows
+
+    @property
+    def equipment(self):
+        """Equipment 2D array in positional order (treat as read-only)"""
+        return self.equipment_table.rows
+
+    # -------------------------
+    # JSON Storage Functions
+    # -------------------------
+    def snapshot_json(self):
+        """Serialize medicines and equipment data to the JSON (or NDJSON) snapshot text.
+
+        Raises RuntimeError while the file on disk could not be loaded, so a
+        partial or empty inventory never replaces it. Only copying the rows
+        holds the engine lock; they are serialized after it is released.
+        """
+        with self.lock:
+            if self.load_error is not None:
+                raise RuntimeError(f"{self.json_file} could not be loaded ({self.load_error}); not overwriting it")
+            # Tuples serialize like lists and are the cheapest copy of rows updated in place
+            tables = {name: list(map(tuple, table)) for name, table in self.tables.items()}
+            next_ids = {name: table.next_id for name, table in self.tables.items()}
+            journal_seq = self.journal.seq
+        if self.file_format == "ndjson":
+            return dumps_ndjson(tables, next_ids, journal_seq)
+        data = {
+            "medicines": tables["medicines"],
+            "equipment": tables["equipment"],
+            # Persisted ID sequences so IDs are never reused after a restart
+            "next_ids": next_ids,
+            # Last journal record contained in this snapshot
+            "journal_seq": journal_seq
+        }
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+    def save_to_json(self):
+        """Save medicines and equipment data to JSON file (temp file + fsync + rename)"""
+        try:
+            atomic_write_text(self.json_file, self.snapshot_json())
+            return True
+        except Exception as e:
+            print(f"Error saving to JSON: {e}")
+            return False
+
+    def start_background_writer(self, debounce=0.2, max_delay=2.0):
+        """Write JSON snapshots on a dedicated thread instead of on every mutation.
+
+        Bursts of changes within `debounce` seconds are collapsed into one
+        write. Journal mode keeps writing its own records synchronously.
+        """
+        if self.writer is None:
+            self.writer = BackgroundWriter(self.snapshot_json, self.json_file, debounce, max_delay)
+        return self.writer
+
+    def start_query_workers(self, workers=2):
+        """Threads that run queries and sorts off the UI thread (see workers.py).
+
+        Jobs are not run under the engine lock: each engine method takes it
+        for as long as it touches shared state, and the long steps (sorting
+        a new view, reading an import file) run without it.
+        """
+        if self.workers is None:
+            self.workers = QueryWorkers(workers=workers)
+        return self.workers
+
+    @_synchronized
+    def load_from_json(self):
+        """Load medicines and equipment data from JSON file.
+
+        If an existing file cannot be read, load_error is set and the file is
+        left untouched by every later save until a load succeeds. Duplicate
+        IDs re-issued while loading are listed in reissued_ids.
+        """
+        self.load_error = None
+        reissued = {}
+        try:
+            snapshot = self.open_binary_snapshot()
+            if snapshot is not None:
+                # Binary snapshot of this very JSON file: no text parsing
+                with snapshot:
+                    for name, table in self.tables.items():
+                        stored = snapshot.table(name)
+                        reissued[name] = table.load(stored.rows(), stored.next_id)
+                    journal_seq = snapshot.extra.get("journal_seq", 0)
+            elif os.path.exists(self.json_file) and self.file_format == "ndjson":
+                # Streamed line by line; a corrupt line is quarantined, the rest still loads
+                reader = NdjsonReader(self.json_file, errors="quarantine")
+                rows = {name: [] for name in self.tables}
+                for name, row in reader.records(rows):
+                    rows[name].append(row)
+                for name, table in self.tables.items():
+                    reissued[name] = table.load(rows[name], reader.next_ids.get(name, 1))
+                journal_seq = reader.journal_seq
+                if reader.bad_lines:
+                    print(f"Warning: {reader.bad_lines} corrupt record(s) moved to {reader.quarantine_path}")
+            elif os.path.exists(self.json_file):
+                with open(self.json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    next_ids = data.get("next_ids", {})
+                    for name, table in self.tables.items():
+                        reissued[name] = table.load(data.get(name, []), next_ids.get(name, 1))
+                    journal_seq = data.get("journal_seq", 0)
+            else:
+                journal_seq = 0
+            self.reissued_ids = {name: pairs for name, pairs in reissued.items() if pairs}
+            for name, pairs in self.reissued_ids.items():
+                print(f"Warning: {len(pairs)} duplicate {name} ID(s) re-issued: "
+                      + ", ".join(f"{old} -> {new}" for old, new in pairs[:10])
+                      + (" ..." if len(pairs) > 10 else ""))
+            # Replay mutations journaled after the snapshot, then fold them into it
+            if self.journal.replay(self.tables, after_seq=journal_seq):
+                self.compact_journal()
+            return os.path.exists(self.json_file)
+        except Exception as e:
+            self.load_error = e
+            print(f"Error loading from JSON: {e} (changes will not be saved over {self.json_file})")
+            return False
+
+    def open_binary_snapshot(self, warn=True):
+        """The binary snapshot (see snapshot.py) if it matches the JSON file on disk, else None.
+
+        The caller closes it. Lets a UI show rows before the engine has loaded.
+        """
+        if not (self.binary_snapshot and os.path.exists(self.snapshot_file) and os.path.exists(self.json_file)):
+            return None
+        try:
+            snapshot = Snapshot(self.snapshot_file)
+        except (OSError, ValueError, KeyError) as e:
+            if warn:
+                print(f"Ignoring unreadable binary snapshot: {e}")
+            return None
+        if snapshot.extra.get("source") != source_stamp(self.json_file):
+            snapshot.close()
+            return None
+        return snapshot
+
+    @_synchronized
+    def save_binary_snapshot(self):
+        """Write the binary startup snapshot of the JSON file as it is on disk now"""
+        try:
+            write_snapshot(self.snapshot_file, self.tables,
+                           {"source": source_stamp(self.json_file), "journal_seq": self.journal.seq})
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Error writing binary snapshot: {e}")
+            return False
+
+    def _snapshot_is_current(self):
+        snapshot = self.open_binary_snapshot(warn=False)
+        if snapshot is None:
+            return False
+        snapshot.close()
+        return True
+
+    @_synchronized
+    def compact_journal(self):
+        """Write a full JSON snapshot and empty the journal"""
+        if self.save_to_json():
+            self.journal.truncate()
+
+    def _record_change(self, op, table, *args):
+        """Persist one mutation.
+
+        In journal mode this appends a single compact record (O(1)); otherwise
+        the whole JSON file is rewritten. Inside batch() the change is held
+        back until the batch commits.
+        """
+        if self._batch_depth:
+            self._batch_changes.append((op, table, *args))
+            return
+        self._persist_changes([(op, table, *args)])
+
+    def _undo(self, op, table_name, *args):
+        """Inside batch(), remember how to reverse a mutation that is about to be made.
+
+        op and args mirror the change record ("append" row_id, "insert" row_id,
+        "update" row_id cols, "remove" row_id, "pop", "clear", "sort"). Only
+        the rows the mutation touches are kept; the row order is saved once
+        per batch, the first time a mutation would lose it.
+        """
+        if not self._batch_depth:
+            return
+        table = self.tables[table_name]
+        if op == "update":
+            row_id, cols = args
+            row = table.get(row_id)
+            if row is None:
+                return
+            args = (row_id, {col: row[col] for col in cols})
+        elif op in ("remove", "pop"):
+            row = table.get(args[0]) if op == "remove" else table.last()
+            if row is None:
+                return
+            args = (row,)
+        elif op == "clear":
+            args = (list(table),)
+        if op in ("remove", "clear", "sort") and table_name not in self._batch_order:
+            self._batch_order[table_name] = [row[table.id_col] for row in table]
+        self._batch_undo.append((op, table_name, *args))
+
+    def _roll_back_batch(self, next_ids):
+        # Apply the inverse of every mutation, newest first, then restore the order and sequences
+        for op, table_name, *args in reversed(self._batch_undo):
+            table = self.tables[table_name]
+            if op in ("append", "insert"):
+                table.remove(args[0])
+            elif op == "update":
+                table.update(*args)
+            elif op in ("remove", "pop"):
+                table.append(args[0])  # moved back into place below (a pop needs no move)
+            elif op == "clear":
+                table.extend(args[0])
+        for table_name, order in self._batch_order.items():
+            table = self.tables[table_name]
+            rank = {row_id: position for position, row_id in enumerate(order)}
+            # Rows popped before the order was saved were already put back at the end
+            table.sort(lambda row: rank.get(row[table.id_col], len(rank)))
+        for table_name, next_id in next_ids.items():
+            self.tables[table_name].next_id = next_id
+
+    def _persist_changes(self, changes):
+        if not changes:
+            return
+        if self.backend is not None:
+            try:
+                self.backend.write_changes(changes)
+            except Exception:
+                # The backend wrote nothing: put memory back in line with it and tell the caller
+                self.load_from_backend()
+                raise
+            return
+        if not self.journal_mode:
+            if self._saves_deferred:
+                self._save_pending = True  # see _saving_once()
+            else:
+                self._save_snapshot()
+            return
+        try:
+            self.journal.append_many(changes)
+        except Exception as e:
+            print(f"Error writing journal: {e}")
+            self.save_to_json()  # fall back to a full snapshot so the changes are not lost
+            return
+        if self.journal.pending >= self.compact_every:
+            self.compact_journal()
+
+    @contextmanager
+    def batch(self):
+        """Group many mutations into one transaction.
+
+        Persistence is deferred until the with-block ends and then done with a
+        single write. If the block raises, the medicines and equipment arrays
+        (and their ID sequences) are restored to their state at the start of
+        the batch and nothing is written: each mutation is undone from the
+        undo log (see _undo), so a rollback costs the size of the batch, not
+        of the tables. Nested batches join the outer one.
+
+            with inventory.batch():
+                for line in delivery:
+                    inventory.add_medicine(*line)
+        """
+        # Hold the engine lock (before looking at the depth, so two threads can
+        # never both open the outermost batch) for the whole block; the
+        # background writer and query workers never see a half-done batch
+        with self.lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+
+            next_ids = {name: table.next_id for name, table in self.tables.items()}
+            self._batch_depth = 1
+            self._batch_changes = []
+            try:
+                yield self
+            except BaseException:
+                self._roll_back_batch(next_ids)
+                raise
+            else:
+                self._persist_changes(self._batch_changes)
+            finally:
+                self._batch_depth = 0
+                self._batch_changes = []
+                self._batch_undo = []
+                self._batch_order = {}
+
+    def close(self):
+        """Flush pending writes, fold journaled changes into the snapshot and release files"""
+        if self.workers is not None:
+            self.workers.shutdown()
+            self.workers = None
+        flushed = True
+        if self.writer is not None:
+            self.writer.stop()
+            flushed = self.writer.last_error is None
+            self.writer = None
+        if self.journal_mode and self.journal.pending:
+            self.compact_journal()
+        self.journal.close()
+        # Refresh the startup snapshot once the JSON file holds everything in memory
+        if (self.binary_snapshot and self.backend is None and flushed and not self.journal.pending
+                and self.load_error is None
+                and os.path.exists(self.json_file) and not self._snapshot_is_current()):
+            self.save_binary_snapshot()
+        if self.backend is not None:
+            self.backend.close()
+
+    @_synchronized
+    def load_from_backend(self):
+        """Load medicines and equipment from the storage backend"""
+        try:
+            return self.backend.load(self.tables)
+        except Exception as e:
+            print(f"Error loading from storage backend: {e}")
+            return False
+
+    def initialize_default_data(self):
+        """Initialize the multidimensional arrays from the storage backend or the JSON file"""
+        loaded = self.load_from_backend() if self.backend is not None else self.load_from_json()
+        if not loaded:
+            # If no JSON file exists, start with empty arrays
+            self.medicine_table.clear()
+            self.equipment_table.clear()
+
+    def _lazy_index(self, table, index):
+        lazy = table.add_index(LazyIndex(index, table, self.lock), fill=False)
+        self.lazy_indexes.append(lazy)
+        return lazy
+
+    def build_indexes(self, indexes=None):
+        """Build the secondary indexes (all, or the given ones) now instead of on first use.
+
+        Loading only fills the tables; a worker thread can call this after a
+        load so the first search, filter or statistics call does not pay for
+        it. The engine lock is held for one chunk of rows at a time (see
+        LazyIndex.prepare), so other threads are not held up by the build.
+        """
+        for index in self.lazy_indexes if indexes is None else indexes:
+            index.prepare()
+
+    # -------------------------
+    # Basic Array Operations for Medicines
+    # -------------------------
+    @_synchronized
+    def add_medicine(self, name, packs, items_per_pack, total_qty, expiry):
+        """Add medicine to multidimensional array using append()"""
+        row_id = self.medicine_table.allocate_id()  # monotonic ID sequence, never reused
+        new_row = [row_id, name, packs, items_per_pack, total_qty, expiry]
+        self._undo("append", "medicines", row_id)
+        self.medicine_table.append(new_row)  # Add entire row to 2D array
+        self._record_change("append", "medicines", new_row)
+        return medicine_to_dict(new_row)
+
+    @_synchronized
+    def insert_medicine_at_position(self, index, name, packs, items_per_pack, total_qty, expiry):
+        """Insert medicine into multidimensional array at a specific index using insert()"""
+        table = self.medicine_table
+        if not (0 <= index <= len(table)):
+            print(f"Error: Index {index} is out of bounds for medicines array (size {len(table)})")
+            return None
+
+        # IDs identify records, not positions: existing IDs are left untouched
+        new_row = [table.allocate_id(), name, packs, items_per_pack, total_qty, expiry]
+        self._undo("insert", "medicines", new_row[MED_ID])
+        table.insert(index, new_row)  # Insert entire row at specific index
+        self._record_change("insert", "medicines", index, new_row)
+        return medicine_to_dict(new_row)
+
+    @_synchronized
+    def remove_medicine_by_id(self, medicine_id):
+        """Remove medicine by ID using multidimensional array operations"""
+        self._undo("remove", "medicines", medicine_id)
+        row = self.medicine_table.remove(medicine_id)  # O(1) via the ID index
+        if row is None:
+            return None
+        self._record_change("remove", "medicines", medicine_id)
+        return medicine_to_dict(row)
+
+    @_synchronized
+    def remove_medicine_by_name(self, name):
+        """Remove medicine by name using multidimensional array operations"""
+        row_id = self.medicine_table.first_in_order(self.medicine_names.lookup(name))
+        if row_id is None:
+            return None
+        return self.remove_medicine_by_id(row_id)
+
+    @_synchronized
+    def pop_medicine(self):
+        """Remove the last medicine from the multidimensional array using pop()"""
+        self._undo("pop", "medicines")
+        row = self.medicine_table.pop()
+        if row is None:
+            return None
+        self._record_change("remove", "medicines", row[MED_ID])
+        return medicine_to_dict(row)
+
+    def get_medicine_by_index(self, index):
+        """Get medicine by multidimensional array index"""
+        row = self.medicine_table.at(index)
+        return None if row is None else medicine_to_dict(row)
+
+    def get_last_medicine(self):
+        """Get the last medicine in the multidimensional array"""
+        row = self.medicine_table.last()
+        return None if row is None else medicine_to_dict(row)
+
+    def insert_medicine(self, name, packs, items_per_pack, total_qty, expiry):
+        """Add medicine using basic multidimensional array append operation"""
+        return self.add_medicine(name, packs, items_per_pack, total_qty, expiry)
+
+    def fetch_medicines(self):
+        """Fetch all medicines from multidimensional array"""
+        return [tuple(row) for row in self.medicine_table]
+
+    def iter_medicines(self):
+        """Stream every medicine as a read-only MedicineView, in array order (no copies)"""
+        return (MedicineView(row) for row in self.medicine_table)
+
+    def get_medicine_count(self):
+        """Get total number of medicines in multidimensional array"""
+        return len(self.medicine_table)
+
+    def is_medicines_empty(self):
+        """Check if medicines multidimensional array is empty"""
+        return len(self.medicine_table) == 0
+
+    @_synchronized
+    def clear_all_medicines(self):
+        """Clear all medicines from multidimensional array"""
+        self._undo("clear", "medicines")
+        self.medicine_table.clear()
+        self._record_change("clear", "medicines")
+
+    @_synchronized
+    def update_medicine(self, row_id, name, packs, items_per_pack, total_qty, expiry):
+        """Update medicine using multidimensional array operations"""
+        changes = {
+            MED_NAME: name,
+            MED_PACKS: packs,
+            MED_ITEMS_PER_PACK: items_per_pack,
+            MED_TOTAL_QTY: total_qty,
+            MED_EXPIRY: expiry
+        }
+        self._undo("update", "medicines", row_id, changes)
+        if self.medicine_table.update(row_id, changes) is None:  # O(1) via the ID index
+            return False
+        self._record_change("update", "medicines", row_id, list(changes.items()))
+        return True
+
+    def find_medicine_by_id(self, row_id):
+        """Find medicine by ID using multidimensional array operations"""
+        row = self.medicine_table.get(row_id)  # O(1) via the ID index
+        return None if row is None else medicine_to_dict(row)
+
+    def find_medicine_by_name(self, name):
+        """Find medicine by name using multidimensional array operations"""
+        # The name index narrows it to rows with this name; the first in table order wins
+        row_id = self.medicine_table.first_in_order(self.medicine_names.lookup(name))
+        return None if row_id is None else medicine_to_dict(self.medicine_table.get(row_id))
+
+    def delete_medicine(self, row_id):
+        """Delete medicine using multidimensional array operations"""
+        return self.remove_medicine_by_id(row_id)
+
+    # -------------------------
+    # Equipment functions with Basic Multidimensional Array Operations
+    # -------------------------
+    @_synchronized
+    def add_equipment(self, name, stock, status):
+        """Add equipment to multidimensional array using append()"""
+        row_id = self.equipment_table.allocate_id()  # monotonic ID sequence, never reused
+        new_row = [row_id, name, stock, status]
+        self._undo("append", "equipment", row_id)
+        self.equipment_table.append(new_row)  # Add entire row to 2D array
+        self._record_change("append", "equipment", new_row)
+        return equipment_to_dict(new_row)
+
+    @_synchronized
+    def insert_equipment_at_position(self, index, name, stock, status):
+        """Insert equipment into multidimensional array at a specific index using insert()"""
+        table = self.equipment_table
+        if not (0 <= index <= len(table)):
+            print(f"Error: Index {index} is out of bounds for equipment array (size {len(table)})")
+            return None
+
+        # IDs identify records, not positions: existing IDs are left untouched
+        new_row = [table.allocate_id(), name, stock, status]
+        self._undo("insert", "equipment", new_row[EQ_ID])
+        table.insert(index, new_row)  # Insert entire row at specific index
+        self._record_change("insert", "equipment", index, new_row)
+        return equipment_to_dict(new_row)
+
+    @_synchronized
+    def remove_equipment_by_id(self, eq_id):
+        """Remove equipment by ID using multidimensional array operations"""
+        self._undo("remove", "equipment", eq_id)
+        row = self.equipment_table.remove(eq_id)  # O(1) via the ID index
+        if row is None:
+            return None
+        self._record_change("remove", "equipment", eq_id)
+        return equipment_to_dict(row)
+
+    @_synchronized
+    def remove_equipment_by_name(self, name):
+        """Remove equipment by name using multidimensional array operations"""
+        row_id = self.equipment_table.first_in_order(self.equipment_names.lookup(name))
+        if row_id is None:
+            return None
+        return self.remove_equipment_by_id(row_id)
+
+    @_synchronized
+    def pop_equipment(self):
+        """Remove the last equipment from the multidimensional array using pop()"""
+        self._undo("pop", "equipment")
+        row = self.equipment_table.pop()
+        if row is None:
+            return None
+        self._record_change("remove", "equipment", row[EQ_ID])
+        return equipment_to_dict(row)
+
+    def get_equipment_by_index(self, index):
+        """Get equipment by multidimensional array index"""
+        row = self.equipment_table.at(index)
+        return None if row is None else equipment_to_dict(row)
+
+    def get_last_equipment(self):
+        """Get the last equipment in the multidimensional array"""
+        row = self.equipment_table.last()
+        return None if row is None else equipment_to_dict(row)
+
+    def insert_equipment(self, name, stock, status):
+        """Add equipment using basic multidimensional array append operation"""
+        return self.add_equipment(name, stock, status)
+
+    def fetch_equipment(self):
+        """Fetch all equipment from multidimensional array"""
+        return [tuple(row) for row in self.equipment_table]
+
+    def iter_equipment(self):
+        """Stream every equipment item as a read-only EquipmentView, in array order (no copies)"""
+        return (EquipmentView(row) for row in self.equipment_table)
+
+    def get_equipment_count(self):
+        """Get total number of equipment in multidimensional array"""
+        return len(self.equipment_table)
+
+    def is_equipment_empty(self):
+        """Check if equipment multidimensional array is empty"""
+        return len(self.equipment_table) == 0
+
+    @_synchronized
+    def clear_all_equipment(self):
+        """Clear all equipment from multidimensional array"""
+        self._undo("clear", "equipment")
+        self.equipment_table.clear()
+        self._record_change("clear", "equipment")
+
+    @_synchronized
+    def update_equipment(self, row_id, name, stock, status):
+        """Update equipment using multidimensional array operations"""
+        changes = {
+            EQ_NAME: name,
+            EQ_STOCK: stock,
+            EQ_STATUS: status
+        }
+        self._undo("update", "equipment", row_id, changes)
+        if self.equipment_table.update(row_id, changes) is None:  # O(1) via the ID index
+            return False
+        self._record_change("update", "equipment", row_id, list(changes.items()))
+        return True
+
+    def find_equipment_by_id(self, row_id):
+        """Find equipment by ID using multidimensional array operations"""
+        row = self.equipment_table.get(row_id)  # O(1) via the ID index
+        return None if row is None else equipment_to_dict(row)
+
+    def find_equipment_by_name(self, name):
+        """Find equipment by name using multidimensional array operations"""
+        # The name index narrows it to rows with this name; the first in table order wins
+        row_id = self.equipment_table.first_in_order(self.equipment_names.lookup(name))
+        return None if row_id is None else equipment_to_dict(self.equipment_table.get(row_id))
+
+    def delete_equipment(self, row_id):
+        """Delete equipment using multidimensional array operations"""
+        return self.remove_equipment_by_id(row_id)
+
+    # -------------------------
+    # Bulk Import
+    # -------------------------
+    def import_medicines(self, path, file_format=None, strict=False, dry_run=False):
+        """Import a supplier delivery file (CSV or NDJSON, see importer.py).
+
+        Each line is validated and normalized; a line with the same name
+        (case-insensitive) and expiry as a stored medicine, or as an earlier
+        line, adds its packs and total to that record instead of creating a
+        new one. Bad lines are reported in the returned ImportReport and
+        skipped; with strict=True any bad line aborts the whole import (every
+        line is checked before anything is committed). dry_run=True only
+        reports what would happen.
+
+        Reading and validating the file runs without the engine lock. The
+        merge is committed IMPORT_CHUNK_ROWS lines at a time, each chunk in
+        its own batch (one journal or backend write), so other threads wait
+        at most one chunk; they may see the import half done, and if a chunk
+        fails the chunks before it stay imported. Without a journal, backend
+        or background writer the JSON file is written once, at the end.
+        """
+        entries, report = read_delivery(path, file_format)
+        entries = list(entries.values())
+        chunks = [entries[start:start + self.IMPORT_CHUNK_ROWS]
+                  for start in range(0, len(entries), self.IMPORT_CHUNK_ROWS)]
+        if dry_run or strict:
+            for chunk in chunks:
+                with self.lock:
+                    updates, new_rows = self._match_delivery(chunk, report)
+                report.added += len(new_rows)
+                report.merged += len(updates)
+                time.sleep(0)
+            report.errors.sort()
+            if dry_run or report.errors:
+                return report
+            report.added = report.merged = 0
+        with self._saving_once():
+            for chunk in chunks:
+                with self.batch():  # takes the engine lock for this chunk only
+                    updates, new_rows = self._match_delivery(chunk, report)
+                    self._commit_delivery(updates, new_rows)
+                report.added += len(new_rows)
+                report.merged += len(updates)
+                time.sleep(0)  # let a thread waiting for the lock take it before the next chunk
+        report.errors.sort()
+        report.committed = True
+        return report
+
+    def _match_delivery(self, entries, report):
+        # Split delivery entries into stock for stored records and new rows (under the lock)
+        table = self.medicine_table
+        updates = []   # (row_id, {col: value}) for stored records receiving stock
+        new_rows = []
+        for name, packs, items_per_pack, total, expiry, line in entries:
+            row = None
+            for row_id in self.medicine_names.lookup(name):
+                candidate = table.get(row_id)
+                if candidate[MED_EXPIRY] == expiry:
+                    row = candidate
+                    break
+            if row is None:
+                new_rows.append([None, name, packs, items_per_pack, total, expiry])
+            elif row[MED_ITEMS_PER_PACK] != items_per_pack:
+                report.error(line, f"items_per_pack {items_per_pack} differs from stored "
+                                   f"{row[MED_NAME]} ({row[MED_ITEMS_PER_PACK]}) expiring {expiry}")
+            else:
+                updates.append((row[MED_ID], {MED_PACKS: row[MED_PACKS] + packs,
+                                              MED_TOTAL_QTY: row[MED_TOTAL_QTY] + total}))
+        return updates, new_rows
+
+    def _commit_delivery(self, updates, new_rows):
+        table = self.medicine_table
+        for row_id, changes in updates:
+            self._undo("update", "medicines", row_id, changes)
+        table.update_many(updates)
+        for row_id, changes in updates:
+            self._record_change("update", "medicines", row_id, list(changes.items()))
+        for new_row in new_rows:
+            new_row[MED_ID] = table.allocate_id()
+            self._undo("append", "medicines", new_row[MED_ID])
+        table.extend(new_rows)  # indexes are brought up to date once per chunk, not per row
+        for new_row in new_rows:
+            self._record_change("append", "medicines", new_row)
+
+    def _save_snapshot(self):
+        if self.writer is not None:
+            self.writer.notify()
+        else:
+            self.save_to_json()
+
+    @contextmanager
+    def _saving_once(self):
+        # Whole-file saves (or background writer wake-ups) requested inside the
+        # block are made once when it ends; journal and backend writes are not held
+        with self.lock:
+            self._saves_deferred += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._saves_deferred -= 1
+                if not self._saves_deferred and self._save_pending:
+                    self._save_pending = False
+                    self._save_snapshot()
+
+    # -------------------------
+    # Array Sorting Functions
+    # -------------------------
+    @_synchronized
+    def sort_medicines_by_name(self, ascending=True, lazy=False):
+        """Sort medicines multidimensional array by name"""
+        self._undo("sort", "medicines")
+        self.medicine_table.sort_by("name", ascending)
+        self._record_change("sort", "medicines", "name", ascending)
+        return self._medicine_results(self.medicine_table, lazy)
+
+    @_synchronized
+    def sort_medicines_by_expiry(self, ascending=True, lazy=False):
+        """Sort medicines multidimensional array by expiry date"""
+        self._undo("sort", "medicines")
+        self.medicine_table.sort_by("expiry", ascending)
+        self._record_change("sort", "medicines", "expiry", ascending)
+        return self._medicine_results(self.medicine_table, lazy)
+
+    @_synchronized
+    def sort_medicines_by_total_qty(self, ascending=True, lazy=False):
+        """Sort medicines multidimensional array by total quantity"""
+        self._undo("sort", "medicines")
+        self.medicine_table.sort_by("total_qty", ascending)
+        self._record_change("sort", "medicines", "total_qty", ascending)
+        return self._medicine_results(self.medicine_table, lazy)
+
+    @_synchronized
+    def sort_medicines_by_packs(self, ascending=True, lazy=False):
+        """Sort medicines multidimensional array by packs"""
+        self._undo("sort", "medicines")
+        self.medicine_table.sort_by("packs", ascending)
+        self._record_change("sort", "medicines", "packs", ascending)
+        return self._medicine_results(self.medicine_table, lazy)
+
+    @_synchronized
+    def sort_equipment_by_name(self, ascending=True, lazy=False):
+        """Sort equipment multidimensional array by name"""
+        self._undo("sort", "equipment")
+        self.equipment_table.sort_by("name", ascending)
+        self._record_change("sort", "equipment", "name", ascending)
+        return self._equipment_results(self.equipment_table, lazy)
+
+    @_synchronized
+    def sort_equipment_by_stock(self, ascending=True, lazy=False):
+        """Sort equipment multidimensional array by stock quantity"""
+        self._undo("sort", "equipment")
+        self.equipment_table.sort_by("stock", ascending)
+        self._record_change("sort", "equipment", "stock", ascending)
+        return self._equipment_results(self.equipment_table, lazy)
+
+    @_synchronized
+    def sort_equipment_by_status(self, ascending=True, lazy=False):
+        """Sort equipment multidimensional array by status"""
+        self._undo("sort", "equipment")
+        self.equipment_table.sort_by("status", ascending)
+        self._record_change("sort", "equipment", "status", ascending)
+        return self._equipment_results(self.equipment_table, lazy)
+
+    # -------------------------
+    # Array Filtering Functions
+    # -------------------------
+    @_synchronized
+    def filter_medicines_by_expiry_range(self, start_date, end_date, lazy=False):
+        """Filter medicines by expiry date range, in table order.
+
+        Uses binary search on the sorted expiry index: O(log n + k log k).
+        """
+        try:
+            start = expiry_ordinal(start_date)
+            end = expiry_ordinal(end_date)
+        except ValueError:
+            return iter(()) if lazy else []
+        ids = self.medicine_expiry.range(start, end)
+        return self._medicines_by_ids(self.medicine_table.in_order(ids), lazy)
+
+    @_synchronized
+    def filter_medicines_by_low_stock(self, threshold=5, lazy=False):
+        """Filter medicines with low stock (total_qty <= threshold), in table order"""
+        ids = self.medicine_total_qty.range(None, threshold)
+        return self._medicines_by_ids(self.medicine_table.in_order(ids), lazy)
+
+    @_synchronized
+    def filter_medicines_by_name_pattern(self, pattern, lazy=False):
+        """Filter medicines by name pattern (case-insensitive), in table order, via the trigram index"""
+        ids = self.medicine_name_grams.search(pattern)
+        return self._medicines_by_ids(self.medicine_table.in_order(ids), lazy)
+
+    def get_medicines_slice(self, start, end, lazy=False):
+        """Get a slice of medicines multidimensional array using slicing operation"""
+        return self._medicine_results(self.medicine_table.slice(start, end), lazy)
+
+    @_synchronized
+    def filter_medicines_by_packs_range(self, min_packs, max_packs, lazy=False):
+        """Filter medicines by packs range, in table order, via the packs index"""
+        ids = self.medicine_packs.range(min_packs, max_packs)
+        return self._medicines_by_ids(self.medicine_table.in_order(ids), lazy)
+
+    @_synchronized
+    def filter_equipment_by_stock_level(self, threshold, above=True, lazy=False):
+        """Filter equipment at or above (or at or below) a stock level, in table order"""
+        ids = self.equipment_stock.range(threshold, None) if above else self.equipment_stock.range(None, threshold)
+        return self._equipment_by_ids(self.equipment_table.in_order(ids), lazy)
+
+    @_synchronized
+    def filter_equipment_by_status_pattern(self, pattern, lazy=False):
+        """Filter equipment by status pattern (case-insensitive), in table order, via the trigram index"""
+        ids = self.equipment_status_grams.search(pattern)
+        return self._equipment_by_ids(self.equipment_table.in_order(ids), lazy)
+
+    @_synchronized
+    def filter_equipment_by_name_pattern(self, pattern, lazy=False):
+        """Filter equipment by name pattern (case-insensitive), in table order, via the trigram index"""
+        ids = self.equipment_name_grams.search(pattern)
+        return self._equipment_by_ids(self.equipment_table.in_order(ids), lazy)
+
+    @_synchronized
+    def search_equipment(self, term, lazy=False):
+        """Equipment whose name or status contains term (case-insensitive), in table order"""
+        ids = self.equipment_name_grams.search(term) | self.equipment_status_grams.search(term)
+        return self._equipment_by_ids(self.equipment_table.in_order(ids), lazy)
+
+    def get_equipment_slice(self, start, end, lazy=False):
+        """Get a slice of equipment multidimensional array using slicing operation"""
+        return self._equipment_results(self.equipment_table.slice(start, end), lazy)
+
+    @_synchronized
+    def filter_equipment_by_stock_range(self, min_stock, max_stock, lazy=False):
+        """Filter equipment by stock range, in table order, via the stock index"""
+        ids = self.equipment_stock.range(min_stock, max_stock)
+        return self._equipment_by_ids(self.equipment_table.in_order(ids), lazy)
+
+    # -------------------------
+    # Sorted Views
+    # -------------------------
+    def _sorted_view(self, table_name, sort_by):
+        view = self._views.get((table_name, sort_by))
+        if view is None:
+            table = self.tables[table_name]
+            view = table.add_index(SortedIndex(self._view_keys[table_name][sort_by], table.id_col))
+            self._views[(table_name, sort_by)] = view
+        return view
+
+    def prepare_sorted_view(self, table_name, sort_by):
+        """Build the cached order for a sort key now (O(n log n) the first time, then free).
+
+        Lets a worker thread pay for the sort so later page fetches are cheap.
+        Only reading the keys holds the engine lock; the sort runs without it
+        and changes made in the meantime are replayed onto the view.
+        """
+        view = self._views.get((table_name, sort_by))
+        if isinstance(view, LazyIndex):
+            view.prepare()  # a quantity/stock index, built in chunks like the others
+        with self.lock:
+            view = self._views.get((table_name, sort_by))
+            if view is not None:
+                return len(view)
+            table = self.tables[table_name]
+            view = SortedIndex(self._view_keys[table_name][sort_by], table.id_col)
+            pairs = view.keyed(table)
+            recorder = table.add_index(ChangeRecorder(), fill=False)
+        pairs.sort()
+        with self.lock:
+            table.remove_index(recorder)
+            built = self._views.get((table_name, sort_by))
+            if built is not None:  # another thread finished the same view first
+                return len(built)
+            view.load_sorted(pairs)
+            recorder.replay(view)
+            self._views[(table_name, sort_by)] = table.add_index(view, fill=False)
+            return len(view)
+
+    @_synchronized
+    def view_medicines_sorted(self, sort_by="name", ascending=True, lazy=False):
+        """Medicines ordered by a sort key without reordering the array or writing to disk.
+
+        The order is cached per key and kept up to date on every change, so
+        switching views costs O(n) to build the result, not a sort.
+        """
+        ids = self._sorted_view("medicines", sort_by).range(reverse=not ascending)
+        return self._medicines_by_ids(ids, lazy)
+
+    @_synchronized
+    def view_equipment_sorted(self, sort_by="name", ascending=True, lazy=False):
+        """Equipment ordered by a sort key without reordering the array or writing to disk"""
+        ids = self._sorted_view("equipment", sort_by).range(reverse=not ascending)
+        return self._equipment_by_ids(ids, lazy)
+
+    @_synchronized
+    def get_medicines_page(self, start, count, sort_by=None, ascending=True):
+        """Rows start..start+count-1 as tuples, in array order or in a sorted view's order.
+
+        Lets a UI fetch only the rows it is about to show.
+        """
+        if sort_by is None:
+            return [tuple(row) for row in self.medicine_table.slice(start, start + count)]
+        ids = self._sorted_view("medicines", sort_by).slice(start, start + count, reverse=not ascending)
+        get = self.medicine_table.get
+        return [tuple(get(row_id)) for row_id in ids]
+
+    @_synchronized
+    def get_equipment_page(self, start, count, sort_by=None, ascending=True):
+        """Equipment rows start..start+count-1 as tuples, in array order or a sorted view's order"""
+        if sort_by is None:
+            return [tuple(row) for row in self.equipment_table.slice(start, start + count)]
+        ids = self._sorted_view("equipment", sort_by).slice(start, start + count, reverse=not ascending)
+        get = self.equipment_table.get
+        return [tuple(get(row_id)) for row_id in ids]
+
+    # -------------------------
+    # Combined Queries
+    # -------------------------
+    @_synchronized
+    def query_medicines(self, *predicates, lazy=False, trace=False):
+        """Medicines matching every predicate (AND), in table order.
+
+        e.g. query_medicines(Contains("name", "mg"), ExpiresWithin(60), AtMost("total_qty", 20)).
+        The most selective indexed predicate drives the query; trace=True
+        prints the plan.
+        """
+        plan = self.medicine_query.plan(predicates)
+        ids = self.medicine_query.run(predicates, plan)
+        if trace:
+            print(plan)
+        return self._medicines_by_ids(ids, lazy)
+
+    @_synchronized
+    def query_equipment(self, *predicates, lazy=False, trace=False):
+        """Equipment matching every predicate (AND), in table order"""
+        plan = self.equipment_query.plan(predicates)
+        ids = self.equipment_query.run(predicates, plan)
+        if trace:
+            print(plan)
+        return self._equipment_by_ids(ids, lazy)
+
+    @_synchronized
+    def explain_medicines(self, *predicates):
+        """Run a medicine query and return its QueryPlan (estimates, driving index, rows examined)"""
+        plan = self.medicine_query.plan(predicates)
+        self.medicine_query.run(predicates, plan)
+        return plan
+
+    @_synchronized
+    def explain_equipment(self, *predicates):
+        """Run an equipment query and return its QueryPlan"""
+        plan = self.equipment_query.plan(predicates)
+        self.equipment_query.run(predicates, plan)
+        return plan
+
+    # -------------------------
+    # Advanced Array Operations
+    # -------------------------
+    def get_medicines_sorted_by_expiry(self):
+        """Get medicines sorted by expiry date (earliest first)"""
+        return self.sort_medicines_by_expiry(ascending=True)
+
+    def get_equipment_sorted_by_stock(self):
+        """Get equipment sorted by stock quantity (highest first)"""
+        return self.sort_equipment_by_stock(ascending=False)
+
+    def get_low_stock_medicines(self, threshold=5, lazy=False):
+        """Get all medicines with low stock"""
+        return self.filter_medicines_by_low_stock(threshold, lazy)
+
+    def low_stock_medicine_ids(self, threshold=5, packs_threshold=2):
+        """IDs of medicines with total_qty <= threshold or packs <= packs_threshold (for highlighting)"""
+        low_ids = set(self.medicine_total_qty.range(None, threshold))
+        low_ids.update(self.medicine_packs.range(None, packs_threshold))
+        return low_ids
+
+    def is_low_stock_medicine(self, row_id, threshold=5, packs_threshold=2):
+        """Same rule as low_stock_medicine_ids() for one row, O(1) via the quantity indexes"""
+        total_qty = self.medicine_total_qty.key_of(row_id)
+        packs = self.medicine_packs.key_of(row_id)
+        return (total_qty is not None and total_qty <= threshold) or (packs is not None and packs <= packs_threshold)
+
+    def count_low_stock_medicines(self, threshold=5):
+        """Count medicines with total_qty <= threshold in O(log n) (no rows built)"""
+        return self.medicine_total_qty.count_range(None, threshold)
+
+    def get_low_stock_equipment(self, threshold=3, lazy=False):
+        """Get all equipment with low stock"""
+        return self.filter_equipment_by_stock_level(threshold, above=False, lazy=lazy)
+
+    def low_stock_equipment_ids(self, threshold=2):
+        """IDs of equipment with stock <= threshold (for highlighting)"""
+        return set(self.equipment_stock.range(None, threshold))
+
+    def is_low_stock_equipment(self, row_id, threshold=2):
+        """Same rule as low_stock_equipment_ids() for one row, O(1) via the stock index"""
+        stock = self.equipment_stock.key_of(row_id)
+        return stock is not None and stock <= threshold
+
+    def count_low_stock_equipment(self, threshold=3):
+        """Count equipment with stock <= threshold in O(log n)"""
+        return self.equipment_stock.count_range(None, threshold)
+
+    @_synchronized
+    def get_expiring_medicines(self, days_ahead=30, lazy=False):
+        """Get medicines expiring within specified days (includes already expired ones)"""
+        cutoff = (datetime.now() + timedelta(days=days_ahead)).date().toordinal()
+        ids = self.medicine_expiry.range(None, cutoff)
+        return self._medicines_by_ids(self.medicine_table.in_order(ids), lazy)
+
+    def count_expiring_medicines(self, days_ahead=30):
+        """Count medicines expiring within specified days in O(log n) (no rows built)"""
+        cutoff = (datetime.now() + timedelta(days=days_ahead)).date().toordinal()
+        return self.medicine_expiry.count_range(None, cutoff)
+
+    # Results are lists of dicts, or with lazy=True generators of read-only row
+    # views (see rowview.py) that wrap the stored rows without copying them
+    def _medicine_results(self, rows, lazy=False):
+        if lazy:
+            return (MedicineView(row) for row in rows)
+        return [medicine_to_dict(row) for row in rows]
+
+    def _equipment_results(self, rows, lazy=False):
+        if lazy:
+            return (EquipmentView(row) for row in rows)
+        return [equipment_to_dict(row) for row in rows]
+
+    def _medicines_by_ids(self, ids, lazy=False):
+        get = self.medicine_table.get
+        if lazy:
+            return (MedicineView(row) for row in map(get, ids) if row is not None)
+        return [medicine_to_dict(get(row_id)) for row_id in ids]
+
+    def _equipment_by_ids(self, ids, lazy=False):
+        get = self.equipment_table.get
+        if lazy:
+            return (EquipmentView(row) for row in map(get, ids) if row is not None)
+        return [equipment_to_dict(get(row_id)) for row_id in ids]
+
+    def get_medicines_by_name_search(self, search_term, lazy=False):
+        """Search medicines by name (case-insensitive partial match)"""
+        return self.filter_medicines_by_name_pattern(search_term, lazy)
+
+    @_synchronized
+    def complete_medicine_names(self, prefix, limit=20, lazy=False):
+        """Top `limit` medicines with a name word starting with prefix (type-ahead), alphabetical"""
+        return self._medicines_by_ids(self.medicine_prefixes.complete(prefix, limit), lazy)
+
+    def get_equipment_by_name_search(self, search_term, lazy=False):
+        """Search equipment by name (case-insensitive partial match)"""
+        return self.filter_equipment_by_name_pattern(search_term, lazy)
+
+    def find_medicine_index_by_id(self, medicine_id):
+        """Find the index of a medicine by its ID (internal utility)"""
+        return self.medicine_table.position_of(medicine_id)  # -1 if not found
+
+    def count_medicines_by_name(self, name):
+        """Count occurrences of a medicine name (internal utility)"""
+        return self.medicine_names.count(name)
+
+    def find_equipment_index_by_id(self, eq_id):
+        """Find the index of an equipment by its ID (internal utility)"""
+        return self.equipment_table.position_of(eq_id)  # -1 if not found
+
+    def count_equipment_by_name(self, name):
+        """Count occurrences of an equipment name (internal utility)"""
+        return self.equipment_names.count(name)
+
+    # -------------------------
+    # Statistics
+    # -------------------------
+    def _expiring_predicate(self, day):
+        # Reuses the ordinal already parsed by the expiry index (attached earlier,
+        # so it has seen the row by the time the counter is asked about it; if it
+        # is not built yet, the first lookup builds it from the table)
+        cutoff = (day + timedelta(days=STATS_EXPIRING_DAYS)).toordinal()
+        expiry = self.medicine_expiry
+
+        def expiring(row):
+            ordinal = expiry.key_of(row[MED_ID])
+            return ordinal is not None and ordinal <= cutoff
+        return cutoff, expiring
+
+    def roll_statistics_day(self, today=None):
+        """Daily tick: move the expiring-medicines window and the expiry alerts to today.
+
+        Moving forward only adds the rows that entered the window (O(log n + k))
+        and only re-checks alerts for rows whose expiry is near the moved dates;
+        returns False when the day has not changed.
+        """
+        today = today or datetime.now().date()
+        if today == self._stats_day:
+            return False  # checked before taking the lock so a clock tick never waits for a query
+        with self.lock:
+            if today == self._stats_day:
+                return False
+            self._roll_day(today)
+        return True
+
+    def _roll_day(self, today):
+        self._roll_alerts(self._stats_day.toordinal(), today.toordinal())
+        old_cutoff = self._stats_expiry_cutoff
+        cutoff, expiring = self._expiring_predicate(today)
+        counter = self.stats_expiring_medicines
+        if not counter.built:
+            counter.index.predicate = expiring  # counted with it when first used
+        elif today > self._stats_day:
+            counter.index.predicate = expiring
+            counter.update(self.medicine_expiry.range(old_cutoff + 1, cutoff))
+        else:
+            counter.reset(expiring, self.medicine_expiry.range(None, cutoff))
+        self._stats_day = today
+        self._stats_expiry_cutoff = cutoff
+
+    # -------------------------
+    # Alerts
+    # -------------------------
+    def _medicine_alert_rules(self):
+        # Most severe first: the first matching rule gives the row its tag
+        expiry = self.medicine_expiry
+        low_qty = self.alert_settings["low_stock_qty"]
+        low_packs = self.alert_settings["low_stock_packs"]
+        near_days = self.alert_settings["near_expiry_days"]
+
+        def expired(row, today):
+            ordinal = expiry.key_of(row[MED_ID])
+            return ordinal is not None and ordinal < today
+
+        def low_stock(row, today):
+            return row[MED_TOTAL_QTY] <= low_qty or row[MED_PACKS] <= low_packs
+
+        def near_expiry(row, today):
+            ordinal = expiry.key_of(row[MED_ID])
+            return ordinal is not None and today <= ordinal <= today + near_days
+
+        return [
+            AlertRule("expired", expired, uses_date=True),
+            AlertRule("low_stock", low_stock, tag="low"),
+            AlertRule("near_expiry", near_expiry, uses_date=True),
+        ]
+
+    def _equipment_alert_rules(self):
+        low_stock = self.alert_settings["equipment_low_stock"]
+        return [AlertRule("low_stock", lambda row, today: row[EQ_STOCK] <= low_stock, tag="low")]
+
+    def _roll_alerts(self, old_today, today):
+        # Only records expiring between the old day and the new near-expiry horizon can change
+        near_days = self.alert_settings["near_expiry_days"]
+        alerts = self.medicine_alerts
+        if alerts.built:
+            ids = self.medicine_expiry.range(min(old_today, today), max(old_today, today) + near_days)
+            get = self.medicine_table.get
+            alerts.roll_today(today, (get(row_id) for row_id in ids))
+        else:
+            alerts.index.roll_today(today, ())  # evaluated for the new day when first used
+        self.equipment_alerts.index.roll_today(today, ())  # no date rules, only the day moves
+
+    @_synchronized
+    def configure_alerts(self, **settings):
+        """Change alert thresholds (keys of ALERT_DEFAULTS) and re-evaluate every record"""
+        unknown = set(settings) - set(ALERT_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown alert settings: {', '.join(sorted(unknown))}")
+        self.alert_settings.update(settings)
+        for alerts, rules in ((self.medicine_alerts, self._medicine_alert_rules()),
+                              (self.equipment_alerts, self._equipment_alert_rules())):
+            alerts.index.set_rules(rules, alerts.table if alerts.built else ())
+
+    def get_medicine_alerts(self, row_id):
+        """Names of the alert rules a medicine currently breaks, most severe first (O(1))"""
+        return self.medicine_alerts.alerts_of(row_id)
+
+    def medicine_alert_tag(self, row_id):
+        """Display tag of a medicine's most severe alert ("expired", "low", ...), or None"""
+        return self.medicine_alerts.tag_of(row_id)
+
+    def equipment_alert_tag(self, row_id):
+        """Display tag of an equipment item's most severe alert, or None"""
+        return self.equipment_alerts.tag_of(row_id)
+
+    def get_medicines_with_alert(self, name, lazy=False):
+        """Medicines currently matching an alert rule, in table order"""
+        ids = self.medicine_table.in_order(self.medicine_alerts.ids_with(name))
+        return self._medicines_by_ids(ids, lazy)
+
+    def get_alert_counts(self):
+        """Number of records per alert rule, per table"""
+        self.roll_statistics_day()
+        return {"medicines": self.medicine_alerts.counts(), "equipment": self.equipment_alerts.counts()}
+
+    def get_array_statistics(self):
+        """Get statistics about the multidimensional arrays (O(1) counters)"""
+        self.roll_statistics_day()
+        return {
+            "medicines_count": len(self.medicine_table),
+            "equipment_count": len(self.equipment_table),
+            "low_stock_medicines": len(self.stats_low_stock_medicines),
+            "low_stock_equipment": len(self.stats_low_stock_equipment),
+            "expiring_medicines": len(self.stats_expiring_medicines)
+        }
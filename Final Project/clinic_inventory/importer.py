@@ -0,0 +1,204 @@
+# importer.py - Bulk import of supplier delivery files
+#
+# A delivery file lists medicines, one per line, as CSV with a header row
+#
+#   name,packs,items_per_pack,expiry[,total_qty]
+#   Paracetamol 500mg,20,10,2026-12-31,200
+#
+# or as NDJSON, one object per line: either {"name": ..., "packs": ...} with
+# the same fields, or an inventory record {"table": "medicines", "row": [...]}
+# (see ndjson.py; its ID is ignored).
+#
+# read_delivery() validates and normalizes every line (integers, total_qty =
+# packs x items_per_pack, expiry as YYYY-MM-DD) and folds lines with the same
+# name (case-insensitive) and expiry into one entry. A bad line is recorded in
+# the ImportReport with its line number and the rest of the file still loads.
+# ClinicInventory.import_medicines() then merges the entries into the
+# inventory and commits them with a single write.
+import csv
+import json
+import os
+from datetime import datetime
+
+from .storage import TABLE_FIELDS
+
+DATE_FORMAT = "%Y-%m-%d"  # same as core.DATE_FORMAT (core imports this module)
+
+# Expiry spellings accepted from suppliers (year first only, so day and month cannot be swapped)
+DELIVERY_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d")
+
+REQUIRED_FIELDS = ("name", "packs", "items_per_pack", "expiry")
+
+
+class ImportReport:
+    """Outcome of an import: lines read, rows added or merged, and per-line errors"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = 0
+        self.added = 0
+        self.merged = 0
+        self.errors = []        # (line number, message)
+        self.committed = False
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def __str__(self):
+        lines = [f"IMPORT {self.path}: {self.lines} lines, {self.added} added, "
+                 f"{self.merged} merged, {len(self.errors)} errors"
+                 + ("" if self.committed else " (nothing committed)")]
+        for line, message in self.errors[:20]:
+            lines.append(f"  line {line}: {message}")
+        if len(self.errors) > 20:
+            lines.append(f"  ... {len(self.errors) - 20} more")
+        return "\n".join(lines)
+
+
+def _integer(value, field):
+    # CSV values arrive as text, NDJSON values as numbers
+    if isinstance(value, str):
+        text = value.strip()
+        if text.isdecimal():
+            return int(text)
+    elif isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise ValueError(f"{field} must be a whole number, got {value!r}")
+
+
+def _expiry(value, cache):
+    # Supplier files repeat the same few dates, so each spelling is parsed once
+    if not isinstance(value, str):
+        raise ValueError(f"expiry must be a date (YYYY-MM-DD), got {value!r}")
+    normalized = cache.get(value)
+    if normalized is not None:
+        return normalized
+    text = value.strip()
+    for fmt in DELIVERY_DATE_FORMATS:
+        try:
+            normalized = datetime.strptime(text, fmt).strftime(DATE_FORMAT)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"expiry must be a date (YYYY-MM-DD), got {value!r}")
+    cache[value] = normalized
+    return normalized
+
+
+def normalize_medicine(fields, date_cache=None):
+    """Validate one delivery line ({field: value}) and return (name, packs, items_per_pack, total_qty, expiry).
+
+    Raises ValueError describing the first problem found.
+    """
+    name = fields.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name is missing")
+    packs = _integer(fields.get("packs"), "packs")
+    items_per_pack = _integer(fields.get("items_per_pack"), "items_per_pack")
+    total = packs * items_per_pack
+    given = fields.get("total_qty")
+    if given is not None and given != "" and _integer(given, "total_qty") != total:
+        raise ValueError(f"total_qty {given} does not equal packs x items_per_pack ({total})")
+    expiry = _expiry(fields.get("expiry"), {} if date_cache is None else date_cache)
+    return name.strip(), packs, items_per_pack, total, expiry
+
+
+def _csv_lines(path):
+    # Yields (line number, {field: value}); raises ValueError if the header lacks a field
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [column.strip().lower().replace(" ", "_") for column in header]
+        missing = [field for field in REQUIRED_FIELDS if field not in fields]
+        if missing:
+            raise ValueError(f"header is missing {', '.join(missing)}")
+        width = len(fields)
+        for values in reader:
+            if not any(values):
+                continue
+            if len(values) != width:
+                yield reader.line_num, ValueError(f"expected {width} columns, got {len(values)}")
+                continue
+            yield reader.line_num, dict(zip(fields, values))
+
+
+def _ndjson_lines(path):
+    medicine_fields = TABLE_FIELDS["medicines"]
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:  # includes UTF-8 decoding errors
+                yield number, ValueError(f"not valid JSON ({e})")
+                continue
+            if not isinstance(record, dict):
+                yield number, ValueError("not a JSON object")
+            elif "format" in record and "name" not in record:
+                continue  # header line of an inventory NDJSON file
+            elif "table" in record:
+                row = record.get("row")
+                if record["table"] != "medicines":
+                    continue  # equipment records of an inventory file are not deliveries
+                if not isinstance(row, list) or len(row) != len(medicine_fields):
+                    yield number, ValueError(f"medicines row must have {len(medicine_fields)} fields")
+                else:
+                    yield number, dict(zip(medicine_fields, row))
+            else:
+                yield number, record
+
+
+def delivery_format_for(path):
+    """Delivery format of a file from its extension: ndjson for .ndjson/.jsonl, otherwise csv"""
+    extension = os.path.splitext(path)[1].lower()
+    return "ndjson" if extension in (".ndjson", ".jsonl") else "csv"
+
+
+def read_delivery(path, file_format=None, report=None):
+    """Read, validate and fold a delivery file.
+
+    Returns ({(casefolded name, expiry): [name, packs, items_per_pack,
+    total_qty, expiry, line]}, report) in file order. Lines repeating a name
+    and expiry are added to the first one; they must agree on items_per_pack.
+    """
+    report = report if report is not None else ImportReport(path)
+    file_format = file_format or delivery_format_for(path)
+    if file_format == "csv":
+        lines = _csv_lines(path)
+    elif file_format == "ndjson":
+        lines = _ndjson_lines(path)
+    else:
+        raise ValueError(f"Unknown delivery format: {file_format}")
+    entries = {}
+    dates = {}
+    try:
+        for number, fields in lines:
+            report.lines += 1
+            try:
+                if isinstance(fields, Exception):
+                    raise fields
+                name, packs, items_per_pack, total, expiry = normalize_medicine(fields, dates)
+            except ValueError as e:
+                report.error(number, str(e))
+                continue
+            key = (name.casefold(), expiry)
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [name, packs, items_per_pack, total, expiry, number]
+            elif entry[2] != items_per_pack:
+                report.error(number, f"items_per_pack {items_per_pack} differs from line {entry[5]} "
+                                     f"({entry[2]}) for {name} expiring {expiry}")
+            else:
+                entry[1] += packs
+                entry[3] += total
+    except (OSError, UnicodeDecodeError, csv.Error, ValueError) as e:
+        report.error(report.lines + 1, str(e))  # the file itself could not be read any further
+    return entries, report
@@ -0,0 +1,573 @@
+# indexes.py - Secondary indexes kept in sync by the table storage engines
+#
+# An index is attached to a table with add_index() (see tables.py). The table calls
+# add(row) whenever a row is stored, discard(row) before a row is removed or
+# changed, and clear() when the table is emptied, so every index is updated
+# incrementally instead of being rebuilt.
+#
+# Indexes store record IDs rather than row objects, so they work the same way
+# on every storage engine (RowTable rows or rows decoded from ColumnarTable).
+#
+# Any index can be wrapped in a LazyIndex, which skips building it while the
+# table loads and builds it in one pass the first time it is queried (or in
+# chunks from a worker thread, see LazyIndex.prepare).
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from .tables import ChangeRecorder
+
+_WORD = re.compile(r"\S+")
+
+
+class NameIndex:
+    """Hash index from a case-folded text column to the IDs of rows holding it"""
+
+    def __init__(self, col, id_col=0):
+        self.col = col
+        self.id_col = id_col
+        self._buckets = {}  # casefolded text -> list of IDs, in edit order (not table order)
+
+    def add(self, row):
+        self._buckets.setdefault(row[self.col].casefold(), []).append(row[self.id_col])
+
+    def discard(self, row):
+        key = row[self.col].casefold()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        try:
+            bucket.remove(row[self.id_col])
+        except ValueError:
+            return
+        if not bucket:
+            del self._buckets[key]
+
+    def clear(self):
+        self._buckets = {}
+
+    def lookup(self, name):
+        """Return the IDs of rows whose column equals name (case-insensitive)"""
+        return self._buckets.get(name.casefold(), [])
+
+    def count(self, name):
+        """Number of rows with this name (O(1))"""
+        return len(self._buckets.get(name.casefold(), ()))
+
+
+class SortedIndex:
+    """Ordered index on a derived key, kept as a sorted list of (key, id) pairs.
+
+    key(row) is computed once when the row is stored (e.g. an expiry date
+    parsed to an ordinal) and remembered per ID, so range queries are a pair
+    of binary searches plus the size of the result: O(log n + k).
+    Rows whose key is None (or cannot be computed) are left out.
+    """
+
+    def __init__(self, key, id_col=0):
+        self.key = key
+        self.id_col = id_col
+        self._entries = []  # sorted (key, id) pairs
+        self._key_of = {}   # id -> key currently stored in _entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, row):
+        try:
+            key = self.key(row)
+        except (TypeError, ValueError):
+            key = None
+        if key is None:
+            return
+        row_id = row[self.id_col]
+        self._key_of[row_id] = key
+        insort(self._entries, (key, row_id))
+
+    def keyed(self, rows):
+        """Unsorted (key, id) pairs for rows, leaving out rows without a key"""
+        id_col = self.id_col
+        pairs = []
+        for row in rows:
+            try:
+                key = self.key(row)
+            except (TypeError, ValueError):
+                continue
+            if key is not None:
+                pairs.append((key, row[id_col]))
+        return pairs
+
+    def add_many(self, rows):
+        """Add many rows with a single sort instead of one insort per row.
+
+        Fewer rows than are stored are sorted on their own and merged in
+        place from the end, moving each run of entries once: k rows cost
+        O(k log n) plus one C-level copy. (A merged copy would leave a new
+        n-entry list for the garbage collector to scan after every chunk.)
+        """
+        added = self.keyed(rows)
+        self._key_of.update((row_id, key) for key, row_id in added)
+        entries = self._entries
+        if len(added) >= len(entries):
+            entries.extend(added)
+            entries.sort()
+            return
+        added.sort()
+        points = [bisect_left(entries, pair) for pair in added]
+        end = len(entries)
+        entries.extend(added)  # grow to the final length; the tail is overwritten below
+        for j in range(len(added) - 1, -1, -1):
+            point = points[j]
+            entries[point + j + 1:end + j + 1] = entries[point:end]
+            entries[point + j] = added[j]
+            end = point
+
+    def load_sorted(self, pairs):
+        """Replace the contents with (key, id) pairs from keyed() that are already sorted"""
+        self._entries = pairs
+        self._key_of = {row_id: key for key, row_id in pairs}
+
+    def discard(self, row):
+        row_id = row[self.id_col]
+        key = self._key_of.pop(row_id, None)
+        if key is None:
+            return
+        entries = self._entries
+        i = bisect_left(entries, (key, row_id))
+        if i < len(entries) and entries[i] == (key, row_id):
+            del entries[i]
+
+    def discard_many(self, rows):
+        """Discard many rows by closing the gaps in place, moving each run
+        of kept entries once, instead of one deletion each"""
+        key_of, id_col = self._key_of, self.id_col
+        gone = []
+        for row in rows:
+            key = key_of.pop(row[id_col], None)
+            if key is not None:
+                gone.append((key, row[id_col]))
+        if not gone:
+            return
+        entries = self._entries
+        points = sorted(bisect_left(entries, pair) for pair in gone)
+        points.append(len(entries))
+        for j in range(len(points) - 1):
+            entries[points[j] - j:points[j + 1] - j - 1] = entries[points[j] + 1:points[j + 1]]
+        del entries[len(entries) - len(gone):]
+
+    def clear(self):
+        self._entries = []
+        self._key_of = {}
+
+    def key_of(self, row_id):
+        """Key stored for a row ID, or None"""
+        return self._key_of.get(row_id)
+
+    def _bounds(self, low, high):
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        # (high, inf) sorts after every (high, id) pair
+        end = len(entries) if high is None else bisect_right(entries, (high, float("inf")))
+        return start, end
+
+    def range(self, low=None, high=None, reverse=False):
+        """IDs with low <= key <= high in key order (None = unbounded)"""
+        start, end = self._bounds(low, high)
+        entries = self._entries
+        if reverse:
+            return [entries[i][1] for i in range(end - 1, start - 1, -1)]
+        return [row_id for _key, row_id in entries[start:end]]
+
+    def slice(self, start, end, reverse=False):
+        """IDs at key-order positions start..end-1 (counted from the top when reverse)"""
+        entries = self._entries
+        if reverse:
+            size = len(entries)
+            entries = entries[max(0, size - end):max(0, size - start)]
+            return [row_id for _key, row_id in reversed(entries)]
+        return [row_id for _key, row_id in entries[start:end]]
+
+    def count_range(self, low=None, high=None):
+        """Number of rows with low <= key <= high, in O(log n)"""
+        start, end = self._bounds(low, high)
+        return max(0, end - start)
+
+
+class NgramIndex:
+    """Inverted trigram index over a case-folded text column for substring search.
+
+    Every distinct n-character slice of a value maps to the set of IDs whose
+    value contains it. A pattern of at least n characters is answered by
+    intersecting the posting sets of its n-grams (smallest first) and then
+    confirming each candidate with a plain substring test, so only rows that
+    share every n-gram with the pattern are ever looked at. Shorter patterns
+    fall back to scanning the cached case-folded strings.
+    """
+
+    def __init__(self, col, id_col=0, n=3):
+        self.col = col
+        self.id_col = id_col
+        self.n = n
+        self._postings = {}  # n-gram -> set of IDs
+        self._text_of = {}   # id -> case-folded text
+
+    def __len__(self):
+        return len(self._text_of)
+
+    def _grams(self, text):
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, row):
+        text = (row[self.col] or "").casefold()
+        row_id = row[self.id_col]
+        self._text_of[row_id] = text
+        postings = self._postings
+        for gram in self._grams(text):
+            bucket = postings.get(gram)
+            if bucket is None:
+                postings[gram] = {row_id}
+            else:
+                bucket.add(row_id)
+
+    def add_many(self, rows):
+        """Add many rows; n-grams are computed once per distinct text and
+        posting sets are built from plain lists at the end"""
+        col, id_col, n = self.col, self.id_col, self.n
+        text_of = self._text_of
+        ids_of = {}  # case-folded text -> IDs added with it
+        for row in rows:
+            text = (row[col] or "").casefold()
+            row_id = row[id_col]
+            text_of[row_id] = text
+            ids = ids_of.get(text)
+            if ids is None:
+                ids_of[text] = [row_id]
+            else:
+                ids.append(row_id)
+        pending = defaultdict(list)  # n-gram -> new IDs
+        for text, ids in ids_of.items():
+            grams = {text[i:i + n] for i in range(len(text) - n + 1)}
+            if len(ids) == 1:
+                row_id = ids[0]
+                for gram in grams:
+                    pending[gram].append(row_id)
+            else:
+                for gram in grams:
+                    pending[gram].extend(ids)
+        postings = self._postings
+        for gram, ids in pending.items():
+            bucket = postings.get(gram)
+            if bucket is None:
+                postings[gram] = set(ids)
+            else:
+                bucket.update(ids)
+
+    def discard(self, row):
+        row_id = row[self.id_col]
+        text = self._text_of.pop(row_id, None)
+        if text is None:
+            return
+        postings = self._postings
+        for gram in self._grams(text):
+            bucket = postings.get(gram)
+            if bucket is not None:
+                bucket.discard(row_id)
+                if not bucket:
+                    del postings[gram]
+
+    def clear(self):
+        self._postings = {}
+        self._text_of = {}
+
+    def estimate(self, pattern):
+        """Upper bound on search(pattern) size: the smallest posting set of its n-grams"""
+        pattern = pattern.casefold()
+        if len(pattern) < self.n:
+            return len(self._text_of)
+        return min(len(self._postings.get(gram, ())) for gram in self._grams(pattern))
+
+    def search(self, pattern):
+        """Set of IDs whose text contains pattern (case-insensitive)"""
+        pattern = pattern.casefold()
+        text_of = self._text_of
+        if len(pattern) < self.n:
+            return {row_id for row_id, text in text_of.items() if pattern in text}
+        buckets = []
+        for gram in self._grams(pattern):
+            bucket = self._postings.get(gram)
+            if bucket is None:
+                return set()
+            buckets.append(bucket)
+        buckets.sort(key=len)
+        candidates = buckets[0].intersection(*buckets[1:])
+        return {row_id for row_id in candidates if pattern in text_of[row_id]}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}  # next character -> _TrieNode
+        self.ids = []       # IDs whose key ends at this node
+
+
+class PrefixIndex:
+    """Prefix trie over a case-folded text column for type-ahead search.
+
+    Every word start of a value is inserted, so "500" finds
+    "Paracetamol 500mg" as well as names beginning with "500". complete()
+    walks down to the prefix node and then visits the subtree in alphabetical
+    order, stopping after `limit` distinct IDs; branches with no IDs are
+    pruned on removal, so the work depends on the prefix length and the
+    limit, not on the size of the catalogue.
+
+    Rows added in bulk (add_many, i.e. loads and imports) only have their
+    keys computed; they are inserted into the trie by the first complete()
+    call, so a load does not pay for a trie nobody has searched yet.
+    """
+
+    def __init__(self, col, id_col=0):
+        self.col = col
+        self.id_col = id_col
+        self._root = _TrieNode()
+        self._keys_of = {}  # id -> keys inserted for it
+        self._unbuilt = {}  # id -> keys not yet inserted into the trie, in add order
+
+    def __len__(self):
+        return len(self._keys_of)
+
+    @staticmethod
+    def _keys(text):
+        # One key per word start: the text from that word to the end
+        text = (text or "").casefold()
+        return [text[match.start():] for match in _WORD.finditer(text)]
+
+    def add(self, row):
+        row_id = row[self.id_col]
+        keys = self._keys(row[self.col])
+        self._keys_of[row_id] = keys
+        if self._unbuilt:
+            self._unbuilt[row_id] = keys  # keep add order among IDs with the same key
+        else:
+            self._insert(row_id, keys)
+
+    def add_many(self, rows):
+        """Record many rows; the trie is extended on the next complete()"""
+        col, id_col, keys_of = self.col, self.id_col, self._keys_of
+        unbuilt = self._unbuilt
+        for row in rows:
+            row_id = row[id_col]
+            keys_of[row_id] = unbuilt[row_id] = self._keys(row[col])
+
+    def _insert(self, row_id, keys):
+        for key in keys:
+            node = self._root
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode()
+                node = child
+            node.ids.append(row_id)
+
+    def _build(self):
+        unbuilt, self._unbuilt = self._unbuilt, {}
+        for row_id, keys in unbuilt.items():
+            self._insert(row_id, keys)
+
+    def discard(self, row):
+        row_id = row[self.id_col]
+        keys = self._keys_of.pop(row_id, None)
+        if keys is None:
+            return
+        if self._unbuilt.pop(row_id, None) is not None:
+            return  # never made it into the trie
+        for key in keys:
+            path = [self._root]
+            for char in key:
+                path.append(path[-1].children[char])
+            path[-1].ids.remove(row_id)
+            # Prune nodes that no longer lead to any ID
+            for depth in range(len(key), 0, -1):
+                node = path[depth]
+                if node.ids or node.children:
+                    break
+                del path[depth - 1].children[key[depth - 1]]
+
+    def clear(self):
+        self._root = _TrieNode()
+        self._keys_of = {}
+        self._unbuilt = {}
+
+    def complete(self, prefix, limit=20):
+        """Up to limit IDs with a word starting with prefix, alphabetical by the matched text"""
+        if self._unbuilt:
+            self._build()
+        node = self._root
+        for char in prefix.casefold().strip():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = {}  # ordered set of IDs
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            for row_id in node.ids:
+                found[row_id] = None
+                if len(found) >= limit:
+                    break
+            # Push children in reverse order so the smallest character is visited first
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return list(found)
+
+
+class CountIndex:
+    """Live set of the IDs whose row satisfies predicate(row); len() is O(1).
+
+    Membership is remembered per ID, so removing a row always undoes its own
+    add() even if the predicate depends on something that changed since
+    (e.g. today's date). Use reset() to re-evaluate with a new predicate.
+    """
+
+    def __init__(self, predicate, id_col=0):
+        self.predicate = predicate
+        self.id_col = id_col
+        self._members = set()
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, row_id):
+        return row_id in self._members
+
+    def add(self, row):
+        if self.predicate(row):
+            self._members.add(row[self.id_col])
+
+    def discard(self, row):
+        self._members.discard(row[self.id_col])
+
+    def clear(self):
+        self._members = set()
+
+    def update(self, ids):
+        """Count extra IDs known to satisfy the predicate"""
+        self._members.update(ids)
+
+    def reset(self, predicate, ids):
+        """Switch to a new predicate whose matching IDs are given"""
+        self.predicate = predicate
+        self._members = set(ids)
+
+
+class LazyIndex:
+    """Wraps an index so it is built on first use instead of on every load.
+
+    Until the first query the table's add/discard/clear calls are ignored;
+    the first call of any other method (or len()/in) fills the index from
+    the table in one pass, and from then on it is kept current like any
+    other. lock (normally the engine lock) is held while building, so the
+    table cannot change half way through. prepare() builds it from a worker
+    thread instead, holding the lock for one chunk of rows at a time.
+    """
+
+    # Rows added per lock hold in prepare()
+    CHUNK_ROWS = 5000
+
+    def __init__(self, index, table, lock=None):
+        self.index = index
+        self.table = table
+        self.lock = lock if lock is not None else threading.RLock()
+        self.col = getattr(index, "col", None)  # lets the table skip it on unrelated updates
+        self.built = False
+        self._pending = None  # (rows still to add, ChangeRecorder) while prepare() runs
+
+    def build(self):
+        """Fill the index from the table now, if it is not built yet; returns it"""
+        if not self.built:
+            with self.lock:
+                if self._pending is not None:
+                    self._finish()  # a prepare() is part way through: add the rest now
+                elif not self.built:
+                    self.index.clear()
+                    self.table._fill_index(self.index)
+                    self.built = True
+        return self.index
+
+    def prepare(self):
+        """Build the index without holding the lock for the whole build.
+
+        The table's rows are listed under the lock (not copied), then added
+        CHUNK_ROWS at a time, taking the lock for each chunk. Changes the
+        table makes in between are recorded: a row changed before its chunk
+        is added as it was when the build started, and the changes are
+        replayed at the end. A query that needs the index meanwhile finishes
+        the build itself.
+        """
+        with self.lock:
+            if self.built or self._pending is not None:
+                return
+            self.index.clear()
+            recorder = self.table.add_index(ChangeRecorder(self.table.id_col), fill=False)
+            self._pending = (list(self.table), recorder)
+        while True:
+            with self.lock:
+                if self.built:
+                    return  # a query finished it
+                rows = self._pending[0]
+                if len(rows) <= self.CHUNK_ROWS:
+                    self._finish()
+                    return
+                self._fill(rows[:self.CHUNK_ROWS])
+                del rows[:self.CHUNK_ROWS]
+            time.sleep(0)  # let a thread waiting for the lock take it before the next chunk
+
+    def _fill(self, rows):
+        before, id_col = self._pending[1].before, self.table.id_col
+        if before:
+            rows = [before.get(row[id_col], row) for row in rows]
+        self.table._fill_index(self.index, rows)
+
+    def _finish(self):
+        rows, recorder = self._pending
+        self._fill(rows)
+        self.table.remove_index(recorder)
+        recorder.replay(self.index)
+        self._pending = None
+        self.built = True
+
+    def __getattr__(self, name):
+        # Only reached for names the wrapper does not define: the index's own queries
+        return getattr(self.build(), name)
+
+    def __len__(self):
+        return len(self.build())
+
+    def __contains__(self, row_id):
+        return row_id in self.build()
+
+    def add(self, row):
+        if self.built:
+            self.index.add(row)
+
+    def add_many(self, rows):
+        if self.built:
+            self.table._fill_index(self.index, rows)
+
+    def discard(self, row):
+        if self.built:
+            self.index.discard(row)
+
+    def discard_many(self, rows):
+        if self.built:
+            if hasattr(self.index, "discard_many"):
+                self.index.discard_many(rows)
+            else:
+                for row in rows:
+                    self.index.discard(row)
+
+    def clear(self):
+        if self.built:
+            self.index.clear()
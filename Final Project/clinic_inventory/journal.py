@@ -0,0 +1,130 @@
+# journal.py - Append-only write-ahead journal for inventory mutations
+#
+# In journal mode every mutation appends one compact JSON line to the journal
+# file instead of rewriting the whole inventory snapshot:
+#
+#   [seq, "append", "medicines", [10, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]]
+#   [seq, "update", "equipment", 3, [[1, "BP Monitor"], [2, 4], [3, "In use"]]]
+#   [seq, "remove", "medicines", 10]
+#
+# Each line maps onto one RowTable call, so replaying the journal on top of
+# the last snapshot rebuilds exactly the same tables. The snapshot stores the
+# sequence number of the last record it contains, so records that were already
+# compacted into it are skipped if a crash happened before the journal was
+# truncated.
+import json
+import os
+
+
+def journal_path_for(json_file):
+    """Default journal file name next to the JSON snapshot"""
+    return os.path.splitext(json_file)[0] + ".journal"
+
+
+class Journal:
+    """Append-only log of table operations"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync  # fsync after every record (slower, survives power loss)
+        self.seq = 0        # sequence number of the last record written or replayed
+        self.pending = 0    # records written since the last compaction
+        self._file = None
+
+    def append(self, op, table, *args):
+        """Write one record for a mutation (O(1), independent of inventory size)"""
+        self.append_many([(op, table, *args)])
+
+    def append_many(self, records):
+        """Write several (op, table, *args) records with a single write and flush"""
+        lines = []
+        for record in records:
+            self.seq += 1
+            lines.append(json.dumps([self.seq, *record], separators=(",", ":"), ensure_ascii=False))
+        if not lines:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.pending += len(lines)
+
+    def replay(self, tables, after_seq=0):
+        """Apply every record newer than after_seq to tables ({name: RowTable}).
+
+        Returns the number of records applied. A torn last line (crash while
+        appending) is ignored and cut off the file, so the next append starts
+        on a fresh line instead of being glued onto it.
+        """
+        self.seq = after_seq
+        self.pending = 0
+        if not os.path.exists(self.path):
+            return 0
+        applied = 0
+        good_end = 0        # byte offset just past the last readable record
+        newline = True      # whether that record ends with a newline
+        torn = False
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    torn = True
+                    break
+                good_end += len(line)
+                newline = line.endswith(b"\n")
+                self.pending += 1
+                seq, op, name = record[0], record[1], record[2]
+                if seq <= after_seq:
+                    continue
+                apply_record(tables[name], op, record[3:])
+                self.seq = seq
+                applied += 1
+        if torn:
+            print(f"Warning: ignoring unreadable journal record in {self.path}")
+            self._cut(good_end)
+        if not newline:
+            # A record can only parse if it is complete; finish its line
+            with open(self.path, "ab") as f:
+                f.write(b"\n")
+        return applied
+
+    def _cut(self, size):
+        # Drop everything after the last readable record
+        self.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(size)
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def truncate(self):
+        """Empty the journal after its records were compacted into a snapshot"""
+        self.close()
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self.pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def apply_record(table, op, args):
+    """Replay one journal record against a RowTable"""
+    if op == "append":
+        table.append(args[0])
+    elif op == "insert":
+        table.insert(args[0], args[1])
+    elif op == "update":
+        table.update(args[0], dict(args[1]))
+    elif op == "remove":
+        table.remove(args[0])
+    elif op == "clear":
+        table.clear()
+    elif op == "sort":
+        table.sort_by(args[0], ascending=args[1])
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
@@ -0,0 +1,194 @@
+# ndjson.py - Newline-delimited, table-tagged inventory files
+#
+# Instead of one nested JSON document, the inventory is written one record
+# per line:
+#
+#   {"format": "clinic-inventory-ndjson", "version": 1, "next_ids": {...}, "journal_seq": 0, "sections": {...}}
+#   {"table": "medicines", "row": [1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]}
+#   {"table": "equipment", "row": [1, "BP Monitor", 4, "In use"]}
+#
+# The first line is a header. Its "sections" give the byte range of each
+# table's lines (counted from the end of the header), so a tool can seek
+# straight to the medicines or the equipment without reading the other one.
+# The ranges are only trusted while the file still has the size recorded in
+# the header; otherwise the whole file is scanned.
+#
+# NdjsonReader parses one line at a time and yields rows as it goes. A
+# corrupt line only loses that record: it is skipped, copied to a quarantine
+# file, or reported, depending on `errors`.
+#
+# ClinicInventory uses this format for files ending in .ndjson (or with
+# file_format="ndjson").
+import argparse
+import json
+import os
+import sys
+
+from .storage import TABLE_FIELDS
+
+FORMAT = "clinic-inventory-ndjson"
+VERSION = 1
+
+
+def quarantine_path_for(path):
+    """Default file receiving the corrupt lines of path"""
+    return os.path.splitext(path)[0] + ".quarantine.ndjson"
+
+
+def dumps_ndjson(tables, next_ids=None, journal_seq=0):
+    """Serialize {name: rows} to NDJSON text: a header line, then one line per row, table by table"""
+    lines = []
+    sections = {}
+    offset = 0
+    for name, rows in tables.items():
+        start = offset
+        for row in rows:
+            line = json.dumps({"table": name, "row": row}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            lines.append(line)
+            offset += len(line.encode("utf-8"))
+        sections[name] = [start, offset]
+    header = json.dumps({
+        "format": FORMAT,
+        "version": VERSION,
+        "next_ids": next_ids or {},
+        "journal_seq": journal_seq,
+        "sections": sections,
+        "size": offset,
+    }, ensure_ascii=False)
+    return header + "\n" + "".join(lines)
+
+
+def _check_record(record, tables):
+    # Returns (table, row) or raises ValueError describing what is wrong
+    if not isinstance(record, dict) or "table" not in record or "row" not in record:
+        raise ValueError("not a table record")
+    name, row = record["table"], record["row"]
+    if name not in TABLE_FIELDS:
+        raise ValueError(f"unknown table {name!r}")
+    if not isinstance(row, list) or len(row) != len(TABLE_FIELDS[name]):
+        raise ValueError(f"{name} row must have {len(TABLE_FIELDS[name])} fields")
+    if not isinstance(row[0], int) or isinstance(row[0], bool):
+        raise ValueError(f"{name} row ID must be an integer")
+    if tables is not None and name not in tables:
+        raise LookupError(name)  # valid, just not requested
+    return name, row
+
+
+class NdjsonReader:
+    """Streaming reader for an NDJSON inventory file.
+
+    errors: "skip" (count and warn), "quarantine" (also append the raw line
+    to quarantine_path) or "raise" (ValueError with the byte offset).
+    """
+
+    def __init__(self, path, errors="skip", quarantine_path=None):
+        if errors not in ("skip", "quarantine", "raise"):
+            raise ValueError(f"Unknown errors mode: {errors}")
+        self.path = path
+        self.errors = errors
+        self.quarantine_path = quarantine_path or quarantine_path_for(path)
+        self.bad_lines = 0
+        self.header = {}
+        self._body_start = 0  # byte offset of the first record line
+        with open(path, "rb") as f:
+            first = f.readline()
+            try:
+                header = json.loads(first)
+            except ValueError:
+                header = None
+            if isinstance(header, dict) and header.get("format") == FORMAT:
+                self.header = header
+                self._body_start = len(first)
+                if header.get("size") != os.fstat(f.fileno()).st_size - len(first):
+                    header.pop("sections", None)  # lines were added or cut: byte ranges are off
+            # Otherwise there is no usable header: every line is read as a record
+
+    @property
+    def next_ids(self):
+        return self.header.get("next_ids", {})
+
+    @property
+    def journal_seq(self):
+        return self.header.get("journal_seq", 0)
+
+    def records(self, tables=None):
+        """Yield (table, row) for every good record, optionally only for the named tables.
+
+        Requested tables are read through the header's byte ranges when it has
+        them, so the other sections are never read.
+        """
+        wanted = None if tables is None else set(tables)
+        sections = self.header.get("sections")
+        with open(self.path, "rb") as f:
+            if wanted is not None and isinstance(sections, dict) and wanted <= set(sections):
+                for name in tables:
+                    start, end = sections[name]
+                    yield from self._read(f, self._body_start + start, self._body_start + end, {name})
+            else:
+                yield from self._read(f, self._body_start, None, wanted)
+
+    def rows(self, table):
+        """Yield the rows of one table"""
+        for _name, row in self.records([table]):
+            yield row
+
+    def _read(self, f, start, end, wanted):
+        f.seek(start)
+        offset = start
+        while end is None or offset < end:
+            line = f.readline()
+            if not line:
+                break
+            line_offset = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                yield _check_record(json.loads(line), wanted)
+            except LookupError:
+                continue
+            except ValueError as e:  # includes JSON and UTF-8 decoding errors
+                self._bad_line(line, line_offset, e)
+
+    def _bad_line(self, line, offset, error):
+        self.bad_lines += 1
+        if self.errors == "raise":
+            raise ValueError(f"{self.path}: corrupt record at byte {offset}: {error}")
+        print(f"Warning: skipping corrupt record at byte {offset} of {self.path}: {error}")
+        if self.errors == "quarantine":
+            entry = {"source": self.path, "offset": offset, "error": str(error),
+                     "line": line.decode("utf-8", errors="replace").rstrip("\n")}
+            with open(self.quarantine_path, "a", encoding="utf-8") as q:
+                q.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read or convert NDJSON clinic inventory files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rows = commands.add_parser("rows", help="print the rows of one table, one JSON array per line")
+    rows.add_argument("path")
+    rows.add_argument("--table", choices=sorted(TABLE_FIELDS), required=True)
+    convert = commands.add_parser("convert", help="rewrite a JSON inventory as NDJSON")
+    convert.add_argument("json_file")
+    convert.add_argument("ndjson_file")
+    args = parser.parse_args(argv)
+    if args.command == "rows":
+        for row in NdjsonReader(args.path).rows(args.table):
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        from .core import ClinicInventory  # core imports this module
+        inventory = ClinicInventory(args.json_file)
+        try:
+            target = ClinicInventory(args.ndjson_file, autoload=False, file_format="ndjson")
+            for name, table in inventory.tables.items():
+                target.tables[name].load([list(row) for row in table], table.next_id)
+            if not target.save_to_json():
+                sys.exit(1)
+            print(f"Wrote {len(inventory.medicine_table)} medicines and "
+                  f"{len(inventory.equipment_table)} equipment to {args.ndjson_file}")
+        finally:
+            inventory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# query.py - Composable multi-predicate queries with index-aware planning
+#
+# A query is a list of predicates that must all hold (AND):
+#
+#   inv.query_medicines(Contains("name", "mg"), ExpiresWithin(60), AtMost("total_qty", 20))
+#
+# The planner asks every predicate how many rows it would select through an
+# index on its field (range counts, posting list sizes, name buckets), drives
+# the query from the most selective one, and checks the remaining predicates
+# on those candidate rows in a single pass. With no usable index the table is
+# scanned once. explain() runs the query and reports the plan, the estimates
+# and how many rows were examined.
+from datetime import date, timedelta
+
+
+class Predicate:
+    """One condition on a field. Subclasses implement matches() and, where an
+    index kind fits, estimate()/candidates() on that index."""
+
+    index_kind = None  # "sorted", "grams" or "names"
+
+    def __init__(self, field):
+        self.field = field
+
+    def matches(self, value, key):
+        raise NotImplementedError
+
+    def estimate(self, index, key):
+        raise NotImplementedError
+
+    def candidates(self, index, key):
+        raise NotImplementedError
+
+
+class Contains(Predicate):
+    """Text field contains a substring (case-insensitive)"""
+
+    index_kind = "grams"
+
+    def __init__(self, field, text):
+        super().__init__(field)
+        self.text = text
+        self._folded = text.casefold()
+
+    def matches(self, value, key):
+        return self._folded in (value or "").casefold()
+
+    def estimate(self, index, key):
+        return index.estimate(self.text)
+
+    def candidates(self, index, key):
+        return index.search(self.text)
+
+    def __str__(self):
+        return f"{self.field} CONTAINS {self.text!r}"
+
+
+class Equals(Predicate):
+    """Field equals a value (text compared case-insensitively).
+
+    Text values use the name index of the field, other values a single-key
+    range on its sorted index.
+    """
+
+    def __init__(self, field, value):
+        super().__init__(field)
+        self.value = value
+        self.index_kind = "names" if isinstance(value, str) else "sorted"
+        self._folded = value.casefold() if isinstance(value, str) else value
+
+    def matches(self, value, key):
+        if isinstance(value, str) and isinstance(self.value, str):
+            return value.casefold() == self._folded
+        return value == self.value
+
+    def estimate(self, index, key):
+        if self.index_kind == "names":
+            return index.count(self.value)
+        value = key(self.value)
+        return index.count_range(value, value)
+
+    def candidates(self, index, key):
+        if self.index_kind == "names":
+            return index.lookup(self.value)
+        value = key(self.value)
+        return index.range(value, value)
+
+    def __str__(self):
+        return f"{self.field} = {self.value!r}"
+
+
+class Between(Predicate):
+    """low <= field <= high (either bound may be None).
+
+    Bounds go through the field's key function, e.g. expiry strings become
+    day ordinals, so they compare the same way the sorted index does.
+    """
+
+    index_kind = "sorted"
+
+    def __init__(self, field, low=None, high=None):
+        super().__init__(field)
+        self.low = low
+        self.high = high
+
+    def _bounds(self, key):
+        low = self.low if self.low is None else key(self.low)
+        high = self.high if self.high is None else key(self.high)
+        return low, high
+
+    def matches(self, value, key):
+        try:
+            value = key(value)
+            low, high = self._bounds(key)
+            return (low is None or low <= value) and (high is None or value <= high)
+        except (TypeError, ValueError):
+            return False
+
+    def estimate(self, index, key):
+        return index.count_range(*self._bounds(key))
+
+    def candidates(self, index, key):
+        return index.range(*self._bounds(key))
+
+    def __str__(self):
+        if self.low is None:
+            return f"{self.field} <= {self.high!r}"
+        if self.high is None:
+            return f"{self.field} >= {self.low!r}"
+        return f"{self.field} BETWEEN {self.low!r} AND {self.high!r}"
+
+
+class AtMost(Between):
+    """field <= high"""
+
+    def __init__(self, field, high):
+        super().__init__(field, None, high)
+
+
+class AtLeast(Between):
+    """field >= low"""
+
+    def __init__(self, field, low):
+        super().__init__(field, low, None)
+
+
+class ExpiresWithin(Between):
+    """Expiry on or before today + days (already expired rows included)"""
+
+    def __init__(self, days, field="expiry", today=None):
+        self.days = days
+        cutoff = (today or date.today()) + timedelta(days=days)
+        super().__init__(field, None, cutoff.isoformat())
+
+    def __str__(self):
+        return f"{self.field} WITHIN {self.days} DAYS (<= {self.high})"
+
+
+def _identity(value):
+    return value
+
+
+class QueryPlan:
+    """What a query did: driving access path, estimates and row counts"""
+
+    def __init__(self, table_name, predicates):
+        self.table_name = table_name
+        self.predicates = list(predicates)
+        self.estimates = []       # (predicate, estimated rows or None when unindexed)
+        self.driver = None        # predicate answered from an index, or None for a scan
+        self.rows_examined = 0
+        self.rows_matched = 0
+
+    def __str__(self):
+        where = " AND ".join(str(p) for p in self.predicates) or "TRUE"
+        lines = [f"QUERY {self.table_name} WHERE {where}"]
+        for predicate, estimate in self.estimates:
+            lines.append(f"  estimate {predicate}: " + ("no index" if estimate is None else f"~{estimate} rows"))
+        if self.driver is None:
+            lines.append("  1. full scan")
+        else:
+            lines.append(f"  1. {self.driver.index_kind} index on {self.driver.field}: {self.driver}")
+        rest = [p for p in self.predicates if p is not self.driver]
+        if rest:
+            lines.append("  2. filter " + " AND ".join(str(p) for p in rest))
+        lines.append(f"  rows examined: {self.rows_examined}, matched: {self.rows_matched}")
+        return "\n".join(lines)
+
+
+class QueryEngine:
+    """Plans and runs AND-queries against one table.
+
+    columns maps field name -> column number, keys maps field name -> a
+    function normalizing values for comparison (e.g. expiry -> ordinal), and
+    indexes maps (field, index kind) -> index object attached to the table.
+    """
+
+    def __init__(self, name, table, columns, indexes, keys=None):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.indexes = indexes
+        self.keys = keys or {}
+
+    def plan(self, predicates):
+        plan = QueryPlan(self.name, predicates)
+        for predicate in predicates:
+            if predicate.field not in self.columns:
+                raise KeyError(f"Unknown field for {self.name}: {predicate.field}")
+            index = self.indexes.get((predicate.field, predicate.index_kind))
+            estimate = None
+            if index is not None:
+                try:
+                    estimate = predicate.estimate(index, self.keys.get(predicate.field, _identity))
+                except (TypeError, ValueError):
+                    estimate = None  # e.g. an unparsable date bound: let the filter reject rows
+            plan.estimates.append((predicate, estimate))
+        indexed = [(estimate, i) for i, (_p, estimate) in enumerate(plan.estimates) if estimate is not None]
+        if indexed:
+            plan.driver = predicates[min(indexed)[1]]
+        return plan
+
+    def run(self, predicates, plan=None):
+        """IDs of rows matching every predicate, in table order"""
+        plan = plan or self.plan(predicates)
+        table = self.table
+        checks = [(self.columns[p.field], self.keys.get(p.field, _identity), p)
+                  for p in predicates if p is not plan.driver]
+        if plan.driver is None:
+            rows = iter(table)
+        else:
+            driver = plan.driver
+            ids = driver.candidates(self.indexes[(driver.field, driver.index_kind)],
+                                    self.keys.get(driver.field, _identity))
+            rows = (table.get(row_id) for row_id in table.in_order(ids))
+        id_col = table.id_col
+        matched = []
+        examined = 0
+        for row in rows:
+            examined += 1
+            if all(predicate.matches(row[col], key) for col, key, predicate in checks):
+                matched.append(row[id_col])
+        plan.rows_examined = examined
+        plan.rows_matched = len(matched)
+        return matched
+
+
+_OPERATORS = ("<=", ">=", "~", "=")
+
+
+def parse_conditions(text, numeric_fields=()):
+    """Parse "name~mg; expires<=60; total_qty<=20" into predicates.
+
+    Operators: ~ (contains), = (equals), <= and >=. The pseudo-field
+    "expires" takes a number of days. Raises ValueError on bad input.
+    """
+    predicates = []
+    for clause in text.split(";"):
+        clause = clause.strip()
+        if not clause:
+            continue
+        for op in _OPERATORS:
+            field, sep, value = clause.partition(op)
+            if sep:
+                break
+        else:
+            raise ValueError(f"No operator in condition: {clause!r}")
+        field, value = field.strip(), value.strip()
+        if field == "expires":
+            if op != "<=":
+                raise ValueError("Use expires<=DAYS")
+            predicates.append(ExpiresWithin(int(value)))
+            continue
+        if field in numeric_fields:
+            value = int(value)
+        if op == "~":
+            predicates.append(Contains(field, value))
+        elif op == "=":
+            predicates.append(Equals(field, value))
+        elif op == "<=":
+            predicates.append(AtMost(field, value))
+        else:
+            predicates.append(AtLeast(field, value))
+    return predicates
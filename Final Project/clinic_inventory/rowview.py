@@ -0,0 +1,53 @@
+# rowview.py - Read-only, zero-copy views over table rows
+#
+# Query functions called with lazy=True yield these views instead of building
+# a new dictionary per row. A view only holds a reference to the stored row,
+# supports the same record["name"] access as the dictionaries returned
+# elsewhere, and converts to a real dict on demand with to_dict().
+#
+# On a RowTable the view reads the live row, so it reflects later updates to
+# that record; call to_dict() to keep a snapshot.
+from collections.abc import Mapping
+
+
+class RowView(Mapping):
+    """Read-only mapping from field name to a column of one row"""
+
+    __slots__ = ("_row",)
+    FIELDS = ()    # field names in column order
+    _COLUMNS = {}  # field name -> column number
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, field):
+        return self._row[self._COLUMNS[field]]
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_tuple(self):
+        """Row values in column order"""
+        return tuple(self._row)
+
+    def to_dict(self):
+        """Plain dictionary copy of the row"""
+        return dict(zip(self.FIELDS, self._row))
+
+
+class MedicineView(RowView):
+    __slots__ = ()
+    FIELDS = ("id", "name", "packs", "items_per_pack", "total_qty", "expiry")
+    _COLUMNS = {field: col for col, field in enumerate(FIELDS)}
+
+
+class EquipmentView(RowView):
+    __slots__ = ()
+    FIELDS = ("id", "name", "stock", "status")
+    _COLUMNS = {field: col for col, field in enumerate(FIELDS)}
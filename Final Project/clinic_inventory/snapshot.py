@@ -0,0 +1,236 @@
+# snapshot.py - Binary, memory-mapped inventory snapshots for fast startup
+#
+# A snapshot holds every table column by column:
+#
+#   "int"  columns -> fixed-width int64 values (byte order recorded in the header)
+#   "text" columns -> uint32 codes into the column's string table, which is
+#                     stored once as uint32 byte offsets plus a UTF-8 blob
+#                     (strings separated by NUL)
+#
+# A small JSON header (after the magic bytes) lists the tables, their row
+# counts, ID sequences and the byte offset of every section; sections are
+# 8-byte aligned. Snapshot() memory-maps the file and decodes nothing up
+# front: a row or a string is decoded the first time it is read, and rows()
+# decodes a whole table column by column with C-level list conversions
+# instead of parsing text.
+#
+# ClinicInventory writes one next to its JSON file on close() (see
+# binary_snapshot=True) and loads it on the next start instead of the JSON
+# file, as long as the JSON file is unchanged since the snapshot was taken.
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from .writer import atomic_write_bytes
+
+MAGIC = b"CINVSNAP"
+VERSION = 1
+
+# Snapshot column kinds per table (expiry is kept as text so any stored value round-trips)
+SNAPSHOT_SCHEMAS = {
+    "medicines": ("int", "text", "int", "int", "int", "text"),
+    "equipment": ("int", "text", "int", "text"),
+}
+
+
+def snapshot_path_for(json_file):
+    """Default snapshot file name next to the JSON file"""
+    return os.path.splitext(json_file)[0] + ".snap"
+
+
+def source_stamp(path):
+    """(mtime_ns, size) of a file, used to tell whether a snapshot is still current"""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_snapshot(path, tables, extra=None):
+    """Write tables ({name: table}) to a binary snapshot file atomically.
+
+    extra is stored in the header as-is (e.g. the JSON stamp and journal
+    sequence). Raises ValueError if a value does not fit its column kind.
+    """
+    sections = []   # bytes in file order
+    directory = {}
+    offset = 0
+
+    def add_section(data):
+        nonlocal offset
+        start = offset
+        sections.append(data)
+        padding = _align(len(data)) - len(data)
+        if padding:
+            sections.append(b"\0" * padding)
+        offset += len(data) + padding
+        return start
+
+    for name, table in tables.items():
+        schema = SNAPSHOT_SCHEMAS[name]
+        columns = list(zip(*table)) or [()] * len(schema)
+        entries = []
+        for kind, values in zip(schema, columns):
+            if kind == "int":
+                try:
+                    data = array("q", values).tobytes()
+                except (TypeError, OverflowError) as e:
+                    raise ValueError(f"{name}: non-integer value in an int column ({e})")
+                entries.append({"kind": kind, "values": add_section(data)})
+                continue
+            codes_of = {}
+            codes = array("I", [codes_of.setdefault(value, len(codes_of)) for value in values])
+            strings = list(codes_of)
+            if any(not isinstance(text, str) or "\0" in text for text in strings):
+                raise ValueError(f"{name}: text column holds a non-string or NUL character")
+            blob = "\0".join(strings).encode("utf-8")
+            starts = array("I")
+            position = 0
+            for text in strings:
+                starts.append(position)
+                position += len(text.encode("utf-8")) + 1
+            starts.append(position)
+            entries.append({
+                "kind": kind,
+                "values": add_section(codes.tobytes()),
+                "strings": len(strings),
+                "offsets": add_section(starts.tobytes()),
+                "blob": add_section(blob),
+                "blob_size": len(blob),
+            })
+        directory[name] = {"rows": len(table), "next_id": table.next_id, "columns": entries}
+
+    header = json.dumps({
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "tables": directory,
+        "extra": extra or {},
+    }).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(4, "little") + header
+    padding = b"\0" * (_align(len(prefix)) - len(prefix))  # sections start 8-byte aligned
+    atomic_write_bytes(path, prefix + padding + b"".join(sections))
+
+
+class SnapshotTable:
+    """Lazily decoded view of one table in a snapshot"""
+
+    def __init__(self, snapshot, info):
+        self._snapshot = snapshot
+        self.rows_count = info["rows"]
+        self.next_id = info["next_id"]
+        self._columns = []    # (kind, values view, offsets view, blob view)
+        self._strings = []    # per column: decoded strings, None until first read
+        for entry in info["columns"]:
+            values = snapshot._view(entry["values"], self.rows_count * (8 if entry["kind"] == "int" else 4),
+                                    "q" if entry["kind"] == "int" else "I")
+            if entry["kind"] == "int":
+                self._columns.append(("int", values, None, None))
+                self._strings.append(None)
+            else:
+                count = entry["strings"]
+                offsets = snapshot._view(entry["offsets"], (count + 1) * 4, "I")
+                blob = snapshot._view(entry["blob"], entry["blob_size"])
+                self._columns.append(("text", values, offsets, blob))
+                self._strings.append([None] * count)
+
+    def __len__(self):
+        return self.rows_count
+
+    def _string(self, col, code):
+        strings = self._strings[col]
+        text = strings[code]
+        if text is None:
+            _kind, _values, offsets, blob = self._columns[col]
+            text = strings[code] = bytes(blob[offsets[code]:offsets[code + 1] - 1]).decode("utf-8")
+        return text
+
+    def row(self, index):
+        """Decode one row (strings are decoded once and cached)"""
+        return [values[index] if kind == "int" else self._string(col, values[index])
+                for col, (kind, values, _offsets, _blob) in enumerate(self._columns)]
+
+    def page(self, start, count):
+        """Rows start..start+count-1, decoding only those rows"""
+        return [self.row(index) for index in range(max(0, start), min(start + count, self.rows_count))]
+
+    def column(self, col):
+        """Decoded values of one column, in row order"""
+        kind, values, _offsets, blob = self._columns[col]
+        if kind == "int":
+            return values.tolist()
+        strings = self._strings[col]
+        if strings and None in strings:
+            strings[:] = bytes(blob).decode("utf-8").split("\0")
+        return [strings[code] for code in values.tolist()]
+
+    def rows(self):
+        """Every row as a list, decoded column by column"""
+        if not self.rows_count:
+            return []
+        return list(map(list, zip(*(self.column(col) for col in range(len(self._columns))))))
+
+
+class Snapshot:
+    """Read-only, memory-mapped snapshot file.
+
+    Use as a context manager (or call close()) to release the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._buffer = memoryview(self._map)
+        self._views = [self._buffer]
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an inventory snapshot")
+            header_size = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 4], "little")
+            header_end = len(MAGIC) + 4 + header_size
+            self.header = json.loads(self._map[len(MAGIC) + 4:header_end].decode("utf-8"))
+            if self.header["version"] != VERSION or self.header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} was written by an incompatible version or platform")
+            self._data_start = _align(header_end)
+            self.tables = {name: SnapshotTable(self, info) for name, info in self.header["tables"].items()}
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def extra(self):
+        return self.header.get("extra", {})
+
+    def _view(self, offset, size, fmt=None):
+        start = self._data_start + offset
+        if start + size > len(self._buffer):
+            raise ValueError(f"{self.path} is truncated")
+        view = self._buffer[start:start + size]
+        self._views.append(view)
+        if fmt is not None:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def table(self, name):
+        return self.tables[name]
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,308 @@
+# storage.py - Pluggable persistence backends and the SQLite implementation
+#
+# By default the engine persists to one JSON file (see ClinicInventory). A
+# backend passed as ClinicInventory(backend=...) replaces that: the engine
+# loads its tables from the backend on startup and hands it every committed
+# batch of change records, the same (op, table, *args) records the journal
+# writes (see journal.py), so each mutation becomes a row-level write instead
+# of a whole-file rewrite.
+#
+# SQLiteBackend stores each table in an SQLite database (WAL mode) with
+# indexes on id, name, expiry and quantity, and can answer page, range and
+# name queries straight from the file without loading the inventory:
+#
+#   python -m clinic_inventory.storage clinic_inventory.json clinic_inventory.db
+#
+# migrates an existing JSON inventory (and its journal) into a database.
+import argparse
+import os
+import sqlite3
+import threading
+
+from .journal import journal_path_for
+from .rowview import EquipmentView, MedicineView
+
+DB_FILE = "clinic_inventory.db"
+
+# Column names per table, in row order (row[0] is always the record ID)
+TABLE_FIELDS = {
+    "medicines": MedicineView.FIELDS,
+    "equipment": EquipmentView.FIELDS,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS medicines (
+    id INTEGER PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    packs INTEGER,
+    items_per_pack INTEGER,
+    total_qty INTEGER,
+    expiry TEXT
+);
+CREATE INDEX IF NOT EXISTS medicines_pos ON medicines (pos);
+CREATE INDEX IF NOT EXISTS medicines_name ON medicines (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS medicines_expiry ON medicines (expiry);
+CREATE INDEX IF NOT EXISTS medicines_total_qty ON medicines (total_qty);
+CREATE TABLE IF NOT EXISTS equipment (
+    id INTEGER PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    stock INTEGER,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS equipment_pos ON equipment (pos);
+CREATE INDEX IF NOT EXISTS equipment_name ON equipment (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS equipment_stock ON equipment (stock);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+
+class StorageBackend:
+    """Interface between the engine and a persistent store.
+
+    attach(tables) hands over the engine's tables ({name: table}) when the
+    engine is created. load(tables) fills them and returns True if stored
+    data was found. write_changes(changes) persists one committed list of
+    (op, table, *args) records atomically, or raises and writes nothing.
+    close() releases the store.
+    """
+
+    def attach(self, tables):
+        pass
+
+    def load(self, tables):
+        raise NotImplementedError
+
+    def write_changes(self, changes):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    """Row-level persistence in an SQLite database.
+
+    Rows keep their positional order in a pos column. Appends take the next
+    position; inserts and sorts renumber the table from the engine's
+    in-memory order once per committed batch.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()  # the connection is shared with worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # durable at each checkpoint, safe in WAL mode
+        self._conn.executescript(_SCHEMA)
+        self._tables = {}    # engine tables, used to renumber positions
+        self._next_pos = {name: self._max_pos(name) + 1 for name in TABLE_FIELDS}
+
+    def _max_pos(self, name):
+        return self._conn.execute(f"SELECT COALESCE(MAX(pos), -1) FROM {name}").fetchone()[0]
+
+    @staticmethod
+    def _check_table(name):
+        if name not in TABLE_FIELDS:
+            raise KeyError(f"Unknown table: {name}")
+        return TABLE_FIELDS[name]
+
+    # ---------- engine interface ----------
+    def attach(self, tables):
+        """Remember the engine tables; renumbering and ID sequences are read from them"""
+        self._tables = tables
+
+    def load(self, tables):
+        """Fill the engine tables in stored order and restore their ID sequences"""
+        self.attach(tables)
+        with self._lock:
+            next_ids = dict(self._conn.execute("SELECT key, value FROM meta WHERE key LIKE 'next_id:%'"))
+            found = bool(next_ids)
+            for name, table in tables.items():
+                fields = ", ".join(self._check_table(name))
+                rows = [list(row) for row in self._conn.execute(f"SELECT {fields} FROM {name} ORDER BY pos")]
+                found = found or bool(rows)
+                table.load(rows, next_ids.get(f"next_id:{name}", 1))
+        return found
+
+    def write_changes(self, changes):
+        """Apply change records as row-level writes in a single transaction"""
+        renumber = set()
+        with self._lock, self._conn:
+            for op, name, *args in changes:
+                fields = self._check_table(name)
+                if op == "append":
+                    self._insert_row(name, fields, args[0], self._next_pos[name])
+                    self._next_pos[name] += 1
+                elif op == "insert":
+                    self._insert_row(name, fields, args[1], -1)  # real position set by the renumber
+                    renumber.add(name)
+                elif op == "update":
+                    pairs = [(fields[col], value) for col, value in args[1]]
+                    assignments = ", ".join(f"{field} = ?" for field, _value in pairs)
+                    self._conn.execute(f"UPDATE {name} SET {assignments} WHERE id = ?",
+                                       [value for _field, value in pairs] + [args[0]])
+                elif op == "remove":
+                    self._conn.execute(f"DELETE FROM {name} WHERE id = ?", (args[0],))
+                elif op == "clear":
+                    self._conn.execute(f"DELETE FROM {name}")
+                    self._next_pos[name] = 0
+                    renumber.discard(name)
+                elif op == "sort":
+                    renumber.add(name)
+                else:
+                    raise ValueError(f"Unknown change operation: {op}")
+            for name in renumber:
+                self._renumber(name)
+            self._save_next_ids()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- helpers ----------
+    def _insert_row(self, name, fields, row, pos):
+        columns = ", ".join(("pos",) + fields)
+        marks = ", ".join("?" * (len(fields) + 1))
+        self._conn.execute(f"INSERT OR REPLACE INTO {name} ({columns}) VALUES ({marks})", [pos, *row])
+
+    def _renumber(self, name):
+        table = self._tables[name]
+        id_col = table.id_col
+        self._conn.executemany(f"UPDATE {name} SET pos = ? WHERE id = ?",
+                               ((pos, row[id_col]) for pos, row in enumerate(table)))
+        self._next_pos[name] = len(table)
+
+    def _save_next_ids(self):
+        self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               ((f"next_id:{name}", table.next_id) for name, table in self._tables.items()))
+
+    def replace_all(self, tables):
+        """Overwrite the database with the full contents of tables, in one transaction"""
+        self._tables = tables
+        with self._lock, self._conn:
+            for name, table in tables.items():
+                fields = self._check_table(name)
+                self._conn.execute(f"DELETE FROM {name}")
+                columns = ", ".join(("pos",) + fields)
+                marks = ", ".join("?" * (len(fields) + 1))
+                self._conn.executemany(f"INSERT INTO {name} ({columns}) VALUES ({marks})",
+                                       ([pos, *row] for pos, row in enumerate(table)))
+                self._next_pos[name] = len(table)
+            self._save_next_ids()
+
+    # ---------- queries straight from the file ----------
+    def count(self, name):
+        """Number of stored rows in a table"""
+        self._check_table(name)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+    def _order(self, fields, order_by, ascending):
+        if order_by is None:
+            column = "pos"
+        elif order_by in fields:
+            column = f"{order_by} COLLATE NOCASE" if order_by in ("name", "status") else order_by
+        else:
+            raise KeyError(f"Unknown field: {order_by}")
+        return f"{column} {'ASC' if ascending else 'DESC'}, id"
+
+    def fetch_page(self, name, start, count, order_by=None, ascending=True):
+        """Rows start..start+count-1 as tuples, in stored order or ordered by a field"""
+        fields = self._check_table(name)
+        sql = f"SELECT {', '.join(fields)} FROM {name} ORDER BY {self._order(fields, order_by, ascending)} LIMIT ? OFFSET ?"
+        with self._lock:
+            return self._conn.execute(sql, (count, start)).fetchall()
+
+    def fetch_range(self, name, field, low=None, high=None):
+        """Rows with low <= field <= high (None = unbounded), ordered by field via its index"""
+        fields = self._check_table(name)
+        if field not in fields:
+            raise KeyError(f"Unknown field: {field}")
+        conditions, params = [], []
+        if low is not None:
+            conditions.append(f"{field} >= ?")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"{field} <= ?")
+            params.append(high)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {', '.join(fields)} FROM {name} {where} ORDER BY {field}, id"
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def fetch_by_name(self, name, text, prefix=False):
+        """Rows whose name equals text, or starts with it when prefix=True (case-insensitive)"""
+        fields = self._check_table(name)
+        if prefix:
+            # LIKE is case-insensitive for ASCII and can use the NOCASE name index
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql = f"SELECT {', '.join(fields)} FROM {name} WHERE name LIKE ? ESCAPE '\\' ORDER BY pos"
+            params = (escaped + "%",)
+        else:
+            sql = f"SELECT {', '.join(fields)} FROM {name} WHERE name = ? COLLATE NOCASE ORDER BY pos"
+            params = (text,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+def migrate_json_to_sqlite(json_file=None, db_file=DB_FILE, overwrite=False):
+    """One-shot copy of a JSON inventory (plus its journal) into an SQLite database.
+
+    Returns (medicines, equipment) row counts. Refuses to touch a database
+    that already holds rows unless overwrite=True. Raises RuntimeError,
+    without creating the database, if the JSON file cannot be loaded; a
+    database file created by a migration that fails is removed again.
+    """
+    from .core import JSON_FILE, ClinicInventory  # core does not import this module
+
+    json_file = json_file or JSON_FILE
+    if not (os.path.exists(json_file) or os.path.exists(journal_path_for(json_file))):
+        raise FileNotFoundError(json_file)
+    inventory = ClinicInventory(json_file)  # replays and compacts any journaled changes
+    if inventory.load_error is not None:
+        inventory.close()
+        raise RuntimeError(f"{json_file} could not be loaded ({inventory.load_error}); nothing migrated")
+    created = not os.path.exists(db_file)
+    try:
+        backend = SQLiteBackend(db_file)
+        try:
+            if not overwrite and (backend.count("medicines") or backend.count("equipment")):
+                raise ValueError(f"{db_file} already contains data (use overwrite=True)")
+            backend.replace_all(inventory.tables)
+        finally:
+            backend.close()
+    except Exception:
+        if created:
+            _remove_database(db_file)
+        raise
+    finally:
+        inventory.close()
+    return len(inventory.medicine_table), len(inventory.equipment_table)
+
+
+def _remove_database(db_file):
+    # The database file and the WAL files SQLite keeps next to it
+    for path in (db_file, db_file + "-wal", db_file + "-shm"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate a JSON clinic inventory to SQLite")
+    parser.add_argument("json_file", nargs="?", default=None)
+    parser.add_argument("db_file", nargs="?", default=DB_FILE)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args(argv)
+    medicines, equipment = migrate_json_to_sqlite(args.json_file, args.db_file, args.overwrite)
+    print(f"Migrated {medicines} medicines and {equipment} equipment into {args.db_file}")
+
+
+if __name__ == "__main__":
+    main()
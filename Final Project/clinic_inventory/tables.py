@@ -0,0 +1,353 @@
+# tables.py - Ordered row storage with an id -> row hash index
+#
+# Each table keeps its rows in a Python list (the multidimensional array) so
+# positional operations such as insert(), pop() and slicing still work, and a
+# dictionary mapping each record ID to its slot in that list so lookups,
+# updates and deletes by ID never have to walk the array.
+#
+# IDs come from a monotonic per-table sequence: they are never reused or
+# rewritten, so a row's identity is independent of its position.
+
+
+class ChangeRecorder:
+    """Stand-in index that records the calls a table makes, to replay them on
+    an index that was built from a snapshot of the rows (see replay())"""
+
+    def __init__(self, id_col=0):
+        self.id_col = id_col
+        self.events = []   # (method name, copy of the row: rows are updated in place)
+        self.before = {}   # id -> the row as it was before its first change
+
+    def add(self, row):
+        self.events.append(("add", list(row)))
+
+    def discard(self, row):
+        row = list(row)
+        self.events.append(("discard", row))
+        self.before.setdefault(row[self.id_col], row)
+
+    def clear(self):
+        self.events.append(("clear", None))
+
+    def replay(self, index):
+        for name, row in self.events:
+            if name == "clear":
+                index.clear()
+            else:
+                getattr(index, name)(row)
+
+
+class TableBase:
+    """Behaviour shared by every table storage engine.
+
+    Subclasses store the rows (RowTable: list of lists, ColumnarTable in
+    columnar.py: typed arrays) and implement the positional operations.
+    """
+
+    # Compact only once there are at least this many holes
+    MIN_HOLES_TO_COMPACT = 32
+    # update_many() rebuilds the affected indexes instead of patching them
+    # once it touches at least this share of the table
+    REBUILD_FRACTION = 0.1
+
+    def __init__(self, id_col=0, sort_keys=None):
+        self.id_col = id_col
+        self.sort_keys = sort_keys or {}  # sort name -> key function, see sort_by()
+        self._slot_of = {}   # record ID -> storage slot
+        self._holes = 0      # removed rows not yet compacted away
+        self.next_id = 1     # ID sequence: next value to hand out, never goes backwards
+        self.indexes = []    # secondary indexes notified on every change (see indexes.py)
+
+    def add_index(self, index, fill=True):
+        """Attach a secondary index and fill it with the current rows (unless already filled)"""
+        self.indexes.append(index)
+        if fill:
+            self._fill_index(index)
+        return index
+
+    def remove_index(self, index):
+        """Detach a secondary index; it is no longer kept up to date"""
+        self.indexes.remove(index)
+
+    def _fill_index(self, index, rows=None):
+        # Indexes may offer add_many() to build in one pass (e.g. one sort)
+        rows = self if rows is None else rows
+        if hasattr(index, "add_many"):
+            index.add_many(iter(rows))
+        else:
+            for row in rows:
+                index.add(row)
+
+    def _indexes_for(self, changes):
+        # Indexes over one column (index.col, e.g. a name index) only need
+        # refreshing when that column changes
+        return [index for index in self.indexes if getattr(index, "col", None) is None or index.col in changes]
+
+    def extend(self, rows):
+        """Append many rows, then bring each secondary index up to date in one pass"""
+        indexes, self.indexes = self.indexes, []
+        added = []
+        try:
+            for row in rows:
+                self.append(row)
+                added.append(row)
+        finally:
+            self.indexes = indexes
+            for index in indexes:
+                self._fill_index(index, added)
+        return len(added)
+
+    def update_many(self, updates):
+        """Apply many (row_id, {col: value}) updates; returns how many IDs were found.
+
+        When the updates cover a large share of the table, the indexes they
+        affect are detached and rebuilt in one pass at the end; otherwise
+        they are patched, in bulk where the index supports it (_patch_many()).
+        """
+        updates = list(updates)
+        if len(updates) < len(self) * self.REBUILD_FRACTION:
+            return self._patch_many(updates)
+        indexes = self.indexes
+        affected = self._indexes_for(set().union(*(changes for _row_id, changes in updates)))
+        self.indexes = [index for index in indexes if index not in affected]
+        try:
+            return sum(self.update(row_id, changes) is not None for row_id, changes in updates)
+        finally:
+            self.indexes = indexes
+            rows = list(self) if affected else []  # read (or decode) every row once for all indexes
+            for index in affected:
+                index.clear()
+                self._fill_index(index, rows)
+
+    def _patch_many(self, updates):
+        # Indexes with discard_many() (e.g. sorted lists, where each deletion moves
+        # the tail of the list) drop all the old rows in one pass and take the new
+        # ones with add_many(); the others are patched row by row
+        cols = set().union(*(changes for _row_id, changes in updates))
+        bulk = [index for index in self._indexes_for(cols) if hasattr(index, "discard_many")]
+        if not bulk:
+            return sum(self.update(row_id, changes) is not None for row_id, changes in updates)
+        found = [row for row in map(self.get, (row_id for row_id, _changes in updates)) if row is not None]
+        for index in bulk:
+            index.discard_many(found)
+        indexes, self.indexes = self.indexes, [index for index in self.indexes if index not in bulk]
+        try:
+            return sum(self.update(row_id, changes) is not None for row_id, changes in updates)
+        finally:
+            self.indexes = indexes
+            changed = [row for row in map(self.get, {row[self.id_col] for row in found}) if row is not None]
+            for index in bulk:
+                self._fill_index(index, changed)
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, row_id):
+        return row_id in self._slot_of
+
+    # ---------- ID sequence ----------
+    def allocate_id(self):
+        """Issue the next ID from the table's monotonic sequence (O(1))"""
+        row_id = self.next_id
+        self.next_id += 1
+        return row_id
+
+    def _claim_id(self, row_id):
+        if row_id in self._slot_of:
+            raise KeyError(f"Duplicate ID {row_id}")
+        if row_id >= self.next_id:
+            self.next_id = row_id + 1
+
+    def position_of(self, row_id):
+        """Return the positional index of the row with the given ID, or -1"""
+        if row_id not in self._slot_of:
+            return -1
+        self.compact()
+        return self._slot_of[row_id]
+
+    def at(self, index):
+        """Return the row at a positional index, or None if out of range"""
+        if 0 <= index < len(self._slot_of):
+            return self.rows[index]
+        return None
+
+    def in_order(self, ids):
+        """Return the given IDs sorted into positional order"""
+        return sorted(ids, key=self._slot_of.__getitem__)
+
+    def first_in_order(self, ids):
+        """Return the ID among ids that comes first in positional order, or None (O(k))"""
+        return min(ids, key=self._slot_of.__getitem__, default=None)
+
+    def slice(self, start, end):
+        """Return rows[start:end] in positional order"""
+        return self.rows[start:end]
+
+    def sort_by(self, name, ascending=True):
+        """Sort rows using one of the table's named sort keys"""
+        self.sort(self.sort_keys[name], reverse=not ascending)
+
+    def load(self, rows, next_id=1):
+        """Replace the table contents with rows and restore the ID sequence.
+
+        The sequence resumes at next_id or one past the highest stored ID,
+        whichever is larger. Duplicate IDs (from files written before the
+        sequence existed) are re-issued from the sequence; returns them as a
+        list of (old ID, new ID) so the caller can report them.
+        """
+        self.clear()
+        self.next_id = max(next_id, max((row[self.id_col] for row in rows), default=0) + 1)
+        reissued = []
+        # Store every row first, then build each secondary index in one pass
+        indexes, self.indexes = self.indexes, []
+        try:
+            for row in rows:
+                if row[self.id_col] in self._slot_of:
+                    new_id = self.allocate_id()
+                    reissued.append((row[self.id_col], new_id))
+                    row[self.id_col] = new_id
+                self.append(row)
+        finally:
+            self.indexes = indexes
+            stored = list(self) if indexes else []  # read (or decode) every row once for all indexes
+            for index in indexes:
+                self._fill_index(index, stored)
+        return reissued
+
+    def _maybe_compact(self):
+        if self._holes >= self.MIN_HOLES_TO_COMPACT and self._holes * 2 >= len(self._slot_of) + self._holes:
+            self.compact()
+
+
+class RowTable(TableBase):
+    """2D array of rows plus a hash index on the ID column.
+
+    Removing a row leaves a hole (None) in its slot instead of shifting every
+    following row, so delete-by-ID is O(1). Holes are squeezed out in a single
+    pass once they make up half of the array, or before any operation that
+    needs dense positions (insert at index, slicing, sorting).
+    """
+
+    def __init__(self, id_col=0, sort_keys=None):
+        super().__init__(id_col, sort_keys)
+        self._slots = []     # rows in positional order, None marks a removed row
+
+    # ---------- iteration ----------
+    def __iter__(self):
+        """Iterate rows in positional order (skips holes, no copying)"""
+        if self._holes:
+            return (row for row in self._slots if row is not None)
+        return iter(self._slots)
+
+    @property
+    def rows(self):
+        """Dense list of rows in positional order (compacts holes first)"""
+        self.compact()
+        return self._slots
+
+    # ---------- ID index ----------
+    def get(self, row_id):
+        """Return the row with the given ID, or None (O(1))"""
+        slot = self._slot_of.get(row_id)
+        return None if slot is None else self._slots[slot]
+
+    # ---------- mutations ----------
+    def append(self, row):
+        """Add a row at the end of the array (O(1))"""
+        self._claim_id(row[self.id_col])
+        self._slot_of[row[self.id_col]] = len(self._slots)
+        self._slots.append(row)
+        for index in self.indexes:
+            index.add(row)
+
+    def insert(self, index, row):
+        """Insert a row at a positional index, shifting later rows"""
+        self._claim_id(row[self.id_col])
+        self.compact()
+        self._slots.insert(index, row)
+        self._reindex(index)
+        for secondary in self.indexes:
+            secondary.add(row)
+
+    def update(self, row_id, changes):
+        """Apply {column: value} changes to a row and refresh every index.
+
+        Returns the updated row, or None if no row has that ID.
+        """
+        row = self.get(row_id)
+        if row is None:
+            return None
+        indexes = self._indexes_for(changes)
+        for index in indexes:
+            index.discard(row)
+        for col, value in changes.items():
+            row[col] = value
+        for index in indexes:
+            index.add(row)
+        return row
+
+    def remove(self, row_id):
+        """Remove and return the row with the given ID, or None (O(1) amortized)"""
+        slot = self._slot_of.pop(row_id, None)
+        if slot is None:
+            return None
+        row = self._slots[slot]
+        for index in self.indexes:
+            index.discard(row)
+        self._slots[slot] = None
+        self._holes += 1
+        self._trim()
+        self._maybe_compact()
+        return row
+
+    def pop(self):
+        """Remove and return the last row, or None if the table is empty"""
+        self._trim()
+        if not self._slots:
+            return None
+        row = self._slots.pop()
+        del self._slot_of[row[self.id_col]]
+        for index in self.indexes:
+            index.discard(row)
+        return row
+
+    def last(self):
+        """Return the last row without removing it, or None"""
+        self._trim()
+        return self._slots[-1] if self._slots else None
+
+    def sort(self, key, reverse=False):
+        """Sort rows in place and rebuild the position index"""
+        self.compact()
+        self._slots.sort(key=key, reverse=reverse)
+        self._reindex(0)
+
+    def clear(self):
+        self._slots = []
+        self._slot_of = {}
+        self._holes = 0
+        for index in self.indexes:
+            index.clear()
+
+    # ---------- internal helpers ----------
+    def compact(self):
+        """Squeeze out holes left by removals and rebuild the position index"""
+        if not self._holes:
+            return
+        self._slots = [row for row in self._slots if row is not None]
+        self._holes = 0
+        self._reindex(0)
+
+    def _trim(self):
+        # Drop holes at the end of the array so pop()/last() stay O(1)
+        slots = self._slots
+        while slots and slots[-1] is None:
+            slots.pop()
+            self._holes -= 1
+
+    def _reindex(self, start):
+        slot_of = self._slot_of
+        id_col = self.id_col
+        slots = self._slots
+        for i in range(start, len(slots)):
+            slot_of[slots[i][id_col]] = i
@@ -0,0 +1,25 @@
+# conftest.py - Shared fixtures for the inventory engine tests
+import pytest
+
+from clinic_inventory import ClinicInventory
+
+
+@pytest.fixture
+def make_inventory(tmp_path):
+    """Factory for engines backed by files in a temporary directory; closed after the test"""
+    opened = []
+
+    def make(name="inventory.json", **options):
+        inventory = ClinicInventory(str(tmp_path / name), **options)
+        opened.append(inventory)
+        return inventory
+
+    yield make
+    for inventory in opened:
+        inventory.close()
+
+
+@pytest.fixture(params=["rows", "columnar"])
+def storage(request):
+    """Both table layouts, so each engine test runs against RowTable and ColumnarTable"""
+    return request.param
@@ -0,0 +1,73 @@
+# test_alerts.py - Alert rules: cached per record and rolled forward by the daily tick
+import random
+from datetime import date, timedelta
+
+from clinic_inventory import AlertIndex, AlertRule
+
+
+def test_alert_index_follows_changes():
+    index = AlertIndex([AlertRule("empty", lambda row, today: row[1] == 0, tag="red"),
+                        AlertRule("low", lambda row, today: row[1] <= 2)])
+    for row in ([1, 0], [2, 2], [3, 9]):
+        index.add(row)
+    assert index.alerts_of(1) == ("empty", "low")
+    assert index.tag_of(1) == "red"
+    assert index.tag_of(3) is None
+    index.discard([1, 0])
+    index.add([1, 5])
+    assert index.counts() == {"empty": 0, "low": 1}
+
+
+def test_day_roll_matches_a_full_reevaluation(make_inventory, storage):
+    inventory = make_inventory(storage=storage)
+    rng = random.Random(11)
+    day = date(2026, 10, 1)
+    with inventory.batch():
+        for i in range(400):
+            inventory.add_medicine(f"Med {i}", rng.randint(0, 5), 1, rng.randint(0, 30),
+                                   (day + timedelta(days=rng.randint(-20, 80))).isoformat())
+    inventory.roll_statistics_day(day)
+    alerts = inventory.medicine_alerts
+    for step in (1, 1, 5, 30, -10, 2):
+        day += timedelta(days=step)
+        assert inventory.roll_statistics_day(day)
+        rolled = dict(alerts._state), alerts.counts()
+        alerts.set_rules(alerts.rules, inventory.medicine_table)
+        assert (dict(alerts._state), alerts.counts()) == rolled
+    assert not inventory.roll_statistics_day(day)
+
+
+def test_configure_alerts(make_inventory):
+    inventory = make_inventory()
+    row_id = inventory.add_medicine("Paracetamol 500mg", 4, 10, 40, "2099-01-01")["id"]
+    assert inventory.medicine_alert_tag(row_id) is None
+    inventory.configure_alerts(low_stock_qty=50)
+    assert inventory.medicine_alert_tag(row_id) == "low"
+    assert [m["id"] for m in inventory.get_medicines_with_alert("low_stock")] == [row_id]
+
+
+def test_day_roll_and_settings_before_the_indexes_are_built(make_inventory):
+    inventory = make_inventory()
+    rng = random.Random(5)
+    day = date(2026, 10, 1)
+    with inventory.batch():
+        for i in range(200):
+            inventory.add_medicine(f"Med {i}", rng.randint(0, 5), 1, rng.randint(0, 30),
+                                   (day + timedelta(days=rng.randint(-20, 80))).isoformat())
+    reopened = make_inventory()
+    lazy = (reopened.medicine_alerts, reopened.stats_expiring_medicines, reopened.medicine_expiry)
+    assert not any(index.built for index in lazy)
+    day += timedelta(days=20)
+    reopened.roll_statistics_day(day)
+    reopened.configure_alerts(low_stock_qty=10)
+    assert not any(index.built for index in lazy)
+    alerts = reopened.medicine_alerts
+    counts = alerts.counts()
+    medicines = reopened.get_medicines_slice(0, len(reopened.medicine_table))
+    cutoff = (day + timedelta(days=30)).isoformat()
+    assert len(reopened.stats_expiring_medicines) == sum(1 for m in medicines
+                                                         if m["expiry"] <= cutoff)
+    alerts.set_rules(alerts.rules, reopened.medicine_table)
+    assert alerts.counts() == counts
+    assert counts["low_stock"] == sum(1 for m in medicines
+                                      if m["total_qty"] <= 10 or m["packs"] <= 2)
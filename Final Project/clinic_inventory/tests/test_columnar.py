@@ -0,0 +1,69 @@
+# test_columnar.py - ColumnarTable round-trips values exactly like RowTable
+import pytest
+
+from clinic_inventory import ColumnarTable, RowTable
+from clinic_inventory.core import MEDICINE_SCHEMA, MEDICINE_SORT_KEYS
+
+ROWS = [
+    [1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"],
+    [2, "Amoxicillin", 5, 12, 60, "2027-1-5"],       # not zero padded
+    [3, "Cetirizine", 0, 10, 0, "31/12/2026"],        # not ISO at all
+    [4, "Ibuprofen", 3, 10, 30, "2026-02-30"],        # no such day
+    [5, "Vitamin C", 7, 30, 210, ""],
+]
+
+
+@pytest.fixture
+def table():
+    table = ColumnarTable(MEDICINE_SCHEMA, sort_keys=MEDICINE_SORT_KEYS)
+    table.load([list(row) for row in ROWS])
+    return table
+
+
+def test_round_trip_keeps_every_value(table):
+    assert table.rows == ROWS
+    assert [table.get(row[0]) for row in ROWS] == ROWS
+
+
+def test_non_iso_expiry_survives_update(table):
+    table.update(2, {5: "2028-3-7"})
+    assert table.get(2)[5] == "2028-3-7"
+    table.update(2, {5: "2028-03-07"})
+    assert table.get(2)[5] == "2028-03-07"
+
+
+def test_matches_row_table_after_mutations(table):
+    rows = RowTable(sort_keys=MEDICINE_SORT_KEYS)
+    rows.load([list(row) for row in ROWS])
+    for target in (table, rows):
+        target.remove(3)
+        target.update(1, {2: 19, 4: 190})
+        target.insert(0, [6, "Saline", 1, 1, 1, "2027-1-5"])
+        target.sort_by("expiry")
+    assert table.rows == rows.rows
+
+
+def test_unused_strings_are_released(table):
+    names, expiries = table._dictionaries[1], table._dictionaries[5]
+    assert len(names) == 5 and len(expiries) == 4  # "2026-12-31" is stored as an ordinal
+    table.update(1, {1: "Paracetamol 1g"})
+    table.remove(3)
+    table.pop()
+    with pytest.raises(KeyError):
+        table.append([2, "Duplicate", 1, 1, 1, "not a date"])
+    assert sorted(filter(None, names.strings)) == ["Amoxicillin", "Ibuprofen", "Paracetamol 1g"]
+    assert sorted(filter(None, expiries.strings)) == ["2026-02-30", "2027-1-5"]
+    allocated = len(names.strings)
+    table.append([6, "Saline", 1, 1, 1, "2027-1-5"])
+    assert len(names.strings) == allocated  # a released code is reused
+    assert [row[1] for row in table.rows] == ["Paracetamol 1g", "Amoxicillin", "Ibuprofen", "Saline"]
+    table.clear()
+    assert len(table._dictionaries[1]) == 0
+
+
+def test_engine_save_and_load_round_trip(make_inventory):
+    inventory = make_inventory(storage="columnar")
+    for row in ROWS:
+        inventory.add_medicine(*row[1:])
+    reloaded = make_inventory(storage="columnar")
+    assert [row[1:] for row in reloaded.medicines] == [row[1:] for row in ROWS]
@@ -0,0 +1,193 @@
+# test_core.py - ClinicInventory: CRUD, batches, filters and load failures
+import json
+import random
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from clinic_inventory import medicine_to_dict
+
+
+def _fill(inventory, count=120, seed=5):
+    rng = random.Random(seed)
+    with inventory.batch():
+        for i in range(count):
+            packs = rng.randint(0, 9)
+            inventory.add_medicine(f"Med {i % 17}", packs, 10, packs * 10,
+                                   f"2027-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+        for i in range(count // 4):
+            inventory.add_equipment(f"Device {i % 7}", rng.randint(0, 9), rng.choice(["Working", "Broken"]))
+    inventory.sort_medicines_by_total_qty()  # table order differs from ID order
+
+
+def test_import_does_not_load_tkinter():
+    code = "import sys, clinic_inventory; sys.exit('tkinter' in sys.modules or 'customtkinter' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_add_update_delete(make_inventory, storage):
+    inventory = make_inventory(storage=storage)
+    added = inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    assert added == {"id": 1, "name": "Paracetamol 500mg", "packs": 20, "items_per_pack": 10,
+                     "total_qty": 200, "expiry": "2026-12-31"}
+    inventory.update_medicine(1, "Paracetamol 500mg", 19, 10, 190, "2026-12-31")
+    assert inventory.find_medicine_by_id(1)["total_qty"] == 190
+    inventory.delete_medicine(1)
+    assert inventory.find_medicine_by_id(1) is None
+    assert inventory.add_medicine("Cetirizine", 1, 10, 10, "2027-01-01")["id"] == 2
+
+
+def test_changes_are_saved_to_json(make_inventory):
+    inventory = make_inventory()
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.add_equipment("BP Monitor", 4, "Working")
+    reloaded = make_inventory()
+    assert reloaded.medicines == [[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]]
+    assert reloaded.equipment == [[1, "BP Monitor", 4, "Working"]]
+
+
+def test_duplicate_ids_are_reported(make_inventory, tmp_path):
+    row = [1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]
+    (tmp_path / "inventory.json").write_text(json.dumps({"medicines": [row, row], "equipment": []}), encoding="utf-8")
+    inventory = make_inventory()
+    assert inventory.reissued_ids == {"medicines": [(1, 2)]}
+    assert [m[0] for m in inventory.medicines] == [1, 2]
+
+
+def test_batch_rolls_back_on_error(make_inventory, tmp_path, storage):
+    inventory = make_inventory(storage=storage)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    before = [row[:] for row in inventory.medicines]
+    on_disk = (tmp_path / "inventory.json").read_text(encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with inventory.batch():
+            inventory.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+            inventory.update_medicine(1, "Paracetamol 500mg", 0, 10, 0, "2026-12-31")
+            with inventory.batch():  # nested batches join the outer one
+                inventory.delete_medicine(1)
+            raise RuntimeError("delivery rejected")
+    assert inventory.medicines == before
+    assert inventory.medicine_table.next_id == 2
+    assert inventory.filter_medicines_by_low_stock(0) == []  # indexes were restored too
+    assert (tmp_path / "inventory.json").read_text(encoding="utf-8") == on_disk
+
+
+def test_batch_rollback_undoes_each_change_without_reloading(make_inventory, storage, monkeypatch):
+    inventory = make_inventory(storage=storage)
+    _fill(inventory)
+    inventory.build_indexes()
+    before = [row[:] for row in inventory.medicines], [row[:] for row in inventory.equipment]
+    next_ids = inventory.medicine_table.next_id, inventory.equipment_table.next_id
+    searches = inventory.filter_medicines_by_name_pattern("Med 1"), inventory.get_alert_counts()
+
+    def no_reload(*args, **kwargs):
+        raise AssertionError("rolled back by reloading the table")
+    monkeypatch.setattr(type(inventory.medicine_table), "load", no_reload)
+    rng = random.Random(9)
+    with pytest.raises(RuntimeError):
+        with inventory.batch():
+            for _ in range(60):
+                ids = [row[0] for row in inventory.medicines]
+                action = rng.random()
+                if action < 0.3:
+                    inventory.update_medicine(rng.choice(ids), f"Med {rng.randint(0, 30)}", 1, 10, 10, "2026-01-01")
+                elif action < 0.5:
+                    inventory.delete_medicine(rng.choice(ids))
+                elif action < 0.7:
+                    inventory.add_medicine("New", 1, 1, 1, "2027-01-01")
+                elif action < 0.8:
+                    inventory.insert_medicine_at_position(rng.randint(0, len(ids)), "Inserted", 1, 1, 1, "2027-01-01")
+                elif action < 0.9:
+                    inventory.pop_medicine()
+                else:
+                    inventory.sort_medicines_by_name(ascending=rng.random() < 0.5)
+            inventory.pop_equipment()
+            inventory.clear_all_equipment()
+            inventory.add_equipment("Stretcher", 1, "ok")
+            raise RuntimeError("delivery rejected")
+    assert (inventory.medicines, inventory.equipment) == before
+    assert (inventory.medicine_table.next_id, inventory.equipment_table.next_id) == next_ids
+    assert (inventory.filter_medicines_by_name_pattern("Med 1"), inventory.get_alert_counts()) == searches
+
+
+def test_batch_commits_with_one_journal_write(make_inventory):
+    inventory = make_inventory(journal=True, compact_every=1000)
+    with inventory.batch():
+        for i in range(10):
+            inventory.add_medicine(f"Med {i}", 1, 1, 1, "2027-01-01")
+    assert inventory.journal.pending == 10
+    assert len(inventory.medicines) == 10
+
+
+def test_concurrent_batches_are_serialized(make_inventory):
+    inventory = make_inventory(journal=True, compact_every=10000)
+
+    def work(n):
+        for i in range(50):
+            with inventory.batch():
+                inventory.add_medicine(f"Med {n}-{i}", 1, 1, 1, "2027-01-01")
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(inventory.medicines) == 200
+    assert inventory.journal.pending == 200
+
+
+def test_find_by_name_returns_the_first_row_in_table_order(make_inventory, storage):
+    inventory = make_inventory(storage=storage)
+    for expiry in ("2027-01-01", "2027-02-01", "2027-03-01"):
+        inventory.add_medicine("Cetirizine", 1, 10, 10, expiry)
+    inventory.add_equipment("Scale", 1, "Working")
+    inventory.add_equipment("Scale", 2, "Working")
+    inventory.update_medicine(1, "CETIRIZINE", 2, 10, 20, "2027-01-01")  # re-indexes row 1 last
+    inventory.update_equipment(1, "scale", 3, "Working")
+    assert inventory.find_medicine_by_name("cetirizine")["id"] == 1
+    assert inventory.find_equipment_by_name("SCALE")["id"] == 1
+    inventory.insert_medicine_at_position(1, "Cetirizine", 4, 10, 40, "2027-04-01")  # id 4, second row
+    inventory.insert_equipment_at_position(0, "Scale", 4, "Working")  # id 3, first row
+    assert inventory.remove_medicine_by_name("Cetirizine")["id"] == 1
+    assert inventory.find_medicine_by_name("Cetirizine")["id"] == 4
+    assert inventory.find_equipment_by_name("Scale")["id"] == 3
+
+
+def test_filters_return_table_order(make_inventory, storage):
+    inventory = make_inventory(storage=storage)
+    _fill(inventory)
+    medicines = [medicine_to_dict(row) for row in inventory.medicines]
+    assert inventory.filter_medicines_by_expiry_range("2027-03-01", "2027-06-30") == [
+        m for m in medicines if "2027-03-01" <= m["expiry"] <= "2027-06-30"]
+    assert inventory.filter_medicines_by_low_stock(30) == [m for m in medicines if m["total_qty"] <= 30]
+    lazy = inventory.filter_medicines_by_low_stock(30, lazy=True)
+    assert [view.to_dict() for view in lazy] == inventory.filter_medicines_by_low_stock(30)
+    assert inventory.filter_medicines_by_packs_range(2, 4) == [m for m in medicines if 2 <= m["packs"] <= 4]
+    assert inventory.filter_medicines_by_name_pattern("MED 1") == [m for m in medicines if "med 1" in m["name"].lower()]
+    equipment = inventory.equipment
+    assert [e["id"] for e in inventory.filter_equipment_by_stock_level(5)] == [e[0] for e in equipment if e[2] >= 5]
+    assert [e["id"] for e in inventory.filter_equipment_by_stock_range(2, 6)] == [
+        e[0] for e in equipment if 2 <= e[2] <= 6]
+
+
+def test_sorted_view_tracks_changes(make_inventory):
+    inventory = make_inventory()
+    _fill(inventory)
+    assert inventory.prepare_sorted_view("medicines", "expiry") == 120
+    inventory.add_medicine("Late", 1, 1, 1, "2030-01-01")
+    inventory.delete_medicine(1)
+    view = inventory.view_medicines_sorted("expiry")
+    assert [m["id"] for m in view] == [row[0] for row in sorted(inventory.medicines, key=lambda row: (row[5], row[0]))]
+
+
+def test_unreadable_file_is_never_overwritten(make_inventory, tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text('{"medicines": [[1, "A" 1]]}', encoding="utf-8")
+    inventory = make_inventory()
+    assert inventory.load_error is not None
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    assert not inventory.save_to_json()
+    inventory.close()
+    assert path.read_text(encoding="utf-8") == '{"medicines": [[1, "A" 1]]}'
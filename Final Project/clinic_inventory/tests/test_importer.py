@@ -0,0 +1,108 @@
+# test_importer.py - Delivery files: validation, folding and merging into the inventory
+import json
+
+import pytest
+
+from clinic_inventory import read_delivery
+
+HEADER = "name,packs,items_per_pack,expiry,total_qty\n"
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_read_delivery_normalizes_and_folds(tmp_path):
+    path = _write(tmp_path, "delivery.csv", HEADER
+                  + "Paracetamol 500mg,20,10,2026/12/31,200\n"
+                  + "PARACETAMOL 500MG,5,10,2026-12-31,\n"
+                  + "Amoxicillin,2,12,20270105,24\n")
+    entries, report = read_delivery(path)
+    assert report.ok and report.lines == 3
+    assert list(entries.values()) == [
+        ["Paracetamol 500mg", 25, 10, 250, "2026-12-31", 2],
+        ["Amoxicillin", 2, 12, 24, "2027-01-05", 4],
+    ]
+
+
+def test_bad_lines_are_reported_and_skipped(tmp_path):
+    path = _write(tmp_path, "delivery.csv", HEADER
+                  + "Paracetamol 500mg,20,10,2026-12-31,199\n"   # total does not match
+                  + ",1,1,2026-12-31,1\n"                        # no name
+                  + "Cetirizine,x,10,2026-12-31,\n"              # not a number
+                  + "Ibuprofen,1,10,31/12/2026,\n"               # day first
+                  + "Saline,1\n"                                 # short line
+                  + "Amoxicillin,2,12,2027-01-05,24\n")
+    entries, report = read_delivery(path)
+    assert [line for line, _message in report.errors] == [2, 3, 4, 5, 6]
+    assert [entry[0] for entry in entries.values()] == ["Amoxicillin"]
+
+
+def test_missing_header_field(tmp_path):
+    path = _write(tmp_path, "delivery.csv", "name,packs,expiry\nParacetamol,1,2026-12-31\n")
+    entries, report = read_delivery(path)
+    assert entries == {}
+    assert "items_per_pack" in report.errors[0][1]
+
+
+def test_ndjson_delivery_accepts_inventory_records(tmp_path):
+    lines = [
+        {"format": "clinic-inventory-ndjson"},
+        {"table": "medicines", "row": [7, "Cetirizine", 3, 10, 30, "2027-03-01"]},
+        {"table": "equipment", "row": [1, "BP Monitor", 4, "Working"]},
+        {"name": "Cetirizine", "packs": 1, "items_per_pack": 10, "expiry": "2027-03-01"},
+    ]
+    path = _write(tmp_path, "delivery.ndjson", "\n".join(map(json.dumps, lines)) + "\nnot json\n")
+    entries, report = read_delivery(path)
+    assert list(entries.values()) == [["Cetirizine", 4, 10, 40, "2027-03-01", 2]]
+    assert [line for line, _message in report.errors] == [5]
+
+
+def test_import_merges_with_stored_medicines(make_inventory, tmp_path, storage):
+    inventory = make_inventory(storage=storage)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.add_medicine("Amoxicillin", 1, 12, 12, "2027-01-05")
+    path = _write(tmp_path, "delivery.csv", HEADER
+                  + "paracetamol 500mg,5,10,2026-12-31,50\n"     # merged into ID 1
+                  + "Paracetamol 500mg,5,10,2027-06-30,50\n"     # other expiry: new record
+                  + "Amoxicillin,1,24,2027-01-05,24\n")          # pack size differs from stored
+    report = inventory.import_medicines(path)
+    assert (report.added, report.merged, report.committed) == (1, 1, True)
+    assert [line for line, _message in report.errors] == [4]
+    assert inventory.medicines == [
+        [1, "Paracetamol 500mg", 25, 10, 250, "2026-12-31"],
+        [2, "Amoxicillin", 1, 12, 12, "2027-01-05"],
+        [3, "Paracetamol 500mg", 5, 10, 50, "2027-06-30"],
+    ]
+
+
+def test_import_in_chunks_matches_a_single_pass(make_inventory, tmp_path, monkeypatch):
+    lines = [f"Item {n % 7},{n % 3 + 1},10,2027-0{n % 4 + 1}-15,\n" for n in range(40)]
+    path = _write(tmp_path, "delivery.csv", HEADER + "".join(lines))
+    single = make_inventory("single.json")
+    single.import_medicines(path)
+    chunked = make_inventory("chunked.json")
+    chunked.IMPORT_CHUNK_ROWS = 3
+    saves = []
+    monkeypatch.setattr(chunked, "save_to_json", lambda: saves.append(len(chunked.medicines)))
+    for _ in range(2):  # new records, then every line merged into them
+        report = chunked.import_medicines(path)
+        assert report.committed and report.added + report.merged == len(single.medicines)
+    single.import_medicines(path)
+    assert chunked.medicines == single.medicines
+    assert saves == [len(single.medicines)] * 2  # one whole-file save per import, after the last chunk
+    assert chunked.get_medicines_by_name_search("item 3") == single.get_medicines_by_name_search("item 3")
+    assert chunked.get_medicines_sorted_by_expiry() == single.get_medicines_sorted_by_expiry()
+
+
+@pytest.mark.parametrize("options", [{"strict": True}, {"dry_run": True}])
+def test_strict_and_dry_run_commit_nothing(make_inventory, tmp_path, options):
+    inventory = make_inventory(journal=True)
+    path = _write(tmp_path, "delivery.csv", HEADER + "Cetirizine,1,10,2027-03-01,\nBad,1,1,never,\n")
+    report = inventory.import_medicines(path, **options)
+    assert not report.committed
+    assert report.added == 1
+    assert inventory.medicines == []
+    assert inventory.journal.pending == 0
@@ -0,0 +1,196 @@
+# test_indexes.py - Secondary indexes stay consistent with the table through every mutation
+import random
+
+import pytest
+
+from clinic_inventory import (
+    ColumnarTable,
+    CountIndex,
+    LazyIndex,
+    NameIndex,
+    NgramIndex,
+    PrefixIndex,
+    RowTable,
+    SortedIndex,
+)
+from clinic_inventory.core import MEDICINE_SCHEMA, MEDICINE_SORT_KEYS
+
+NAMES = ["Paracetamol 500mg", "Amoxicillin 250mg", "Cetirizine", "Ibuprofen 200mg", "Salbutamol inhaler"]
+
+
+def _row(rng, row_id):
+    packs = rng.randint(0, 9)
+    return [row_id, rng.choice(NAMES), packs, 10, packs * 10, f"2027-{rng.randint(1, 12):02d}-15"]
+
+
+@pytest.fixture(params=["rows", "columnar"])
+def table(request):
+    if request.param == "rows":
+        return RowTable(sort_keys=MEDICINE_SORT_KEYS)
+    return ColumnarTable(MEDICINE_SCHEMA, sort_keys=MEDICINE_SORT_KEYS)
+
+
+def _new_indexes():
+    return {
+        "names": NameIndex(1),
+        "qty": SortedIndex(lambda row: row[4]),
+        "grams": NgramIndex(1),
+        "prefixes": PrefixIndex(1),
+        "low": CountIndex(lambda row: row[4] <= 20),
+    }
+
+
+def _attach(table):
+    return {name: table.add_index(index) for name, index in _new_indexes().items()}
+
+
+def _assert_consistent(table, indexes):
+    rows = table.rows
+    for name in NAMES:
+        expected = sorted(row[0] for row in rows if row[1] == name)
+        assert sorted(indexes["names"].lookup(name.upper())) == expected
+    assert indexes["qty"].range() == [row[0] for row in sorted(rows, key=lambda row: (row[4], row[0]))]
+    assert indexes["qty"].range(20, 50) == [row[0] for row in sorted(rows, key=lambda row: (row[4], row[0]))
+                                            if 20 <= row[4] <= 50]
+    for pattern in ("mol", "MG", "in", "ceti"):
+        assert indexes["grams"].search(pattern) == {row[0] for row in rows if pattern.casefold() in row[1].casefold()}
+    for prefix in ("sal", "500", "i"):
+        expected = {row[0] for row in rows
+                    if any(word.startswith(prefix) for word in row[1].casefold().split())}
+        assert set(indexes["prefixes"].complete(prefix, limit=len(rows) + 1)) == expected
+    assert len(indexes["low"]) == sum(1 for row in rows if row[4] <= 20)
+
+
+def test_indexes_follow_updates_and_removals(table):
+    rng = random.Random(7)
+    indexes = _attach(table)
+    table.load([_row(rng, row_id) for row_id in range(1, 201)])
+    _assert_consistent(table, indexes)
+    for _ in range(300):
+        ids = [row[0] for row in table.rows]
+        action = rng.random()
+        if action < 0.35 and ids:
+            row_id = rng.choice(ids)
+            packs = rng.randint(0, 9)
+            table.update(row_id, {1: rng.choice(NAMES), 2: packs, 4: packs * 10})
+        elif action < 0.6 and ids:
+            table.remove(rng.choice(ids))
+        elif action < 0.8:
+            table.append(_row(rng, table.allocate_id()))
+        elif action < 0.9:
+            table.insert(rng.randint(0, len(ids)), _row(rng, table.allocate_id()))
+        elif ids:
+            table.pop()
+    _assert_consistent(table, indexes)
+    table.sort_by("name")
+    _assert_consistent(table, indexes)
+
+
+def test_indexes_follow_bulk_updates_and_extend(table):
+    rng = random.Random(11)
+    indexes = _attach(table)
+    table.load([_row(rng, row_id) for row_id in range(1, 201)])
+    for _ in range(10):
+        updates = []
+        for row_id in rng.sample([row[0] for row in table.rows], 15):  # few enough to patch, not rebuild
+            packs = rng.randint(0, 9)
+            updates.append((row_id, {1: rng.choice(NAMES), 2: packs, 4: packs * 10}))
+        table.update_many(updates)
+        table.extend([_row(rng, table.allocate_id()) for _ in range(rng.randint(0, 8))])
+        _assert_consistent(table, indexes)
+
+
+def test_indexes_added_after_load_are_filled(table):
+    rng = random.Random(3)
+    table.load([_row(rng, row_id) for row_id in range(1, 51)])
+    indexes = _attach(table)
+    _assert_consistent(table, indexes)
+    table.clear()
+    _assert_consistent(table, indexes)
+
+
+def _attach_lazy(table, lock=None):
+    return {name: table.add_index(LazyIndex(index, table, lock), fill=False)
+            for name, index in _new_indexes().items()}
+
+
+def _mutate(table, rng):
+    ids = [row[0] for row in table.rows]
+    row_id = rng.choice(ids)
+    packs = rng.randint(0, 9)
+    table.update(row_id, {1: rng.choice(NAMES), 2: packs, 4: packs * 10})
+    table.remove(rng.choice([other for other in ids if other != row_id]))
+    table.append(_row(rng, table.allocate_id()))
+
+
+def test_lazy_indexes_are_built_on_first_query(table):
+    rng = random.Random(5)
+    indexes = _attach_lazy(table)
+    table.load([_row(rng, row_id) for row_id in range(1, 101)])
+    assert not any(index.built for index in indexes.values())
+    for _ in range(20):
+        _mutate(table, rng)
+    _assert_consistent(table, indexes)
+    assert all(index.built for index in indexes.values())
+    for _ in range(20):
+        _mutate(table, rng)
+    _assert_consistent(table, indexes)
+
+
+class _HookLock:
+    """Lock stand-in that runs hook() each time it is taken (i.e. between prepare() chunks)"""
+
+    def __init__(self, hook):
+        self.hook = hook
+
+    def __enter__(self):
+        self.hook()
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_prepared_lazy_index_catches_up_with_changes_between_chunks(table, monkeypatch):
+    monkeypatch.setattr(LazyIndex, "CHUNK_ROWS", 7)
+    rng = random.Random(11)
+    indexes = _attach_lazy(table, _HookLock(lambda: _mutate(table, rng) if len(table) else None))
+    table.load([_row(rng, row_id) for row_id in range(1, 61)])
+    for index in indexes.values():
+        index.prepare()
+        assert index.built
+    _assert_consistent(table, indexes)
+
+
+def test_query_during_prepare_finishes_the_build(table, monkeypatch):
+    monkeypatch.setattr(LazyIndex, "CHUNK_ROWS", 5)
+    rng = random.Random(13)
+    taken, found, expected = [], [], []
+
+    def hook():
+        taken.append(None)
+        if len(taken) == 3:  # between two chunks: change the table, then query it
+            _mutate(table, rng)
+            found.append(indexes["grams"].search("mol"))
+            expected.append({row[0] for row in table.rows if "mol" in row[1].casefold()})
+
+    indexes = {"grams": table.add_index(LazyIndex(NgramIndex(1), table, _HookLock(hook)), fill=False)}
+    table.load([_row(rng, row_id) for row_id in range(1, 41)])
+    indexes["grams"].prepare()
+    assert indexes["grams"].built
+    assert found == expected
+    _mutate(table, rng)
+    for pattern in ("mol", "MG", "in", "ceti"):
+        assert indexes["grams"].search(pattern) == {row[0] for row in table.rows
+                                                    if pattern.casefold() in row[1].casefold()}
+
+
+def test_sorted_index_key_of_and_count_range():
+    index = SortedIndex(lambda row: row[1])
+    for row in ([1, 5], [2, 3], [3, 5], [4, None]):
+        index.add(row)
+    assert index.key_of(3) == 5
+    assert index.key_of(4) is None
+    assert index.count_range(4, 5) == 2
+    assert index.range(reverse=True) == [3, 1, 2]
+    index.discard([1, 5])
+    assert index.range() == [2, 3]
@@ -0,0 +1,85 @@
+# test_journal.py - Journal mode: replay on startup and compaction into the snapshot
+import json
+import os
+
+from clinic_inventory.journal import journal_path_for
+
+
+def _mutate(inventory):
+    first = inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")["id"]
+    second = inventory.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")["id"]
+    inventory.add_equipment("BP Monitor", 4, "Working")
+    inventory.update_medicine(first, "Paracetamol 500mg", 19, 10, 190, "2026-12-31")
+    inventory.delete_medicine(second)
+    inventory.sort_equipment_by_name()
+
+
+def test_journal_is_replayed_on_startup(make_inventory, tmp_path, storage):
+    inventory = make_inventory(journal=True, compact_every=1000, storage=storage)
+    _mutate(inventory)
+    expected = ([row[:] for row in inventory.medicines], [row[:] for row in inventory.equipment])
+    assert inventory.journal.pending == 6
+    # A crash leaves the journal behind: no compaction, the snapshot was never written
+    inventory.journal.close()
+    assert not os.path.exists(tmp_path / "inventory.json")
+
+    reloaded = make_inventory(journal=True, storage=storage)
+    assert (reloaded.medicines, reloaded.equipment) == expected
+    assert reloaded.medicine_table.next_id == 3  # the removed ID is not handed out again
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(make_inventory, tmp_path):
+    inventory = make_inventory(journal=True, compact_every=4)
+    _mutate(inventory)
+    with open(tmp_path / "inventory.json", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    # Compacted after the fourth record; the two later ones are still only journaled
+    assert snapshot["journal_seq"] == 4
+    assert inventory.journal.pending == 2
+    inventory.close()
+    assert os.path.getsize(journal_path_for(str(tmp_path / "inventory.json"))) == 0
+
+    reloaded = make_inventory(journal=True)
+    assert reloaded.medicines == [[1, "Paracetamol 500mg", 19, 10, 190, "2026-12-31"]]
+    assert reloaded.equipment == [[1, "BP Monitor", 4, "Working"]]
+
+
+def test_records_already_in_the_snapshot_are_skipped(make_inventory, tmp_path):
+    inventory = make_inventory(journal=True)
+    _mutate(inventory)
+    # Crash after the snapshot was written but before the journal was truncated
+    assert inventory.save_to_json()
+    inventory.journal.close()
+
+    reloaded = make_inventory(journal=True)
+    assert reloaded.medicines == [[1, "Paracetamol 500mg", 19, 10, 190, "2026-12-31"]]
+
+
+def test_torn_last_record_is_ignored(make_inventory, tmp_path):
+    inventory = make_inventory(journal=True)
+    inventory.add_medicine("Cetirizine", 3, 10, 30, "2027-03-01")
+    inventory.journal.close()
+    with open(journal_path_for(str(tmp_path / "inventory.json")), "a", encoding="utf-8") as f:
+        f.write('[2, "append", "medicines", [2, "Torn')
+
+    reloaded = make_inventory(journal=True)
+    assert reloaded.medicines == [[1, "Cetirizine", 3, 10, 30, "2027-03-01"]]
+
+
+def test_appends_after_a_torn_record_survive_reload(make_inventory, tmp_path):
+    inventory = make_inventory(journal=True)
+    inventory.add_medicine("Cetirizine", 3, 10, 30, "2027-03-01")
+    inventory.compact_journal()  # so the reload below has no complete record to replay
+    inventory.journal.close()
+    path = journal_path_for(str(tmp_path / "inventory.json"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('[2, "append", "medicines", [2, "Torn')
+
+    reloaded = make_inventory(journal=True)
+    reloaded.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+    reloaded.update_medicine(1, "Cetirizine", 2, 10, 20, "2027-03-01")
+    reloaded.journal.close()
+
+    again = make_inventory(journal=True)
+    assert again.medicines == [[1, "Cetirizine", 2, 10, 20, "2027-03-01"],
+                               [2, "Amoxicillin", 5, 12, 60, "2027-01-05"]]
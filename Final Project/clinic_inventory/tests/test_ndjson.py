@@ -0,0 +1,43 @@
+# test_ndjson.py - NDJSON inventory files: round-trip, section reads and quarantine
+import json
+
+from clinic_inventory import NdjsonReader
+
+
+def _inventory(make_inventory):
+    inventory = make_inventory("inventory.ndjson")
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+    inventory.add_equipment("BP Monitor", 4, "Working")
+    return inventory
+
+
+def test_round_trip(make_inventory):
+    inventory = _inventory(make_inventory)
+    inventory.close()
+    reloaded = make_inventory("inventory.ndjson")
+    assert reloaded.medicines == [[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"],
+                                  [2, "Amoxicillin", 5, 12, 60, "2027-01-05"]]
+    assert reloaded.equipment == [[1, "BP Monitor", 4, "Working"]]
+    assert reloaded.medicine_table.next_id == 3
+
+
+def test_reads_one_table(make_inventory, tmp_path):
+    _inventory(make_inventory).close()
+    reader = NdjsonReader(str(tmp_path / "inventory.ndjson"))
+    assert list(reader.rows("equipment")) == [[1, "BP Monitor", 4, "Working"]]
+    assert reader.next_ids == {"medicines": 3, "equipment": 2}
+
+
+def test_corrupt_line_is_quarantined(make_inventory, tmp_path):
+    _inventory(make_inventory).close()
+    path = tmp_path / "inventory.ndjson"
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    lines[1] = lines[1][:25] + "\n"  # first medicine record cut short
+    path.write_text("".join(lines), encoding="utf-8")
+
+    reloaded = make_inventory("inventory.ndjson")
+    assert reloaded.load_error is None
+    assert [row[0] for row in reloaded.medicines] == [2]
+    quarantined = (tmp_path / "inventory.quarantine.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["line"] for line in quarantined] == [lines[1].rstrip("\n")]
@@ -0,0 +1,62 @@
+# test_query.py - Combined queries agree with a plain scan whichever index drives them
+from datetime import date, timedelta
+
+import pytest
+
+from clinic_inventory import AtLeast, AtMost, Between, Contains, Equals, ExpiresWithin, parse_conditions
+
+
+@pytest.fixture
+def inventory(make_inventory, storage):
+    inventory = make_inventory(storage=storage)
+    today = date.today()
+    with inventory.batch():
+        for i in range(150):
+            packs = i % 11
+            expiry = (today + timedelta(days=(i * 7) % 400 - 30)).isoformat()
+            inventory.add_medicine(f"Med {i % 13} {'500mg' if i % 3 else 'syrup'}", packs, 10, packs * 10, expiry)
+        for i in range(40):
+            inventory.add_equipment(f"Device {i % 5}", i % 6, "Working" if i % 4 else "Broken")
+    inventory.sort_medicines_by_name(ascending=False)
+    return inventory
+
+
+def _scan(rows, condition):
+    return [row[0] for row in rows if condition(row)]
+
+
+def test_query_medicines_matches_a_scan(inventory):
+    cutoff = (date.today() + timedelta(days=60)).isoformat()
+    got = inventory.query_medicines(Contains("name", "MG"), ExpiresWithin(60), AtMost("total_qty", 40))
+    assert [m["id"] for m in got] == _scan(
+        inventory.medicines, lambda row: "mg" in row[1].lower() and row[5] <= cutoff and row[4] <= 40)
+    got = inventory.query_medicines(Between("packs", 2, 4), Equals("name", "med 4 syrup"))
+    assert [m["id"] for m in got] == _scan(
+        inventory.medicines, lambda row: 2 <= row[2] <= 4 and row[1].lower() == "med 4 syrup")
+
+
+def test_query_equipment_matches_a_scan(inventory):
+    got = inventory.query_equipment(AtLeast("stock", 3), Contains("status", "work"))
+    assert [e["id"] for e in got] == _scan(inventory.equipment, lambda row: row[2] >= 3 and row[3] == "Working")
+
+
+def test_explain_picks_the_most_selective_index(inventory):
+    plan = inventory.explain_medicines(Contains("name", "syrup"), Equals("name", "Med 4 syrup"))
+    assert plan.driver.field == "name"
+    assert plan.rows_examined < len(inventory.medicines)
+    assert "QUERY medicines" in str(plan)
+
+
+def test_unknown_field_is_rejected(inventory):
+    with pytest.raises(KeyError):
+        inventory.query_medicines(Equals("colour", "red"))
+
+
+def test_parse_conditions():
+    predicates = parse_conditions("name~mg; expires<=60; total_qty<=20", numeric_fields=("total_qty",))
+    assert [type(p) for p in predicates] == [Contains, ExpiresWithin, AtMost]
+    assert predicates[2].high == 20
+    with pytest.raises(ValueError):
+        parse_conditions("name mg")
+    with pytest.raises(ValueError):
+        parse_conditions("expires>=5")
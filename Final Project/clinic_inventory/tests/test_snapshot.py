@@ -0,0 +1,47 @@
+# test_snapshot.py - Binary startup snapshots: round-trip and staleness
+import os
+
+from clinic_inventory import RowTable, Snapshot, write_snapshot
+
+
+def test_write_and_read_back(tmp_path):
+    medicines = RowTable()
+    medicines.load([[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"], [3, "Ämoxicillin", 5, 12, 60, ""]], next_id=7)
+    equipment = RowTable()
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot(path, {"medicines": medicines, "equipment": equipment}, {"journal_seq": 4})
+    with Snapshot(path) as snapshot:
+        table = snapshot.table("medicines")
+        assert len(table) == 2
+        assert table.rows() == medicines.rows
+        assert table.row(1) == medicines.rows[1]
+        assert table.next_id == 7
+        assert len(snapshot.table("equipment")) == 0
+        assert snapshot.extra["journal_seq"] == 4
+
+
+def test_engine_starts_from_a_current_snapshot(make_inventory, tmp_path):
+    inventory = make_inventory(binary_snapshot=True)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.close()
+    assert os.path.exists(inventory.snapshot_file)
+
+    reloaded = make_inventory(binary_snapshot=True)
+    snapshot = reloaded.open_binary_snapshot()
+    assert snapshot is not None
+    snapshot.close()
+    assert reloaded.medicines == [[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]]
+
+
+def test_stale_snapshot_is_ignored(make_inventory, tmp_path):
+    inventory = make_inventory(binary_snapshot=True)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.close()
+    # The JSON file changes behind the snapshot's back
+    other = make_inventory()
+    other.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+    other.close()
+
+    reloaded = make_inventory(binary_snapshot=True)
+    assert reloaded.open_binary_snapshot() is None
+    assert [row[1] for row in reloaded.medicines] == ["Paracetamol 500mg", "Amoxicillin"]
@@ -0,0 +1,84 @@
+# test_storage.py - SQLite backend: row-level writes, reloads and failed writes
+import sqlite3
+
+import pytest
+
+from clinic_inventory import RowTable, SQLiteBackend, migrate_json_to_sqlite
+
+
+def test_changes_survive_a_restart(make_inventory, tmp_path):
+    db = str(tmp_path / "inventory.db")
+    inventory = make_inventory(backend=SQLiteBackend(db))
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+    inventory.insert_medicine_at_position(0, "Cetirizine", 3, 10, 30, "2027-03-01")
+    inventory.update_medicine(1, "Paracetamol 500mg", 19, 10, 190, "2026-12-31")
+    inventory.delete_medicine(2)
+    inventory.add_equipment("BP Monitor", 4, "Working")
+    expected = [row[:] for row in inventory.medicines]
+    inventory.close()
+
+    reloaded = make_inventory(backend=SQLiteBackend(db))
+    assert reloaded.medicines == expected
+    assert reloaded.equipment == [[1, "BP Monitor", 4, "Working"]]
+    assert reloaded.add_medicine("Saline", 1, 1, 1, "2027-01-01")["id"] == 4
+
+
+def test_failed_write_restores_memory_and_raises(make_inventory, tmp_path):
+    db = str(tmp_path / "inventory.db")
+    inventory = make_inventory(backend=SQLiteBackend(db))
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TRIGGER refuse BEFORE INSERT ON medicines "
+                     "BEGIN SELECT RAISE(ABORT, 'disk says no'); END")
+    with pytest.raises(sqlite3.IntegrityError):
+        inventory.add_medicine("Amoxicillin", 5, 12, 60, "2027-01-05")
+    assert inventory.medicines == [[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]]
+    assert inventory.find_medicine_by_name("Amoxicillin") is None
+
+
+def test_queries_straight_from_the_file(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "inventory.db"))
+    medicines = RowTable()
+    medicines.load([[1, "paracetamol", 2, 10, 20, "2026-12-31"], [2, "Amoxicillin", 5, 12, 60, "2027-01-05"]])
+    backend.replace_all({"medicines": medicines, "equipment": RowTable()})
+    assert backend.count("medicines") == 2
+    assert backend.fetch_page("medicines", 0, 1, order_by="name") == [(2, "Amoxicillin", 5, 12, 60, "2027-01-05")]
+    assert [row[0] for row in backend.fetch_range("medicines", "total_qty", 30)] == [2]
+    assert [row[0] for row in backend.fetch_by_name("medicines", "PARA", prefix=True)] == [1]
+    backend.close()
+
+
+def test_migrate_json_to_sqlite(make_inventory, tmp_path):
+    inventory = make_inventory(journal=True)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.close()
+    db = str(tmp_path / "inventory.db")
+    assert migrate_json_to_sqlite(str(tmp_path / "inventory.json"), db) == (1, 0)
+    with pytest.raises(ValueError):
+        migrate_json_to_sqlite(str(tmp_path / "inventory.json"), db)
+    assert migrate_json_to_sqlite(str(tmp_path / "inventory.json"), db, overwrite=True) == (1, 0)
+
+
+def test_migrate_refuses_an_unreadable_json_file(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text('{"medicines": [[1, "A" 1]]}', encoding="utf-8")
+    db = tmp_path / "inventory.db"
+    with pytest.raises(RuntimeError):
+        migrate_json_to_sqlite(str(path), str(db))
+    assert not db.exists()
+    assert path.read_text(encoding="utf-8") == '{"medicines": [[1, "A" 1]]}'
+
+
+def test_failed_migration_removes_the_new_database(make_inventory, tmp_path, monkeypatch):
+    inventory = make_inventory()
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.close()
+
+    def fail(self, tables):
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(SQLiteBackend, "replace_all", fail)
+    db = tmp_path / "inventory.db"
+    with pytest.raises(sqlite3.OperationalError):
+        migrate_json_to_sqlite(str(tmp_path / "inventory.json"), str(db))
+    assert list(tmp_path.glob("inventory.db*")) == []
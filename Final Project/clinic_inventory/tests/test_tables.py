@@ -0,0 +1,63 @@
+# test_tables.py - RowTable: ID sequence, holes and bulk loads
+from clinic_inventory import RowTable
+
+
+def _table(rows):
+    table = RowTable()
+    for row in rows:
+        row = list(row)
+        row[0] = table.allocate_id()
+        table.append(row)
+    return table
+
+
+def test_ids_are_never_reused():
+    table = _table([[0, "a"], [0, "b"], [0, "c"]])
+    table.remove(3)
+    row = [table.allocate_id(), "d"]
+    table.append(row)
+    assert row[0] == 4
+    assert [r[0] for r in table] == [1, 2, 4]
+
+
+def test_remove_leaves_positions_consistent():
+    table = _table([[0, f"row {i}"] for i in range(100)])
+    for row_id in range(1, 101, 3):
+        table.remove(row_id)
+    expected = [[i, f"row {i - 1}"] for i in range(1, 101) if (i - 1) % 3]
+    assert table.rows == expected
+    for position, row in enumerate(expected):
+        assert table.position_of(row[0]) == position
+        assert table.at(position) == row
+    assert table.get(1) is None
+
+
+def test_pop_and_last_skip_holes():
+    table = _table([[0, "a"], [0, "b"], [0, "c"]])
+    table.remove(3)
+    assert table.last() == [2, "b"]
+    assert table.pop() == [2, "b"]
+    assert table.rows == [[1, "a"]]
+
+
+def test_update_and_in_order():
+    table = _table([[0, "a"], [0, "b"], [0, "c"]])
+    table.update(2, {1: "B"})
+    assert table.get(2) == [2, "B"]
+    assert table.in_order({3, 1}) == [1, 3]
+    assert table.first_in_order({3, 2}) == 2
+    assert table.first_in_order([]) is None
+
+
+def test_load_reissues_duplicate_ids():
+    table = RowTable()
+    reissued = table.load([[1, "a"], [1, "b"], [2, "c"]], next_id=1)
+    assert reissued == [(1, 3)]
+    assert table.rows == [[1, "a"], [3, "b"], [2, "c"]]
+    assert table.next_id == 4
+
+
+def test_load_resumes_the_sequence():
+    table = RowTable()
+    assert table.load([[5, "a"]], next_id=9) == []
+    assert table.allocate_id() == 9
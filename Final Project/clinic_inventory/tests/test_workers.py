@@ -0,0 +1,54 @@
+# test_workers.py - Query workers: superseded jobs, errors, and reads racing mutations
+import threading
+import time
+
+from clinic_inventory import QueryWorkers
+
+
+def _drain(workers, timeout=5):
+    deadline = time.monotonic() + timeout
+    while workers.busy and time.monotonic() < deadline:
+        workers.poll()
+        time.sleep(0.01)
+    workers.poll()
+
+
+def test_newer_job_supersedes_older_one():
+    workers = QueryWorkers(workers=1)
+    results = []
+    try:
+        workers.submit("medicines", lambda: (time.sleep(0.2), "old")[1], results.append)
+        workers.submit("medicines", lambda: "new", results.append)
+        workers.submit("equipment", lambda: 1 / 0, results.append, lambda e: results.append(type(e).__name__))
+        _drain(workers)
+    finally:
+        workers.shutdown()
+    assert sorted(results) == ["ZeroDivisionError", "new"]
+
+
+def test_sorted_view_built_while_the_table_changes(make_inventory):
+    inventory = make_inventory()
+    with inventory.batch():
+        for i in range(20000):
+            inventory.add_medicine(f"Med {i % 700}", i % 9, 2, i % 30, "2027-01-01")
+    stop = threading.Event()
+
+    def mutate():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            inventory.add_medicine(f"New {n}", 1, 1, n % 40, "2028-01-01")
+            inventory.update_medicine(n, "Changed", 1, 1, (n * 7) % 40, "2026-05-05")
+            inventory.delete_medicine(n + 10000)
+
+    thread = threading.Thread(target=mutate)
+    thread.start()
+    workers = inventory.start_query_workers()
+    results = []
+    workers.submit("view", lambda: inventory.prepare_sorted_view("medicines", "total_qty"), results.append)
+    _drain(workers, timeout=60)
+    stop.set()
+    thread.join()
+    assert results and results[0] > 0
+    view = [m["id"] for m in inventory.view_medicines_sorted("total_qty")]
+    assert view == [row[0] for row in sorted(inventory.medicines, key=lambda row: (row[4], row[0]))]
@@ -0,0 +1,119 @@
+# test_writer.py - Background writer: debounced snapshots, flushes and failures
+import json
+import time
+
+from clinic_inventory import BackgroundWriter
+
+
+def test_flush_writes_the_latest_snapshot(tmp_path):
+    state = {"n": 0}
+    path = tmp_path / "out.json"
+    writer = BackgroundWriter(lambda: json.dumps(state), str(path), debounce=5, max_delay=10)
+    try:
+        for n in range(1, 6):
+            state["n"] = n
+            writer.notify()
+        assert writer.flush(timeout=5)
+        assert json.loads(path.read_text(encoding="utf-8")) == {"n": 5}
+        assert writer.queue_depth == 0
+    finally:
+        writer.stop()
+
+
+def test_empty_flush_does_not_skip_the_next_debounce(tmp_path):
+    path = tmp_path / "out.json"
+    writer = BackgroundWriter(lambda: "{}", str(path), debounce=5, max_delay=10)
+    try:
+        assert writer.flush(timeout=1)
+        assert not writer._urgent
+        writer.notify()
+        time.sleep(0.3)
+        assert not path.exists()  # still waiting out the debounce
+        assert writer.queue_depth == 1
+    finally:
+        writer.stop()
+
+
+def test_failed_write_is_reported(tmp_path):
+    def snapshot():
+        raise RuntimeError("no snapshot")
+
+    writer = BackgroundWriter(snapshot, str(tmp_path / "out.json"), debounce=0, max_delay=0)
+    try:
+        writer.notify()
+        assert not writer.flush(timeout=5)
+        assert writer.last_error == "no snapshot"
+    finally:
+        writer.stop()
+
+
+def test_errors_other_than_io_are_not_retried(tmp_path):
+    calls = []
+
+    def snapshot():
+        calls.append(time.monotonic())
+        raise RuntimeError("not overwriting it")
+
+    writer = BackgroundWriter(snapshot, str(tmp_path / "out.json"), debounce=0, max_delay=0)
+    try:
+        writer.notify()
+        assert not writer.flush(timeout=5)
+        time.sleep(0.3)
+        assert len(calls) == 1
+        assert writer.queue_depth == 0
+        assert writer.last_error == "not overwriting it"
+        writer.notify()  # new changes get a fresh attempt
+        assert not writer.flush(timeout=5)
+        assert len(calls) == 2
+    finally:
+        writer.stop()
+
+
+def test_io_errors_are_retried_with_capped_backoff(tmp_path):
+    calls = []
+    path = tmp_path / "out.json"
+
+    def snapshot():
+        calls.append(time.monotonic())
+        if len(calls) <= 4:
+            raise OSError("disk full")
+        return "{}"
+
+    writer = BackgroundWriter(snapshot, str(path), debounce=0, max_delay=0)
+    writer.RETRY_DELAY, writer.MAX_RETRY_DELAY = 0.05, 0.1
+    try:
+        writer.notify()
+        deadline = time.monotonic() + 5
+        while writer.flush_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text(encoding="utf-8") == "{}"
+        gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+        assert len(gaps) == 4
+        assert gaps[0] >= 0.05 and gaps[1] >= 0.1 and gaps[2] >= 0.1
+        assert max(gaps) < 1
+        assert writer.failures == 0 and writer.last_error is None
+    finally:
+        writer.stop()
+
+
+def test_engine_writer_gives_up_on_an_unreadable_file(make_inventory, tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text('{"medicines": [[1, "A" 1]]}', encoding="utf-8")
+    inventory = make_inventory()
+    writer = inventory.start_background_writer(debounce=0, max_delay=0)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    assert not writer.flush(timeout=5)
+    time.sleep(0.3)
+    assert writer.stats()["queue_depth"] == 0
+    assert writer.failures == 0
+    assert "could not be loaded" in writer.last_error
+    assert path.read_text(encoding="utf-8") == '{"medicines": [[1, "A" 1]]}'
+
+
+def test_engine_writes_on_close(make_inventory, tmp_path):
+    inventory = make_inventory()
+    inventory.start_background_writer(debounce=5, max_delay=10)
+    inventory.add_medicine("Paracetamol 500mg", 20, 10, 200, "2026-12-31")
+    inventory.close()
+    data = json.loads((tmp_path / "inventory.json").read_text(encoding="utf-8"))
+    assert data["medicines"] == [[1, "Paracetamol 500mg", 20, 10, 200, "2026-12-31"]]
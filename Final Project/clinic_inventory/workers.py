@@ -0,0 +1,128 @@
+# workers.py - Worker threads for queries and sorts, with results polled by the UI
+#
+# A UI submits a job (any callable reading the inventory) on a named channel,
+# e.g. "medicines". Jobs run on worker threads without holding the engine
+# lock: the engine methods they call take it themselves, and only for as long
+# as they touch shared state (see ClinicInventory.prepare_sorted_view and
+# import_medicines, whose slow steps run unlocked). Short reads still take
+# turns on the lock with mutations, so the workers keep the UI thread
+# responsive rather than running reads in parallel. Submitting a new job on
+# a channel supersedes the previous one: if it has not started it is skipped,
+# and if it is already running its result is dropped when it finishes.
+#
+# Results are never handed to the UI from a worker thread. Finished jobs wait
+# in a queue until the UI thread calls poll() (e.g. from a Tk after() loop),
+# which runs the callbacks of the jobs that are still current.
+import queue
+import threading
+import time
+
+
+class QueryWorkers:
+    """Small pool of threads running inventory reads off the UI thread.
+
+    If lock is given it is held around every job; by default jobs lock for
+    themselves.
+    """
+
+    def __init__(self, lock=None, workers=2):
+        self.lock = lock
+        self._jobs = queue.Queue()
+        self._done = queue.Queue()
+        self._state = threading.Lock()
+        self._ticket = 0
+        self._current = {}            # channel -> ticket of the job whose result is wanted
+        # Metrics
+        self.submitted = 0
+        self.superseded = 0           # jobs skipped or dropped because a newer one replaced them
+        self.delivered = 0
+        self.last_job_ms = 0.0
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"inventory-query-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # ---------- called from the UI thread ----------
+    def submit(self, channel, job, on_done, on_error=None):
+        """Run job() on a worker; on_done(result) or on_error(exception) is called from poll().
+
+        Replaces any job still pending on the same channel. Returns the ticket.
+        """
+        with self._state:
+            self._ticket += 1
+            ticket = self._ticket
+            if channel in self._current:
+                self.superseded += 1
+            self._current[channel] = ticket
+            self.submitted += 1
+        self._jobs.put((channel, ticket, job, on_done, on_error))
+        return ticket
+
+    def cancel(self, channel):
+        """Forget the pending job of a channel (its result will be dropped)"""
+        with self._state:
+            if self._current.pop(channel, None) is not None:
+                self.superseded += 1
+
+    def pending(self, channel=None):
+        """True while a job (on the given channel, or on any) has not been delivered"""
+        with self._state:
+            return channel in self._current if channel is not None else bool(self._current)
+
+    @property
+    def busy(self):
+        return self.pending()
+
+    def poll(self):
+        """Run the callbacks of finished jobs that are still current; returns how many ran"""
+        delivered = 0
+        while True:
+            try:
+                channel, ticket, ok, value, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                return delivered
+            with self._state:
+                if self._current.get(channel) != ticket:
+                    continue  # superseded while running
+                del self._current[channel]
+                self.delivered += 1
+            delivered += 1
+            if ok:
+                on_done(value)
+            elif on_error is not None:
+                on_error(value)
+            else:
+                print(f"Error in background query: {value}")
+
+    def shutdown(self, timeout=None):
+        """Stop the worker threads (jobs still queued are skipped)"""
+        with self._state:
+            self._current.clear()
+        for _thread in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ---------- worker threads ----------
+    def _run(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            channel, ticket, job, on_done, on_error = item
+            with self._state:
+                if self._current.get(channel) != ticket:
+                    continue  # a newer job replaced this one before it started
+            started = time.perf_counter()
+            try:
+                if self.lock is None:
+                    value = job()
+                else:
+                    with self.lock:
+                        value = job()
+                ok = True
+            except Exception as e:
+                value, ok = e, False
+            self.last_job_ms = (time.perf_counter() - started) * 1000
+            self._done.put((channel, ticket, ok, value, on_done, on_error))
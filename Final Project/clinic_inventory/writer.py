@@ -0,0 +1,209 @@
+# writer.py - Background persistence thread with debounced, crash-safe flushes
+#
+# Mutations only call BackgroundWriter.notify(), which is O(1) and never
+# touches the disk. A dedicated thread waits until notifications stop
+# arriving for `debounce` seconds (or `max_delay` has passed since the first
+# one), serializes the inventory once under the engine lock and writes it with
+# atomic_write_text(): temp file in the same directory, fsync, then rename over
+# the target. A crash mid-write therefore leaves the previous file intact.
+#
+# A write that fails with an I/O error (OSError: disk full, file locked, ...)
+# is retried with capped exponential backoff. Any other error (e.g. the
+# engine refusing to overwrite a file it could not load) will not go away by
+# retrying: the queued changes are dropped, the error stays in last_error,
+# and the writer only tries again when new changes arrive.
+import os
+import tempfile
+import threading
+import time
+
+
+def atomic_write_text(path, text):
+    """Replace path with text so readers only ever see the old or the new file"""
+    _atomic_write(path, text, "w", ".json")
+
+
+def atomic_write_bytes(path, data):
+    """Binary counterpart of atomic_write_text"""
+    _atomic_write(path, data, "wb", ".bin")
+
+
+def _atomic_write(path, data, mode, suffix):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, mode, **({"encoding": "utf-8"} if mode == "w" else {})) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class BackgroundWriter:
+    """Debounced writer thread for an inventory snapshot.
+
+    snapshot() is called on the writer thread and must return the text to
+    write; path is the file it replaces.
+    """
+
+    RETRY_DELAY = 0.5       # seconds before the first retry of a failed I/O write
+    MAX_RETRY_DELAY = 30.0  # cap for the doubling delay between retries
+
+    def __init__(self, snapshot, path, debounce=0.2, max_delay=2.0):
+        self.snapshot = snapshot
+        self.path = path
+        self.debounce = debounce      # quiet period that ends a burst of changes
+        self.max_delay = max_delay    # upper bound on how long a change may wait
+        self._cond = threading.Condition()
+        self._pending = 0             # change notifications not yet written (queue depth)
+        self._first_notify = 0.0
+        self._last_notify = 0.0
+        self._flushing = False
+        self._urgent = False
+        self._stopping = False
+        self._retry_at = 0.0          # no write before this time (backoff after an I/O error)
+        self.failures = 0             # consecutive failed writes that will be retried
+        # Flush metrics
+        self.flush_count = 0
+        self._attempts = 0            # write attempts, successful or not
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- called from the UI / engine thread ----------
+    def notify(self):
+        """Mark the inventory dirty (O(1), never blocks on disk)"""
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_notify = now
+            self._last_notify = now
+            self._pending += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Write pending changes now and wait for them.
+
+        Returns False if the timeout expired or the write failed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._pending:
+                # Skip the debounce for these changes only: the write clears the flag,
+                # so a flush with nothing queued must not leave it set for the next burst
+                self._urgent = True
+                self._cond.notify_all()
+            attempts = self._attempts
+            while self._pending or self._flushing:
+                if self._attempts > attempts and self.last_error is not None:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self.last_error is None
+
+    def stop(self, timeout=None):
+        """Flush anything pending and stop the thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    @property
+    def queue_depth(self):
+        """Number of change notifications waiting to be written"""
+        return self._pending
+
+    def stats(self):
+        """Flush latency and queue depth metrics"""
+        with self._cond:
+            return {
+                "queue_depth": self._pending,
+                "flushing": self._flushing,
+                "flush_count": self.flush_count,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+                "avg_flush_ms": self.total_flush_ms / self.flush_count if self.flush_count else 0.0,
+                "last_error": self.last_error,
+                "failures": self.failures,
+            }
+
+    # ---------- writer thread ----------
+    def _run(self):
+        with self._cond:
+            while True:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # stopping with nothing left to write
+
+                # Debounce: let a burst of changes collapse into one flush,
+                # and wait out the backoff after a failed write
+                while not (self._stopping or self._urgent):
+                    wake_at = min(self._last_notify + self.debounce, self._first_notify + self.max_delay)
+                    wake_at = max(wake_at, self._retry_at)
+                    remaining = wake_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                written = self._pending
+                self._pending = 0
+                self._urgent = False
+                self._flushing = True
+                self._cond.release()
+                try:
+                    error = self._write()
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self._attempts += 1
+                if error is None:
+                    self.failures = 0
+                    self._retry_at = 0.0
+                elif isinstance(error, OSError) and not self._stopping:
+                    # Keep the changes queued and retry once the backoff has passed
+                    self.failures += 1
+                    delay = min(self.RETRY_DELAY * 2 ** (self.failures - 1), self.MAX_RETRY_DELAY)
+                    now = time.monotonic()
+                    self._retry_at = now + delay
+                    if not self._pending:
+                        self._first_notify = now
+                    self._last_notify = now
+                    self._pending += written
+                else:
+                    # Not transient (or stopping): give up on these changes
+                    self.failures = 0
+                    self._retry_at = 0.0
+                self._cond.notify_all()
+
+    def _write(self):
+        started = time.perf_counter()
+        try:
+            atomic_write_text(self.path, self.snapshot())
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error saving to JSON: {e}")
+            return e
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flush_count += 1
+        self.last_flush_ms = elapsed_ms
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.last_error = None
+        return None